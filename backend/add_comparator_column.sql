@@ -0,0 +1,7 @@
+-- Add per-question output comparator (exact, whitespace, token, float, unordered)
+-- Run this on your Supabase database
+
+ALTER TABLE questions ADD COLUMN IF NOT EXISTS comparator VARCHAR(20) DEFAULT 'whitespace';
+
+-- Existing questions keep the historic line-wise comparison
+UPDATE questions SET comparator = 'whitespace' WHERE comparator IS NULL;
@@ -0,0 +1,178 @@
+"""
+ASGI entrypoint - the async alternative to the eventlet Procfile command:
+
+    uvicorn --app-dir backend asgi:app --host 0.0.0.0 --port $PORT --workers 4
+
+The hottest read endpoints (participant-state, leaderboard, questions) are
+served natively on the asyncio event loop with the AsyncConnectionPool
+(db_async.py), so a request waiting on the database costs a coroutine
+rather than a worker thread. Every other request, including Socket.IO
+(long-polling in this mode), runs through the Flask app on a thread pool.
+
+ASYNC_READ_ENDPOINTS=false routes everything through Flask.
+"""
+import logging
+import os
+from urllib.parse import parse_qs
+
+# Flask-SocketIO must not pick eventlet here: nothing is monkey-patched
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'threading')
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app
+from db_async import async_db_manager
+from utils import hot_reads
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+ASYNC_READ_ENDPOINTS = os.getenv('ASYNC_READ_ENDPOINTS', 'true').lower() in ('1', 'true', 'yes')
+# Threads running the Flask (WSGI) part of the API per process
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 32))
+
+wsgi_app = WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, payload):
+        super().__init__(payload.get('error'))
+        self.status = status
+        self.payload = payload
+
+
+# === HANDLERS (mirror the Flask routes, see utils/hot_reads.py) ===
+
+async def participant_state(query, body):
+    try:
+        data = flask_app.json.loads(body or b'null')
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise HTTPError(400, {'error': 'Request body must be a JSON object', 'success': False})
+    user_id = data.get('user_id')
+    contest_id = data.get('contest_id', 1)
+
+    uid = user_id
+    proctor_id = user_id
+    if isinstance(user_id, str) and not user_id.isdigit():
+        u_res = await async_db_manager.execute_named('user_id_by_username', (user_id,))
+        if not u_res:
+            raise HTTPError(404, {'error': 'User not found'})
+        uid = u_res[0]['user_id']
+    else:
+        # participant_proctoring is keyed by username
+        u_res = await async_db_manager.execute_named('user_by_username_or_id', (str(user_id), user_id))
+        proctor_id = u_res[0]['username'] if u_res else ''
+
+    plan = hot_reads.participant_state_plan(uid, contest_id, proctor_id)
+    values = await async_db_manager.run_named_batch(list(plan.values()))
+    return hot_reads.build_participant_state(dict(zip(plan, values)))
+
+
+async def leaderboard(query, body):
+    try:
+        level = int(query.get('level', [1])[0])
+    except ValueError:
+        level = 1
+    res = await async_db_manager.execute_query(hot_reads.LEADERBOARD_QUERY, (level,))
+    return hot_reads.build_leaderboard(res, level)
+
+
+async def questions(query, body):
+    contest_id = query.get('contest_id', [None])[0]
+    level = query.get('level', [1])[0]
+
+    if hot_reads.needs_live_contest(contest_id):
+        l_res = await async_db_manager.execute_named('live_contest_id')
+        contest_id = l_res[0]['contest_id'] if l_res else 1
+
+    r_res, res = await async_db_manager.run_batch([
+        (hot_reads.QUESTIONS_ROUND_QUERY, (contest_id, level)),
+        (hot_reads.QUESTIONS_QUERY, (contest_id, level))
+    ])
+    return hot_reads.build_questions(r_res, res)
+
+
+ROUTES = {
+    ('POST', '/api/contest/participant-state'): participant_state,
+    ('GET', '/api/leaderboard/'): leaderboard,
+    ('GET', '/api/contest/questions'): questions,
+}
+
+
+# === ASGI PLUMBING ===
+
+async def read_body(receive):
+    body = b''
+    max_length = flask_app.config.get('MAX_CONTENT_LENGTH')
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if max_length and len(body) > max_length:
+            raise HTTPError(413, {'error': 'Request entity too large', 'success': False})
+        if not message.get('more_body'):
+            return body
+
+
+def response_headers(scope):
+    """Security headers and CORS, as Flask's after_request hook and flask-cors add them."""
+    headers = [(b'content-type', b'application/json')]
+    for name, value in flask_app.config.get('SECURITY_HEADERS', {}).items():
+        headers.append((name.lower().encode(), value.encode()))
+    origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+    allowed = flask_app.config.get('ALLOWED_ORIGINS') or []
+    if origin and (origin in allowed or '*' in allowed):
+        headers += [
+            (b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin')
+        ]
+    return headers
+
+
+async def send_json(scope, send, status, payload):
+    body = flask_app.json.dumps(payload).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers(scope)})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if ASYNC_READ_ENDPOINTS:
+                try:
+                    await async_db_manager.open()
+                except Exception as e:
+                    # Same policy as the sync manager: start anyway, queries will fail
+                    logger.error(f"❌ Failed to initialize async PostgreSQL pool: {e}")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_db_manager.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    handler = None
+    if scope['type'] == 'http' and ASYNC_READ_ENDPOINTS:
+        handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await wsgi_app(scope, receive, send)
+
+    try:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        body = await read_body(receive)
+        payload = await handler(query, body)
+        await send_json(scope, send, 200, payload)
+    except HTTPError as e:
+        await send_json(scope, send, e.status, e.payload)
+    except Exception as e:
+        logger.exception(f"Internal error on {scope['path']}")
+        # Same policy as Flask's handle_global_error: no internals outside DEBUG
+        error_msg = str(e) if flask_app.config.get('DEBUG') else 'Internal server error. Please try again later.'
+        await send_json(scope, send, 500, {'error': error_msg, 'success': False})
@@ -106,6 +106,7 @@ CREATE TABLE IF NOT EXISTS `questions` (
   `expected_output` TEXT DEFAULT NULL,
   `test_input` TEXT DEFAULT NULL,
   `test_cases` JSON DEFAULT NULL,
+  `comparator` VARCHAR(20) DEFAULT 'whitespace',
   `difficulty_level` ENUM('easy', 'medium', 'hard') NOT NULL,
   
   `points` INT(11) DEFAULT 10,
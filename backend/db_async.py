@@ -0,0 +1,168 @@
+# db_async.py - asyncio variant of PostgreSQLManager (psycopg3 AsyncConnectionPool)
+#
+# Used by the ASGI entrypoint (asgi.py): a request waiting on the database
+# only holds a coroutine, not a worker thread, so one process can keep
+# thousands of idle-waiting requests in flight. Same connection settings
+# and hot-query preparation as db_connection.py; the sync manager keeps
+# serving everything that still runs through Flask.
+
+import asyncio
+import logging
+import os
+import time
+
+from psycopg_pool import AsyncConnectionPool
+from psycopg.rows import dict_row
+
+from db_connection import build_conninfo, DB_PREPARED_STATEMENTS, DB_PREPARE_THRESHOLD, DB_PREPARED_MAX
+from hot_queries import HOT_QUERIES, is_select
+from query_stats import query_stats
+
+logger = logging.getLogger("AsyncDatabaseManager")
+
+# === CONFIGURATION ===
+# Opened next to the sync pool: each ASGI process holds up to
+# DB_POOL_SIZE + ASYNC_DB_POOL_SIZE connections
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 10))
+ASYNC_DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+
+class AsyncPostgreSQLManager:
+    """
+    Coroutine counterpart of PostgreSQLManager's execute_* API with the same
+    return conventions (rows / {"last_id", "affected"}, None/False on error).
+    The pool is opened in the running event loop by open(), or lazily on
+    first use.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self._open_lock = None
+        self._hot_sql = set(HOT_QUERIES.values())
+
+    async def open(self):
+        if self.pool is not None:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self.pool is not None:
+                return
+            conninfo, connection_host, db_port, db_name = build_conninfo()
+            pool = AsyncConnectionPool(
+                conninfo=conninfo,
+                min_size=1,
+                max_size=ASYNC_DB_POOL_SIZE,
+                timeout=ASYNC_DB_POOL_TIMEOUT,
+                kwargs={"row_factory": dict_row},
+                configure=self._configure_connection,
+                open=False
+            )
+            await pool.open(wait=True, timeout=ASYNC_DB_POOL_TIMEOUT)
+            self.pool = pool
+            logger.info(f"✓ Async PostgreSQL pool initialized with database '{db_name}' on {connection_host}:{db_port}")
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("All async database connections closed")
+
+    @staticmethod
+    async def _configure_connection(conn):
+        conn.prepare_threshold = DB_PREPARE_THRESHOLD if DB_PREPARED_STATEMENTS else None
+        conn.prepared_max = DB_PREPARED_MAX
+
+    def _prepare_flag(self, query):
+        return True if DB_PREPARED_STATEMENTS and query in self._hot_sql else None
+
+    async def execute_query(self, query, params=None):
+        """Execute a SELECT query and return results as list of dicts"""
+        try:
+            await self.open()
+            started = time.perf_counter()
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params or (), prepare=self._prepare_flag(query))
+                    result = await cursor.fetchall()
+                    query_stats.record(query, time.perf_counter() - acquired, len(result), acquired - started)
+                    return result if result else []
+        except Exception as e:
+            query_stats.record_error(query)
+            logger.error(f"SELECT Query failed: {e}\nQuery: {query}")
+            return None
+
+    async def execute_update(self, query, params=None):
+        """Execute an INSERT/UPDATE/DELETE query"""
+        try:
+            await self.open()
+            started = time.perf_counter()
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params or (), prepare=self._prepare_flag(query))
+                    await conn.commit()
+                    query_stats.record(query, time.perf_counter() - acquired, cursor.rowcount, acquired - started)
+                    return {"last_id": None, "affected": cursor.rowcount}
+        except Exception as e:
+            query_stats.record_error(query)
+            logger.error(f"UPDATE Query failed: {e}\nQuery: {query}")
+            return False
+
+    async def execute_named(self, name, params=None):
+        """Execute a registered hot query (hot_queries.py) as a prepared statement."""
+        sql = HOT_QUERIES[name]
+        if is_select(sql):
+            return await self.execute_query(sql, params)
+        return await self.execute_update(sql, params)
+
+    async def run_batch(self, statements):
+        """
+        [(sql, params), ...] on one connection in pipeline mode (one round
+        trip), committed together; returns their results in order. Like
+        db_manager.batch(), a failed batch is re-run statement by statement.
+        """
+        if not statements:
+            return []
+        try:
+            await self.open()
+            started = time.perf_counter()
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                cursors = []
+                async with conn.pipeline():
+                    for sql, params in statements:
+                        cursor = conn.cursor()
+                        await cursor.execute(sql, params or (), prepare=self._prepare_flag(sql))
+                        cursors.append(cursor)
+                results = []
+                for (sql, _), cursor in zip(statements, cursors):
+                    if is_select(sql):
+                        results.append(await cursor.fetchall() or [])
+                    else:
+                        results.append({"last_id": None, "affected": cursor.rowcount})
+                    await cursor.close()
+                await conn.commit()
+                # Pipelined statements overlap: each is charged an equal share
+                share = (time.perf_counter() - acquired) / len(statements)
+                wait_share = (acquired - started) / len(statements)
+                for (sql, _), result in zip(statements, results):
+                    query_stats.record(sql, share, len(result) if isinstance(result, list) else result['affected'], wait_share)
+                return results
+        except Exception as e:
+            logger.error(f"Batch of {len(statements)} statements failed: {e}")
+        results = []
+        for sql, params in statements:
+            if is_select(sql):
+                results.append(await self.execute_query(sql, params))
+            else:
+                results.append(await self.execute_update(sql, params))
+        return results
+
+    async def run_named_batch(self, calls):
+        """run_batch() for [(hot query name, params), ...]."""
+        return await self.run_batch([(HOT_QUERIES[name], params) for name, params in calls])
+
+
+async_db_manager = AsyncPostgreSQLManager()
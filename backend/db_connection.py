@@ -1,14 +1,22 @@
 
 # db_connection.py (PostgreSQL for Supabase using psycopg3)
 
+import functools
+import itertools
 import logging
 import os
 import time
 import socket
+import threading
+import weakref
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from psycopg_pool import ConnectionPool
+from psycopg_pool import ConnectionPool, PoolTimeout
 import psycopg
 from psycopg.rows import dict_row
+from psycopg.conninfo import conninfo_to_dict
+from hot_queries import HOT_QUERIES, is_select
+from query_stats import query_stats, WaitHistogram
 
 # Try to import dnspython for better DNS resolution
 try:
@@ -31,6 +39,315 @@ logging.basicConfig(
 )
 logger = logging.getLogger("DatabaseManager")
 
+# Server-side prepared statements. Registered hot queries (hot_queries.py) are
+# prepared on first use per connection; other statements are prepared by
+# psycopg once executed DB_PREPARE_THRESHOLD times on a connection ("none"
+# disables that). Turn both off behind a pooler that cannot hold prepared
+# statements (PgBouncer < 1.21 in transaction mode).
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes')
+_threshold = os.getenv('DB_PREPARE_THRESHOLD', '5').strip().lower()
+DB_PREPARE_THRESHOLD = None if _threshold in ('', 'none', '-1') else int(_threshold)
+DB_PREPARED_MAX = max(int(os.getenv('DB_PREPARED_MAX', 100)), len(HOT_QUERIES))
+
+# Pool sizing. Checkouts that wait longer than DB_POOL_TIMEOUT fail (PoolTimeout).
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+# Idle connections above min_size are closed after this long
+DB_POOL_MAX_IDLE_SEC = float(os.getenv('DB_POOL_MAX_IDLE_SEC', 600))
+# Adaptive sizing: starting a contest (or countdown/level) raises min_size to
+# DB_POOL_WARM_SIZE (0 = half of DB_POOL_SIZE) in every backend worker so the
+# connections exist before the burst; it drops back after DB_POOL_WARM_HOLD_SEC
+# or when the contest ends. Workers pick the signal up from admin_state
+# within DB_POOL_ADAPTIVE_POLL_SEC.
+DB_POOL_ADAPTIVE = os.getenv('DB_POOL_ADAPTIVE', 'false').lower() in ('1', 'true', 'yes')
+DB_POOL_WARM_SIZE = int(os.getenv('DB_POOL_WARM_SIZE', 0))
+DB_POOL_WARM_HOLD_SEC = float(os.getenv('DB_POOL_WARM_HOLD_SEC', 3 * 3600))
+DB_POOL_ADAPTIVE_POLL_SEC = float(os.getenv('DB_POOL_ADAPTIVE_POLL_SEC', 10))
+POOL_WARM_KEY = 'db_pool_warm_until'
+
+# Read replicas: comma-separated DSNs/URLs. execute_query(..., read_only=True)
+# and every SELECT inside a @replica_reads route go to a replica whose
+# measured lag is within DB_REPLICA_MAX_LAG_SEC, else to the primary.
+DB_REPLICA_URLS = [u.strip() for u in os.getenv('DB_REPLICA_URLS', '').split(',') if u.strip()]
+DB_REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', 10))
+DB_REPLICA_MAX_LAG_SEC = float(os.getenv('DB_REPLICA_MAX_LAG_SEC', 5))
+DB_REPLICA_LAG_CHECK_SEC = float(os.getenv('DB_REPLICA_LAG_CHECK_SEC', 5))
+
+# Replay lag in seconds; 0 when the replica has replayed the primary's
+# current WAL position (an idle primary is not lag) or is not a standby
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN %s::pg_lsn IS NOT NULL AND pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag
+"""
+
+_routing = threading.local()
+
+
+def replica_reads(fn):
+    """Route decorator: SELECTs run while handling the request may be served by a read replica."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_routing, 'read_only', False)
+        _routing.read_only = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _routing.read_only = previous
+    return wrapper
+
+
+def build_conninfo():
+    """
+    libpq connection string from the DB_* environment variables (Supabase
+    hosts are resolved to IPv4 first). Shared by the sync and async pools.
+    Returns (conninfo, connection_host, db_port, db_name).
+    """
+    # Get database configuration from environment
+    db_host = os.getenv('DB_HOST')
+    db_port = os.getenv('DB_PORT', '5432')
+    db_user = os.getenv('DB_USER', 'postgres')
+    db_password = os.getenv('DB_PASSWORD')
+    db_name = os.getenv('DB_NAME', 'postgres')
+
+    # Validate critical environment variables
+    if not db_host:
+        raise ValueError("DB_HOST environment variable is not set. Please configure it in your deployment environment.")
+    if not db_password:
+        raise ValueError("DB_PASSWORD environment variable is not set. Please configure it in your deployment environment.")
+
+    logger.info(f"Attempting to connect to database: {db_host}:{db_port}/{db_name} as user {db_user}")
+
+    connection_host = db_host
+    resolved_ip = None
+
+    # Supabase: Try to resolve to IPv4 before connecting (with fallback)
+    if db_host and 'supabase.com' in db_host:
+        # Method 1: Try dnspython with multiple DNS servers
+        if HAS_DNSPYTHON and not resolved_ip:
+            try:
+                resolver = dns.resolver.Resolver()
+                resolver.nameservers = ['8.8.8.8', '8.8.4.4', '1.1.1.1', '1.0.0.1']
+                resolver.timeout = 5
+                resolver.lifetime = 5
+                answers = resolver.resolve(db_host, 'A')
+                ipv4_list = [str(rdata) for rdata in answers if hasattr(rdata, 'address') and ':' not in str(rdata)]
+                if ipv4_list:
+                    resolved_ip = ipv4_list[0]
+                    logger.info(f"✓ Resolved {db_host} to IPv4 via DNS: {resolved_ip}")
+            except Exception as e:
+                logger.warning(f"⚠ DNS resolution via dnspython failed: {e}")
+
+        # Method 2: Try socket.getaddrinfo with IPv4 only
+        if not resolved_ip:
+            try:
+                addr_info = socket.getaddrinfo(db_host, int(db_port), socket.AF_INET, socket.SOCK_STREAM)
+                ipv4_addrs = [info[4][0] for info in addr_info if info[0] == socket.AF_INET]
+                if ipv4_addrs:
+                    resolved_ip = ipv4_addrs[0]
+                    logger.info(f"✓ Resolved {db_host} to IPv4 via socket: {resolved_ip}")
+            except Exception as e:
+                logger.warning(f"⚠ Socket resolution failed: {e}")
+
+        # Method 3: Try standard socket gethostbyname (IPv4 only)
+        if not resolved_ip:
+            try:
+                resolved_ip = socket.gethostbyname(db_host)
+                logger.info(f"✓ Resolved {db_host} to IPv4 via gethostbyname: {resolved_ip}")
+            except Exception as e:
+                logger.warning(f"⚠ gethostbyname resolution failed: {e}")
+
+        # Update connection host if resolved
+        if resolved_ip:
+            connection_host = resolved_ip
+            logger.info(f"Using resolved IPv4 address: {resolved_ip}")
+        else:
+            logger.warning(f"⚠ Could not resolve {db_host} to IPv4, will try direct connection")
+            logger.warning(f"⚠ If connection fails, check your DB_HOST setting")
+            # Don't raise exception here - let psycopg try to connect
+
+    # Build connection string with SSL for Supabase
+    # CRITICAL: Force IPv4 by adding target_session_attrs and options
+    if resolved_ip:
+        # Use hostaddr when we successfully resolved to IPv4
+        conninfo = f"hostaddr={connection_host} port={db_port} user={db_user} password={db_password} dbname={db_name} connect_timeout=30 sslmode=require options='-c client_encoding=UTF8'"
+        logger.info(f"Connecting to PostgreSQL at {connection_host}:{db_port} (resolved from {db_host})")
+    else:
+        # Force IPv4 by using host with specific connection options
+        # This prevents psycopg from resolving to IPv6
+        conninfo = f"host={connection_host} port={db_port} user={db_user} password={db_password} dbname={db_name} connect_timeout=30 sslmode=require"
+        logger.warning(f"⚠ Connecting to PostgreSQL at {connection_host}:{db_port} without pre-resolved IPv4 - this may fail on Render!")
+        logger.error(f"❌ DB_HOST appears to be incorrect or unresolvable: {db_host}")
+        logger.error(f"❌ Expected: 'aws-1-ap-south-1.pooler.supabase.com' but got: {db_host}")
+        logger.error(f"❌ Please update DB_HOST in your Render environment variables!")
+    return conninfo, connection_host, db_port, db_name
+
+
+class BatchResult:
+    """Result slot of one batched statement; .value is filled when the batch block exits."""
+    __slots__ = ('sql', 'params', 'fetch', 'value')
+
+    def __init__(self, sql, params, fetch):
+        self.sql = sql
+        self.params = params
+        self.fetch = fetch
+        self.value = None
+
+
+class QueryBatch:
+    """
+    Statements collected by db_manager.batch() and sent together when the
+    with-block exits. query()/update()/named() return a BatchResult whose
+    .value is what execute_query/execute_update would have returned (rows,
+    {"last_id", "affected"}, or None/False on failure).
+    """
+
+    def __init__(self, transaction):
+        self.transaction = transaction
+        self.items = []
+        self.ok = None
+
+    def query(self, sql, params=None):
+        return self._add(sql, params, True)
+
+    def update(self, sql, params=None):
+        return self._add(sql, params, False)
+
+    def named(self, name, params=None):
+        sql = HOT_QUERIES[name]
+        return self._add(sql, params, is_select(sql))
+
+    def _add(self, sql, params, fetch):
+        item = BatchResult(sql, params, fetch)
+        self.items.append(item)
+        return item
+
+    @property
+    def results(self):
+        return [item.value for item in self.items]
+
+
+class Transaction:
+    """
+    Cursor-like handle yielded by db_manager.transaction(). Every statement
+    runs on the same pooled connection and they commit or roll back together.
+    Unlike execute_query/execute_update, errors propagate to the caller.
+    """
+
+    def __init__(self, manager, conn, pool_wait=0.0):
+        self._manager = manager
+        self._conn = conn
+        # Time spent waiting for the connection, charged to the first statement
+        self._pool_wait = pool_wait
+
+    def _run(self, sql, params, fetch):
+        started = time.perf_counter()
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute(sql, params or (), prepare=self._manager._prepare_flag(self._conn, sql))
+                result = cursor.fetchall() if fetch else cursor.rowcount
+        except Exception:
+            query_stats.record_error(sql)
+            raise
+        query_stats.record(sql, time.perf_counter() - started, len(result) if fetch else result, self._pool_wait)
+        self._pool_wait = 0.0
+        return result
+
+    def execute(self, sql, params=None):
+        """Runs a statement; returns the affected row count."""
+        return self._run(sql, params, False)
+
+    def execute_many(self, sql, params_seq):
+        """Runs a statement once per params tuple (pipelined); returns the summed affected row count."""
+        params_seq = list(params_seq)
+        if not params_seq:
+            return 0
+        started = time.perf_counter()
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.executemany(sql, params_seq)
+                affected = cursor.rowcount
+        except Exception:
+            query_stats.record_error(sql)
+            raise
+        query_stats.record(sql, time.perf_counter() - started, affected, self._pool_wait)
+        self._pool_wait = 0.0
+        return affected
+
+    def fetch_all(self, sql, params=None, for_update=False):
+        """Rows as dicts. for_update=True locks them until the transaction ends (SELECT ... FOR UPDATE)."""
+        if for_update:
+            sql = f"{sql} FOR UPDATE"
+        return self._run(sql, params, True)
+
+    def fetch_one(self, sql, params=None, for_update=False):
+        rows = self.fetch_all(sql, params, for_update)
+        return rows[0] if rows else None
+
+    def named(self, name, params=None):
+        """Registered hot query: rows for a SELECT, else the affected row count."""
+        sql = HOT_QUERIES[name]
+        if is_select(sql):
+            return self.fetch_all(sql, params)
+        return self.execute(sql, params)
+
+    def insert(self, table, data, on_conflict=None):
+        """INSERT a dict; on_conflict names the unique columns to skip duplicates on (ON CONFLICT DO NOTHING)."""
+        columns = ", ".join(data.keys())
+        placeholders = ", ".join(["%s"] * len(data))
+        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        if on_conflict:
+            sql += f" ON CONFLICT ({', '.join(on_conflict)}) DO NOTHING"
+        return self.execute(sql, tuple(data.values()))
+
+    def update(self, table, data, where):
+        """UPDATE table SET data WHERE every column in the where dict matches."""
+        set_clause = ", ".join(f"{k} = %s" for k in data.keys())
+        where_clause = " AND ".join(f"{k} = %s" for k in where.keys())
+        sql = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
+        return self.execute(sql, tuple(data.values()) + tuple(where.values()))
+
+
+class Replica:
+    """A read replica's pool and its last measured replication lag."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.waits = WaitHistogram()
+        self.lag = None          # seconds; None until measured or after a failure
+        self.checked_at = None
+        self.error = None
+        self.queries = 0
+        self.fallbacks = 0
+
+    def usable(self):
+        if self.lag is None or self.checked_at is None:
+            return False
+        # A monitor that stopped reporting is as bad as lag
+        fresh = time.time() - self.checked_at <= 3 * DB_REPLICA_LAG_CHECK_SEC
+        return fresh and self.lag <= DB_REPLICA_MAX_LAG_SEC
+
+    def mark_failed(self, error):
+        self.lag = None
+        self.error = str(error)
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'usable': self.usable(),
+            'lag_sec': self.lag,
+            'checked_at': self.checked_at,
+            'error': self.error,
+            'queries': self.queries,
+            'fallbacks': self.fallbacks,
+            'size': self.pool.get_stats().get('pool_size', 0),
+            'checkout_wait': self.waits.snapshot()
+        }
+
+
 class PostgreSQLManager:
     """PostgreSQL connection manager for Supabase"""
     _instance = None
@@ -43,103 +360,41 @@ class PostgreSQLManager:
 
     def _initialize_pool(self):
         """Initialize PostgreSQL connection pool with retry logic"""
+        self._hot_sql = {sql: name for name, sql in HOT_QUERIES.items()}
+        self._prepare_lock = threading.Lock()
+        self._prepared_on = weakref.WeakKeyDictionary()  # connection -> hot query names prepared on it
+        self._prepare_counts = {}  # name -> {'executions': n, 'prepares': n}
+        self._pool_waits = WaitHistogram()
+        self._adaptive_lock = threading.Lock()
+        self._warm_until = None
+        self.replicas = []
+        self._replica_rr = itertools.count()
         max_retries = int(os.getenv('DB_MAX_RETRIES', 3))
         retry_delay = 2
         
         for attempt in range(max_retries):
             try:
-                # Get database configuration from environment
-                db_host = os.getenv('DB_HOST')
-                db_port = os.getenv('DB_PORT', '5432')
-                db_user = os.getenv('DB_USER', 'postgres')
-                db_password = os.getenv('DB_PASSWORD')
-                db_name = os.getenv('DB_NAME', 'postgres')
-                
-                # Validate critical environment variables
-                if not db_host:
-                    raise ValueError("DB_HOST environment variable is not set. Please configure it in your deployment environment.")
-                if not db_password:
-                    raise ValueError("DB_PASSWORD environment variable is not set. Please configure it in your deployment environment.")
-                
-                logger.info(f"Attempting to connect to database: {db_host}:{db_port}/{db_name} as user {db_user}")
-                
-                pool_min = 1
+                conninfo, connection_host, db_port, db_name = build_conninfo()
                 pool_max = int(os.getenv('DB_POOL_SIZE', 30))
-                connection_host = db_host
-                resolved_ip = None
-                
-                # Supabase: Try to resolve to IPv4 before connecting (with fallback)
-                if db_host and 'supabase.com' in db_host:
-                    # Method 1: Try dnspython with multiple DNS servers
-                    if HAS_DNSPYTHON and not resolved_ip:
-                        try:
-                            resolver = dns.resolver.Resolver()
-                            resolver.nameservers = ['8.8.8.8', '8.8.4.4', '1.1.1.1', '1.0.0.1']
-                            resolver.timeout = 5
-                            resolver.lifetime = 5
-                            answers = resolver.resolve(db_host, 'A')
-                            ipv4_list = [str(rdata) for rdata in answers if hasattr(rdata, 'address') and ':' not in str(rdata)]
-                            if ipv4_list:
-                                resolved_ip = ipv4_list[0]
-                                logger.info(f"✓ Resolved {db_host} to IPv4 via DNS: {resolved_ip}")
-                        except Exception as e:
-                            logger.warning(f"⚠ DNS resolution via dnspython failed: {e}")
-                    
-                    # Method 2: Try socket.getaddrinfo with IPv4 only
-                    if not resolved_ip:
-                        try:
-                            addr_info = socket.getaddrinfo(db_host, int(db_port), socket.AF_INET, socket.SOCK_STREAM)
-                            ipv4_addrs = [info[4][0] for info in addr_info if info[0] == socket.AF_INET]
-                            if ipv4_addrs:
-                                resolved_ip = ipv4_addrs[0]
-                                logger.info(f"✓ Resolved {db_host} to IPv4 via socket: {resolved_ip}")
-                        except Exception as e:
-                            logger.warning(f"⚠ Socket resolution failed: {e}")
-                    
-                    # Method 3: Try standard socket gethostbyname (IPv4 only)
-                    if not resolved_ip:
-                        try:
-                            resolved_ip = socket.gethostbyname(db_host)
-                            logger.info(f"✓ Resolved {db_host} to IPv4 via gethostbyname: {resolved_ip}")
-                        except Exception as e:
-                            logger.warning(f"⚠ gethostbyname resolution failed: {e}")
-                    
-                    # Update connection host if resolved
-                    if resolved_ip:
-                        connection_host = resolved_ip
-                        logger.info(f"Using resolved IPv4 address: {resolved_ip}")
-                    else:
-                        logger.warning(f"⚠ Could not resolve {db_host} to IPv4, will try direct connection")
-                        logger.warning(f"⚠ If connection fails, check your DB_HOST setting")
-                        # Don't raise exception here - let psycopg try to connect
-                
-                # Build connection string with SSL for Supabase
-                # CRITICAL: Force IPv4 by adding target_session_attrs and options
-                if resolved_ip:
-                    # Use hostaddr when we successfully resolved to IPv4
-                    conninfo = f"hostaddr={connection_host} port={db_port} user={db_user} password={db_password} dbname={db_name} connect_timeout=30 sslmode=require options='-c client_encoding=UTF8'"
-                    logger.info(f"Connecting to PostgreSQL at {connection_host}:{db_port} (resolved from {db_host})")
-                else:
-                    # Force IPv4 by using host with specific connection options
-                    # This prevents psycopg from resolving to IPv6
-                    conninfo = f"host={connection_host} port={db_port} user={db_user} password={db_password} dbname={db_name} connect_timeout=30 sslmode=require"
-                    logger.warning(f"⚠ Connecting to PostgreSQL at {connection_host}:{db_port} without pre-resolved IPv4 - this may fail on Render!")
-                    logger.error(f"❌ DB_HOST appears to be incorrect or unresolvable: {db_host}")
-                    logger.error(f"❌ Expected: 'aws-1-ap-south-1.pooler.supabase.com' but got: {db_host}")
-                    logger.error(f"❌ Please update DB_HOST in your Render environment variables!")
+                pool_min = min(DB_POOL_MIN_SIZE, pool_max)
                 # Create connection pool (psycopg3 style)
                 self.pool = ConnectionPool(
                     conninfo=conninfo,
                     min_size=pool_min,
                     max_size=pool_max,
-                    timeout=30,
-                    kwargs={"row_factory": dict_row}
+                    timeout=DB_POOL_TIMEOUT,
+                    max_idle=DB_POOL_MAX_IDLE_SEC,
+                    kwargs={"row_factory": dict_row},
+                    configure=self._configure_connection
                 )
                 # Test connection
                 with self.pool.connection() as conn:
                     with conn.cursor() as cur:
                         cur.execute("SELECT 1")
                 logger.info(f"✓ PostgreSQL pool initialized successfully with database '{db_name}' on {connection_host}:{db_port} (attempt {attempt + 1}/{max_retries})")
+                if DB_POOL_ADAPTIVE:
+                    threading.Thread(target=self._adaptive_loop, name="db-pool-adaptive", daemon=True).start()
+                self._initialize_replicas()
                 return  # Success
                 
             except Exception as e:
@@ -151,30 +406,390 @@ class PostgreSQLManager:
                     logger.error(f"Failed to initialize connection pool after {max_retries} attempts: {e}")
                     raise
 
-    def execute_query(self, query, params=None):
-        """Execute a SELECT query and return results as list of dicts"""
+    def _initialize_replicas(self):
+        """Opens a pool per DB_REPLICA_URLS entry; a replica that cannot be reached is skipped."""
+        for url in DB_REPLICA_URLS:
+            params = conninfo_to_dict(url)
+            name = f"{params.get('host') or params.get('hostaddr') or 'localhost'}:{params.get('port') or 5432}"
+            try:
+                pool = ConnectionPool(
+                    conninfo=url,
+                    min_size=1,
+                    max_size=DB_REPLICA_POOL_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_idle=DB_POOL_MAX_IDLE_SEC,
+                    kwargs={"row_factory": dict_row},
+                    configure=self._configure_connection
+                )
+                self.replicas.append(Replica(name, pool))
+                logger.info(f"✓ Read replica pool initialized on {name}")
+            except Exception as e:
+                logger.error(f"❌ Read replica {name} unavailable, reads stay on the primary: {e}")
+        if self.replicas:
+            self._check_replicas()
+            threading.Thread(target=self._replica_monitor, name="db-replica-lag", daemon=True).start()
+
+    def _replica_monitor(self):
+        while True:
+            time.sleep(DB_REPLICA_LAG_CHECK_SEC)
+            try:
+                self._check_replicas()
+            except Exception as e:
+                logger.warning(f"Replica lag check failed: {e}")
+
+    def _check_replicas(self):
+        """Measures each replica's lag against the primary's current WAL position."""
+        res = self.execute_query("SELECT pg_current_wal_lsn()::text AS lsn")
+        lsn = res[0]['lsn'] if res else None
+        for replica in self.replicas:
+            try:
+                with self._connection(replica) as (conn, _):
+                    with conn.cursor() as cursor:
+                        cursor.execute(REPLICA_LAG_SQL, (lsn, lsn))
+                        row = cursor.fetchone()
+                lag = row['lag'] if row else None
+                replica.lag = None if lag is None else float(lag)
+                replica.checked_at = time.time()
+                replica.error = None if lag is not None else 'no WAL replayed yet'
+            except Exception as e:
+                replica.mark_failed(e)
+                logger.warning(f"Read replica {replica.name} lag check failed: {e}")
+
+    def _pick_replica(self):
+        usable = [r for r in self.replicas if r.usable()]
+        if not usable:
+            return None
+        return usable[next(self._replica_rr) % len(usable)]
+
+    def replica_stats(self):
+        return {
+            'max_lag_sec': DB_REPLICA_MAX_LAG_SEC,
+            'replicas': [r.stats() for r in self.replicas]
+        }
+
+    @staticmethod
+    def _configure_connection(conn):
+        """Per-connection prepared statement settings (called by the pool for new connections)."""
+        conn.prepare_threshold = DB_PREPARE_THRESHOLD if DB_PREPARED_STATEMENTS else None
+        conn.prepared_max = DB_PREPARED_MAX
+
+    def _prepare_flag(self, conn, query):
+        """True for registered hot queries (counted for prepare_stats), None to let psycopg decide."""
+        name = self._hot_sql.get(query)
+        if name is None or not DB_PREPARED_STATEMENTS:
+            return None
+        with self._prepare_lock:
+            prepared = self._prepared_on.setdefault(conn, set())
+            counts = self._prepare_counts.setdefault(name, {'executions': 0, 'prepares': 0})
+            counts['executions'] += 1
+            if name not in prepared:
+                prepared.add(name)
+                counts['prepares'] += 1
+        return True
+
+    def execute_named(self, name, params=None, read_only=False):
+        """Execute a registered hot query (hot_queries.py) as a prepared statement."""
+        sql = HOT_QUERIES[name]
+        if is_select(sql):
+            return self.execute_query(sql, params, read_only)
+        return self.execute_update(sql, params)
+
+    def prepare_stats(self):
+        """Prepared statement reuse for the hot queries since startup, as seen by this process."""
+        with self._prepare_lock:
+            queries = {name: dict(c) for name, c in self._prepare_counts.items()}
+        for c in queries.values():
+            c['hit_rate'] = round(1 - c['prepares'] / c['executions'], 4) if c['executions'] else 0.0
+        executions = sum(c['executions'] for c in queries.values())
+        prepares = sum(c['prepares'] for c in queries.values())
+        return {
+            'enabled': DB_PREPARED_STATEMENTS,
+            'prepare_threshold': DB_PREPARE_THRESHOLD,
+            'hot_queries': len(HOT_QUERIES),
+            'executions': executions,
+            'prepares': prepares,
+            'hit_rate': round(1 - prepares / executions, 4) if executions else 0.0,
+            'queries': queries
+        }
+
+    @contextmanager
+    def _connection(self, replica=None):
+        """Pooled connection (primary, or the given Replica) as (conn, seconds waited); feeds the checkout wait histogram."""
+        pool = replica.pool if replica else self.pool
+        waits = replica.waits if replica else self._pool_waits
+        started = time.perf_counter()
+        acquired = False
         try:
-            with self.pool.connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(query, params or ())
-                    result = cursor.fetchall()
-                    return result if result else []
+            with pool.connection() as conn:
+                acquired = True
+                wait = time.perf_counter() - started
+                waits.record(wait)
+                yield conn, wait
+        except PoolTimeout:
+            if not acquired:
+                waits.timeout()
+            raise
+
+    def pool_stats(self):
+        """Pool size/usage now plus checkout waits and timeouts since startup."""
+        raw = self.pool.get_stats()
+        size = raw.get('pool_size', 0)
+        idle = raw.get('pool_available', 0)
+        return {
+            'min_size': self.pool.min_size,
+            'max_size': self.pool.max_size,
+            'size': size,
+            'in_use': size - idle,
+            'idle': idle,
+            'waiting': raw.get('requests_waiting', 0),
+            'timeout_sec': DB_POOL_TIMEOUT,
+            'checkout_wait': self._pool_waits.snapshot(),
+            'adaptive': {
+                'enabled': DB_POOL_ADAPTIVE,
+                'warm_size': self._warm_size(),
+                'warm_until': self._warm_until
+            },
+            'pool': raw
+        }
+
+    def _warm_size(self):
+        return min(DB_POOL_WARM_SIZE or max(self.pool.max_size // 2, 1), self.pool.max_size)
+
+    def prewarm(self, reason=''):
+        """
+        Adaptive mode: grow the pool's min_size to the warm size ahead of a
+        burst (contest start, level activation) in every worker, for
+        DB_POOL_WARM_HOLD_SEC. No-op unless DB_POOL_ADAPTIVE is set.
+        """
+        if not DB_POOL_ADAPTIVE:
+            return False
+        until = time.time() + DB_POOL_WARM_HOLD_SEC
+        self.execute_update(
+            "INSERT INTO admin_state (key_name, value) VALUES (%s, %s) ON CONFLICT (key_name) DO UPDATE SET value = EXCLUDED.value",
+            (POOL_WARM_KEY, str(until))
+        )
+        self._apply_warm(until, reason)
+        return True
+
+    def release_warm(self, reason=''):
+        """Adaptive mode: shrink back to DB_POOL_MIN_SIZE now (contest ended)."""
+        if not DB_POOL_ADAPTIVE:
+            return False
+        self.execute_update(
+            "INSERT INTO admin_state (key_name, value) VALUES (%s, %s) ON CONFLICT (key_name) DO UPDATE SET value = EXCLUDED.value",
+            (POOL_WARM_KEY, '0')
+        )
+        self._apply_warm(0, reason)
+        return True
+
+    def _apply_warm(self, until, reason):
+        warm = time.time() < until
+        target = self._warm_size() if warm else min(DB_POOL_MIN_SIZE, self.pool.max_size)
+        with self._adaptive_lock:
+            self._warm_until = until if warm else None
+            if self.pool.min_size != target:
+                # Growing opens the extra connections in the background; after
+                # shrinking, idle ones are closed after DB_POOL_MAX_IDLE_SEC
+                self.pool.resize(min_size=target)
+                logger.info(f"Connection pool min_size -> {target} ({reason or 'warm window over'})")
+
+    def _adaptive_loop(self):
+        """Follows the warm window stored in admin_state (set by whichever worker served the admin request)."""
+        while True:
+            time.sleep(DB_POOL_ADAPTIVE_POLL_SEC)
+            try:
+                res = self.execute_named('admin_state_value', (POOL_WARM_KEY,))
+                if res is None:
+                    continue  # Query failed: keep the current size
+                until = float(res[0]['value']) if res else 0.0
+                self._apply_warm(until, 'admin_state')
+            except Exception as e:
+                logger.warning(f"Adaptive pool sizing check failed: {e}")
+
+    def execute_query(self, query, params=None, read_only=False):
+        """
+        Execute a SELECT query and return results as list of dicts.
+        read_only=True (or a @replica_reads route) lets a read replica serve it;
+        the primary is used when no replica is within the lag limit or it fails.
+        """
+        if self.replicas and (read_only or getattr(_routing, 'read_only', False)):
+            replica = self._pick_replica()
+            if replica is not None:
+                try:
+                    result = self._fetch(query, params, replica)
+                    replica.queries += 1
+                    return result
+                except Exception as e:
+                    replica.fallbacks += 1
+                    replica.mark_failed(e)
+                    logger.warning(f"Read replica {replica.name} failed, using the primary: {e}")
+        try:
+            return self._fetch(query, params)
         except Exception as e:
+            query_stats.record_error(query)
             logger.error(f"SELECT Query failed: {e}\nQuery: {query}")
             return None
 
+    def _fetch(self, query, params, replica=None):
+        with self._connection(replica) as (conn, wait):
+            started = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute(query, params or (), prepare=self._prepare_flag(conn, query))
+                result = cursor.fetchall()
+                query_stats.record(query, time.perf_counter() - started, len(result), wait)
+                return result if result else []
+
     def execute_update(self, query, params=None):
         """Execute an INSERT/UPDATE/DELETE query"""
         try:
-            with self.pool.connection() as conn:
+            with self._connection() as (conn, wait):
+                started = time.perf_counter()
                 with conn.cursor() as cursor:
-                    cursor.execute(query, params or ())
+                    cursor.execute(query, params or (), prepare=self._prepare_flag(conn, query))
                     conn.commit()
+                    query_stats.record(query, time.perf_counter() - started, cursor.rowcount, wait)
                     return {"last_id": None, "affected": cursor.rowcount}
         except Exception as e:
+            query_stats.record_error(query)
             logger.error(f"UPDATE Query failed: {e}\nQuery: {query}")
             return False
 
+    def execute_many(self, query, params_seq):
+        """
+        Run one INSERT/UPDATE/DELETE for every params tuple in params_seq on a
+        single connection with one commit. psycopg3 pipelines executemany, so
+        the whole set costs one network round trip. Returns the summed
+        {"last_id", "affected"} like execute_update, or False (nothing applied).
+        """
+        params_seq = list(params_seq)
+        if not params_seq:
+            return {"last_id": None, "affected": 0}
+        try:
+            with self._connection() as (conn, wait):
+                started = time.perf_counter()
+                with conn.cursor() as cursor:
+                    cursor.executemany(query, params_seq)
+                    conn.commit()
+                    query_stats.record(query, time.perf_counter() - started, cursor.rowcount, wait)
+                    return {"last_id": None, "affected": cursor.rowcount}
+        except Exception as e:
+            query_stats.record_error(query)
+            logger.error(f"Batched UPDATE of {len(params_seq)} rows failed: {e}\nQuery: {query}")
+            return False
+
+    def bulk_insert(self, table, columns, rows, on_conflict=None):
+        """
+        Load rows (tuples in columns order) into table with COPY ... FROM STDIN:
+        one streamed statement instead of an INSERT per row. COPY cannot skip
+        duplicates, so with on_conflict (unique columns, as Transaction.insert)
+        the rows are copied into a temporary table and moved over with
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING. Returns
+        {"last_id", "affected"} (rows actually inserted), or False (nothing applied).
+        """
+        cols = ", ".join(columns)
+        target = f"_bulk_{table}" if on_conflict else table
+        copy_sql = f"COPY {target} ({cols}) FROM STDIN"
+        try:
+            with self._connection() as (conn, wait):
+                started = time.perf_counter()
+                with conn.cursor() as cursor:
+                    if on_conflict:
+                        cursor.execute(f"CREATE TEMP TABLE {target} ON COMMIT DROP AS SELECT {cols} FROM {table} WITH NO DATA")
+                    copied = 0
+                    with cursor.copy(copy_sql) as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                            copied += 1
+                    affected = copied
+                    if on_conflict:
+                        cursor.execute(
+                            f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {target} "
+                            f"ON CONFLICT ({', '.join(on_conflict)}) DO NOTHING"
+                        )
+                        affected = cursor.rowcount
+                    conn.commit()
+                    query_stats.record(copy_sql, time.perf_counter() - started, affected, wait)
+                    return {"last_id": None, "affected": affected}
+        except Exception as e:
+            query_stats.record_error(copy_sql)
+            logger.error(f"Bulk insert into {table} failed: {e}")
+            return False
+
+    @contextmanager
+    def transaction(self):
+        """
+        with db_manager.transaction() as tx: run several statements on one
+        connection (tx.execute/execute_many/fetch_all/fetch_one/named/insert/update);
+        committed when the block exits, rolled back if it raises.
+        """
+        with self._connection() as (conn, wait):
+            try:
+                yield Transaction(self, conn, wait)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def batch(self, transaction=False):
+        """
+        with db_manager.batch() as b: queue statements with b.query/b.update/b.named;
+        on exit they run on one connection in psycopg3 pipeline mode (one
+        network round trip) and commit together.
+
+        If any statement fails: with transaction=True nothing is applied and
+        every result is None/False; otherwise the statements are re-run one by
+        one, each committed on its own, exactly like separate execute_* calls.
+        b.ok tells whether everything succeeded.
+        """
+        batch = QueryBatch(transaction)
+        yield batch
+        self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        if not batch.items:
+            batch.ok = True
+            return
+        try:
+            with self._connection() as (conn, wait):
+                started = time.perf_counter()
+                cursors = []
+                with conn.pipeline():
+                    for item in batch.items:
+                        cursor = conn.cursor()
+                        cursor.execute(item.sql, item.params or (), prepare=self._prepare_flag(conn, item.sql))
+                        cursors.append(cursor)
+                # Leaving the pipeline block synced it: every result is here
+                for item, cursor in zip(batch.items, cursors):
+                    if item.fetch:
+                        item.value = cursor.fetchall() or []
+                    else:
+                        item.value = {"last_id": None, "affected": cursor.rowcount}
+                    cursor.close()
+                conn.commit()
+                # Pipelined statements overlap: each is charged an equal share
+                share = (time.perf_counter() - started) / len(batch.items)
+                wait_share = wait / len(batch.items)
+                for item in batch.items:
+                    rows = len(item.value) if item.fetch else item.value['affected']
+                    query_stats.record(item.sql, share, rows, wait_share)
+            batch.ok = True
+            return
+        except Exception as e:
+            logger.error(f"Batch of {len(batch.items)} statements failed: {e}")
+
+        if batch.transaction:
+            for item in batch.items:
+                item.value = None if item.fetch else False
+            batch.ok = False
+            return
+        for item in batch.items:
+            if item.fetch:
+                item.value = self.execute_query(item.sql, item.params)
+            else:
+                item.value = self.execute_update(item.sql, item.params)
+        batch.ok = all(item.value is not None and item.value is not False for item in batch.items)
+
     def init_database(self, schema_file):
         """Initialize database from SQL file"""
         if not os.path.exists(schema_file):
@@ -199,6 +814,8 @@ class PostgreSQLManager:
     def close_all(self):
         """Close all connections in the pool"""
         try:
+            for replica in getattr(self, 'replicas', []):
+                replica.pool.close()
             if hasattr(self, 'pool') and self.pool:
                 self.pool.close()
                 logger.info("All database connections closed")
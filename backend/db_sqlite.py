@@ -4,6 +4,8 @@ import logging
 import os
 import re
 
+from hot_queries import HOT_QUERIES, is_select
+
 # Configure Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,7 +48,8 @@ class SQLiteManager:
         # Replace %s with ?
         return query.replace('%s', '?')
 
-    def execute_query(self, query, params=None):
+    def execute_query(self, query, params=None, read_only=False):
+        # read_only is accepted for API parity with PostgreSQLManager (no replicas here)
         conn = self.get_connection()
         if not conn: return None
         
@@ -95,6 +98,33 @@ class SQLiteManager:
         finally:
             if conn: conn.close()
 
+    def execute_many(self, query, params_seq):
+        """execute_update() for every params tuple, on one connection with one commit."""
+        conn = self.get_connection()
+        if not conn: return False
+
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(self._adapt_query(query), list(params_seq))
+            conn.commit()
+            return {"last_id": cursor.lastrowid, "affected": cursor.rowcount}
+        finally:
+            if conn: conn.close()
+
+    def bulk_insert(self, table, columns, rows, on_conflict=None):
+        """No COPY in SQLite: one executemany INSERT (OR IGNORE when on_conflict is given)."""
+        verb = "INSERT OR IGNORE" if on_conflict else "INSERT"
+        placeholders = ", ".join(["?"] * len(columns))
+        query = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        return self.execute_many(query, rows)
+
+    def execute_named(self, name, params=None, read_only=False):
+        """Registered hot query (hot_queries.py); sqlite3 caches the compiled statement itself."""
+        sql = HOT_QUERIES[name]
+        if is_select(sql):
+            return self.execute_query(sql, params)
+        return self.execute_update(sql, params)
+
     def execute_transaction(self, queries_list):
         conn = self.get_connection()
         if not conn: return False
@@ -1,5 +1,7 @@
+import os
 from flask_socketio import SocketIO
 from flask_cors import CORS
 
-socketio = SocketIO(cors_allowed_origins="*")
+# Auto-detected (eventlet under the Procfile); asgi.py forces 'threading'
+socketio = SocketIO(cors_allowed_origins="*", async_mode=os.getenv('SOCKETIO_ASYNC_MODE') or None)
 cors = CORS()
@@ -0,0 +1,60 @@
+# hot_queries.py - Named registry of the statements executed on every request
+#
+# db_manager.execute_named(name, params) runs these as server-side prepared
+# statements (psycopg3 prepare=True): they are parsed and planned once per
+# pooled connection instead of on every call. execute_query/execute_update
+# also prepare any inline SQL whose text matches an entry exactly.
+#
+# Keep this list to genuinely hot statements: each one holds a prepared
+# statement on every pooled connection (see DB_PREPARED_MAX).
+
+HOT_QUERIES = {
+    # --- Users ---
+    'user_id_by_username': "SELECT user_id FROM users WHERE username=%s",
+    'user_id_by_username_or_id': "SELECT user_id FROM users WHERE username=%s OR user_id=%s",
+    'user_by_username_or_id': "SELECT user_id, username FROM users WHERE username=%s OR user_id=%s",
+
+    # --- Contest / rounds ---
+    'live_contest_id': "SELECT contest_id FROM contests WHERE status='live' LIMIT 1",
+    'admin_state_value': "SELECT value FROM admin_state WHERE key_name=%s",
+    'round_id_by_number': "SELECT round_id FROM rounds WHERE contest_id=%s AND round_number=%s",
+    'round_time_limit': "SELECT time_limit_minutes FROM rounds WHERE contest_id=%s AND round_number=%s",
+    'round_statuses': "SELECT round_number, status, time_limit_minutes FROM rounds WHERE contest_id=%s ORDER BY round_number ASC",
+    'active_round': "SELECT round_number, status FROM rounds WHERE contest_id=%s AND status='active' ORDER BY round_number ASC LIMIT 1",
+    'is_shortlisted': "SELECT is_allowed FROM shortlisted_participants WHERE contest_id=%s AND level=%s AND user_id=%s AND is_allowed=1",
+
+    # --- Participant progress ---
+    'latest_level_stats': "SELECT level, violation_count, questions_solved, start_time, status FROM participant_level_stats WHERE user_id=%s AND contest_id=%s ORDER BY level DESC LIMIT 1",
+    'level_start_time': "SELECT start_time FROM participant_level_stats WHERE user_id=%s AND contest_id=%s AND level=%s",
+    'level_summary': "SELECT level_score, violation_count, completed_at, start_time FROM participant_level_stats WHERE user_id=%s AND contest_id=%s AND level=%s",
+    'ensure_level_stats': "INSERT INTO participant_level_stats (user_id, contest_id, level, status, start_time) VALUES (%s, %s, %s, 'NOT_STARTED', %s) ON CONFLICT (user_id, contest_id, level) DO NOTHING",
+    'unlock_level_stats': "INSERT INTO participant_level_stats (user_id, contest_id, level, status) VALUES (%s, %s, %s, 'NOT_STARTED') ON CONFLICT (user_id, contest_id, level) DO NOTHING",
+    'start_level_stats': "UPDATE participant_level_stats SET start_time = %s, status = 'IN_PROGRESS' WHERE user_id=%s AND contest_id=%s AND level=%s AND (status='NOT_STARTED' OR status IS NULL OR status='PAUSED')",
+    'complete_level_stats': "UPDATE participant_level_stats SET status='COMPLETED', completed_at=%s WHERE user_id=%s AND contest_id=%s AND level=%s",
+    'touch_level_stats': "INSERT INTO participant_level_stats (user_id, contest_id, level) VALUES (%s, %s, %s) ON CONFLICT (user_id, contest_id, level) DO NOTHING",
+    'recalc_level_stats': "UPDATE participant_level_stats ps SET questions_solved = (SELECT COUNT(*) FROM submissions s WHERE s.user_id=ps.user_id AND s.is_correct=TRUE), level_score = (SELECT SUM(score_awarded) FROM submissions s WHERE s.user_id=ps.user_id) WHERE ps.user_id=%s AND ps.contest_id=%s AND ps.level=%s",
+    'track_run': "INSERT INTO participant_level_stats (user_id, contest_id, level, run_count) VALUES (%s, %s, %s, 1) ON CONFLICT (user_id, contest_id, level) DO UPDATE SET run_count = participant_level_stats.run_count + 1",
+
+    # --- Submissions / judge ---
+    'solved_question_ids': "SELECT question_id FROM submissions WHERE user_id=%s AND contest_id=%s AND is_correct=TRUE",
+    'correct_submission': "SELECT is_correct FROM submissions WHERE user_id=%s AND question_id=%s AND is_correct=TRUE",
+    # Held until the transaction ends: serializes judging of one participant's question
+    'lock_user_question': "SELECT pg_advisory_xact_lock(%s::int, %s::int)",
+    'insert_submission': "INSERT INTO submissions (user_id, contest_id, round_id, question_id, submitted_code, status, is_correct, test_results, score_awarded, time_taken_seconds) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+    # Finished judge jobs, readable by every backend worker (see routes/contest.py)
+    # Never replaces a stored outcome: the job may finish before its 'queued' row is written
+    'queue_judge_job': "INSERT INTO admin_state (key_name, value) VALUES (%s, %s) ON CONFLICT (key_name) DO NOTHING",
+    'store_judge_job': "INSERT INTO admin_state (key_name, value) VALUES (%s, %s) ON CONFLICT (key_name) DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP",
+    'prune_judge_jobs': "DELETE FROM admin_state WHERE key_name LIKE 'judge_job_%%' AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)",
+    'question_for_judge': "SELECT q.question_id, q.round_id, q.test_input, q.expected_output, q.test_cases, q.comparator, q.points, r.allowed_language FROM questions q LEFT JOIN rounds r ON q.round_id = r.round_id WHERE q.question_id = %s",
+
+    # --- Proctoring ---
+    'proctoring_state_for_update': "SELECT * FROM participant_proctoring WHERE participant_id=%s AND contest_id=%s FOR UPDATE",
+    'proctoring_status': "SELECT total_violations, is_disqualified, disqualification_reason FROM participant_proctoring WHERE participant_id=%s AND contest_id=%s",
+    'level_violation_count': "SELECT COUNT(*) as cnt FROM violations WHERE user_id=%s AND contest_id=%s AND level=%s",
+}
+
+
+def is_select(sql):
+    """True for statements that return rows (run through execute_query)."""
+    return sql.split(None, 1)[0].upper() in ('SELECT', 'WITH')
@@ -0,0 +1,181 @@
+# query_stats.py - Per-statement timing aggregated by query fingerprint
+#
+# db_manager (and the async manager) record every statement here: time spent
+# executing (and fetching), rows returned or affected, and time spent waiting
+# for a pooled connection. Statements are grouped by fingerprint - the SQL
+# with literals and placeholders replaced by '?' and whitespace collapsed - so
+# the same inline query with different parameters is one entry.
+#
+# Statements slower than DB_SLOW_QUERY_MS are also logged. Figures are per
+# backend process since startup (or the last reset); see GET /api/admin/db/stats.
+#
+# WaitHistogram does the same for connection checkouts from the pool.
+
+import functools
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger("QueryStats")
+
+# === CONFIGURATION ===
+DB_QUERY_STATS = os.getenv('DB_QUERY_STATS', 'true').lower() in ('1', 'true', 'yes')
+# Log statements slower than this (0 disables the slow-query log)
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 500))
+# Distinct fingerprints kept; statements beyond that are counted under OTHER_FINGERPRINT
+DB_QUERY_STATS_MAX = int(os.getenv('DB_QUERY_STATS_MAX', 1000))
+
+OTHER_FINGERPRINT = '(other)'
+# Upper bounds (ms) of the pool checkout wait histogram buckets
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """SQL with parameters stripped: literals/placeholders -> ?, IN lists -> (?...), single spaces."""
+    fp = _STRING_RE.sub('?', sql)
+    fp = _PLACEHOLDER_RE.sub('?', fp)
+    fp = _NUMBER_RE.sub('?', fp)
+    fp = _LIST_RE.sub('(?...)', fp)
+    return _SPACE_RE.sub(' ', fp).strip()
+
+
+class QueryStats:
+    """Thread-safe aggregation of statement timings by fingerprint."""
+
+    def __init__(self, enabled=True, slow_ms=500, max_fingerprints=1000):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._since = time.time()
+
+    def _entry(self, sql):
+        fp = fingerprint(sql)
+        entry = self._stats.get(fp)
+        if entry is None:
+            if len(self._stats) >= self.max_fingerprints:
+                fp = OTHER_FINGERPRINT
+                entry = self._stats.get(fp)
+            if entry is None:
+                entry = self._stats[fp] = {
+                    'calls': 0, 'errors': 0, 'rows': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0,
+                    'pool_wait_ms': 0.0, 'max_pool_wait_ms': 0.0, 'slow': 0
+                }
+        return entry
+
+    def record(self, sql, duration, rows=0, pool_wait=0.0):
+        """One executed statement: duration and pool_wait in seconds."""
+        if not self.enabled:
+            return
+        ms = duration * 1000
+        wait_ms = pool_wait * 1000
+        slow = bool(self.slow_ms) and ms >= self.slow_ms
+        with self._lock:
+            entry = self._entry(sql)
+            entry['calls'] += 1
+            entry['rows'] += max(rows or 0, 0)
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+            entry['pool_wait_ms'] += wait_ms
+            entry['max_pool_wait_ms'] = max(entry['max_pool_wait_ms'], wait_ms)
+            if slow:
+                entry['slow'] += 1
+        if slow:
+            logger.warning(f"Slow query ({ms:.1f} ms, {rows} rows, pool wait {wait_ms:.1f} ms): {fingerprint(sql)}")
+
+    def record_error(self, sql):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(sql)['errors'] += 1
+
+    def snapshot(self, top=50, sort='total_ms'):
+        """The top fingerprints by sort key (total_ms, max_ms, calls, avg_ms, rows, pool_wait_ms, errors)."""
+        with self._lock:
+            entries = [{'query': fp, **entry} for fp, entry in self._stats.items()]
+            since = self._since
+        for e in entries:
+            e['avg_ms'] = round(e['total_ms'] / e['calls'], 3) if e['calls'] else 0.0
+            e['avg_pool_wait_ms'] = round(e['pool_wait_ms'] / e['calls'], 3) if e['calls'] else 0.0
+            for key in ('total_ms', 'max_ms', 'pool_wait_ms', 'max_pool_wait_ms'):
+                e[key] = round(e[key], 3)
+        if entries and sort not in entries[0]:
+            sort = 'total_ms'
+        entries.sort(key=lambda e: e[sort], reverse=True)
+        return {
+            'enabled': self.enabled,
+            'slow_query_ms': self.slow_ms,
+            'since': since,
+            'fingerprints': len(entries),
+            'calls': sum(e['calls'] for e in entries),
+            'errors': sum(e['errors'] for e in entries),
+            'total_ms': round(sum(e['total_ms'] for e in entries), 3),
+            'queries': entries[:top]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._since = time.time()
+
+
+class WaitHistogram:
+    """Bucketed pool checkout wait times plus checkout timeouts."""
+
+    def __init__(self, buckets_ms=POOL_WAIT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            for i, bound in enumerate(self.buckets_ms):
+                if ms <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._checkouts += 1
+            self._total_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            checkouts, timeouts, total_ms, max_ms = self._checkouts, self._timeouts, self._total_ms, self._max_ms
+        buckets = {f"<={bound}ms": n for bound, n in zip(self.buckets_ms, counts)}
+        buckets[f">{self.buckets_ms[-1]}ms"] = counts[-1]
+        return {
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'avg_ms': round(total_ms / checkouts, 3) if checkouts else 0.0,
+            'max_ms': round(max_ms, 3),
+            'buckets': buckets
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets_ms) + 1)
+            self._checkouts = 0
+            self._timeouts = 0
+            self._total_ms = 0.0
+            self._max_ms = 0.0
+
+
+query_stats = QueryStats(DB_QUERY_STATS, DB_SLOW_QUERY_MS, DB_QUERY_STATS_MAX)
@@ -1,9 +1,14 @@
 from flask import Blueprint, jsonify, request
 from db_connection import db_manager
+from query_stats import query_stats
 import uuid
 from auth_middleware import admin_required
 from werkzeug.security import generate_password_hash
-from utils.contest_service import create_question_logic
+from utils.contest_service import create_question_logic, create_questions_bulk_logic
+from utils.question_cache import invalidate_question
+from utils.testcase_store import put as store_test_case, TestCaseStoreError
+from utils.judge_queue import judge_queue
+from utils.core_scheduler import core_scheduler
 
 bp = Blueprint('admin', __name__)
 
@@ -26,6 +31,34 @@ def get_stats():
         "questions_solved": solved_count
     })
 
+@bp.route('/judge/stats', methods=['GET'])
+@admin_required
+def judge_stats():
+    """Judge queue depth/wait times and core usage of this backend worker."""
+    return jsonify({'queue': judge_queue.stats(), 'cores': core_scheduler.stats()})
+
+@bp.route('/db/stats', methods=['GET'])
+@admin_required
+def db_stats():
+    """Database client statistics of this backend worker."""
+    if db_manager is None:
+        return jsonify({'error': 'Database not connected'}), 503
+    top = request.args.get('top', 50, type=int)
+    sort = request.args.get('sort', 'total_ms')
+    return jsonify({
+        'pool': db_manager.pool_stats(),
+        'replicas': db_manager.replica_stats(),
+        'prepared_statements': db_manager.prepare_stats(),
+        'queries': query_stats.snapshot(top, sort)
+    })
+
+@bp.route('/db/stats', methods=['DELETE'])
+@admin_required
+def reset_db_stats():
+    """Starts a fresh query statistics window."""
+    query_stats.reset()
+    return jsonify({'success': True})
+
 # === Participant Management ===
 
 @bp.route('/participants', methods=['GET'])
@@ -102,7 +135,7 @@ def create_participant():
     
     try:
         # Check duplication
-        chk = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (username,))
+        chk = db_manager.execute_named('user_id_by_username', (username,))
         if chk:
             if manual_mode:
                 return jsonify({'error': 'System generated duplicate ID. Please try again.'}), 409
@@ -148,6 +181,7 @@ def get_questions():
                 'difficulty': q.get('difficulty_level'),
                 'expected_output': q.get('expected_output'),
                 'test_cases': q.get('test_cases'),
+                'comparator': q.get('comparator') or 'whitespace',
                 'round_number': q.get('round_id'), # Simplified
                 'round_id': q.get('round_id')
             })
@@ -182,20 +216,17 @@ def create_questions_bulk():
     data = request.get_json()
     questions = data.get('questions', [])
     
-    count = 0
-    errors = []
+    items = []
     for q in questions:
         diff_str = q.get('difficulty', 'Level 1')
         round_num = 1
         if diff_str.startswith('Level '):
             try: round_num = int(diff_str.split(' ')[1])
             except: pass
-        
-        try:
-            create_question_logic(1, round_num, q)
-            count += 1
-        except Exception as e:
-            errors.append(f"Title {q.get('title')}: {str(e)}")
+        items.append((round_num, q))
+    
+    # Validated per question, inserted in one batched statement (row by row if it fails)
+    count, errors = create_questions_bulk_logic(1, items)
         
     return jsonify({'success': True, 'count': count, 'errors': errors})
 
@@ -203,8 +234,25 @@ def create_questions_bulk():
 @admin_required
 def delete_question(qid):
     db_manager.execute_update("DELETE FROM questions WHERE question_id=%s", (qid,))
+    invalidate_question(qid)
     return jsonify({'success': True})
 
+@bp.route('/testcases', methods=['POST'])
+@admin_required
+def upload_test_case():
+    """
+    Stores a large test input/output file and returns its ref. Reference it
+    from a question's test_cases as "input_ref" / "expected_ref".
+    Accepts a multipart "file" field or the raw request body.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    try:
+        ref, size = store_test_case(stream)
+    except TestCaseStoreError as e:
+        return jsonify({'error': str(e)}), 413
+    return jsonify({'success': True, 'ref': ref, 'size': size}), 201
+
 
 # === Leader Management ===
 
@@ -258,7 +306,7 @@ def create_leader():
     
     try:
         # Check exist
-        chk = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (username,))
+        chk = db_manager.execute_named('user_id_by_username', (username,))
         if chk:
              return jsonify({'error': 'User ID already exists'}), 400
 
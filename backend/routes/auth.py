@@ -268,7 +268,7 @@ def register_admin():
         return jsonify({'error': 'Password must be at least 8 characters long'}), 400
         
     # Check if exists
-    chk = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (username,))
+    chk = db_manager.execute_named('user_id_by_username', (username,))
     if chk:
         return jsonify({'error': 'Username already exists'}), 400
     
@@ -315,7 +315,7 @@ def approve_admin():
     token_data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
     approver_username = token_data['sub']
     
-    u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (approver_username,))
+    u_res = db_manager.execute_named('user_id_by_username', (approver_username,))
     approver_id = u_res[0]['user_id'] if u_res else None
     
     query = "UPDATE users SET admin_status=%s, approved_by=%s, approval_at=NOW() WHERE user_id=%s"
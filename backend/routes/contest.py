@@ -1,12 +1,18 @@
 from flask import Blueprint, jsonify, request
 import uuid
+import functools
 import datetime
 import time
 import json
 import traceback
 from db_connection import db_manager
 from auth_middleware import admin_required
-from utils.logic import execute_code_internal
+from utils.logic import execute_batch
+from utils.judge_queue import judge_queue, JudgeQueueFull, JUDGE_RESULT_TTL
+from utils.question_cache import get_question, invalidate_all as invalidate_question_cache
+from utils import hot_reads
+from extensions import socketio
+from flask_socketio import join_room, emit
 from utils.contest_service import activate_level_logic, complete_level_logic, advance_level_logic
 
 bp = Blueprint('contest', __name__)
@@ -116,6 +122,8 @@ def manage_countdown(contest_id):
                 (key_name, val, val)
             )
             socketio.emit('contest:countdown', {'contest_id': contest_id, 'active': True, 'end_time': end_time.isoformat(), 'duration': duration, 'target_level': target_level})
+            # Participants arrive when the countdown ends: have connections ready
+            db_manager.prewarm(f"contest {contest_id} countdown")
             
         elif action == 'stop':
             val = json.dumps({'active': False})
@@ -128,7 +136,7 @@ def manage_countdown(contest_id):
         return jsonify({'success': True})
     else:
         key_name = f"contest_{contest_id}_countdown"
-        res = db_manager.execute_query("SELECT value FROM admin_state WHERE key_name=%s", (key_name,))
+        res = db_manager.execute_named('admin_state_value', (key_name,))
         if res:
              try:
                  return jsonify(json.loads(res[0]['value']))
@@ -143,6 +151,7 @@ def start_contest(contest_id):
     # Set status to live and update start time
     query = "UPDATE contests SET status='live', start_datetime=NOW() WHERE contest_id=%s"
     db_manager.execute_update(query, (contest_id,))
+    db_manager.prewarm(f"contest {contest_id} started")
     
     from extensions import socketio
     socketio.emit('contest:started', {
@@ -168,6 +177,7 @@ def pause_contest(contest_id):
 def end_contest(contest_id):
     query = "UPDATE contests SET status='ended', end_datetime=NOW() WHERE contest_id=%s"
     db_manager.execute_update(query, (contest_id,))
+    db_manager.release_warm(f"contest {contest_id} ended")
     from extensions import socketio
     socketio.emit('contest:ended', {'contest_id': contest_id})
     socketio.emit('contest:stats_update', {'contest_id': contest_id})
@@ -194,6 +204,7 @@ def activate_level_admin(contest_id, level_number):
         else:
             # Set target to active
             db_manager.execute_update("UPDATE rounds SET status='active' WHERE contest_id=%s AND round_number=%s", (contest_id, level_number))
+        db_manager.prewarm(f"contest {contest_id} level {level_number} activated")
         
         from extensions import socketio
         socketio.emit('level:activated', {'contest_id': contest_id, 'level': level_number})
@@ -244,6 +255,8 @@ def update_round(contest_id, round_number):
             "UPDATE rounds SET allowed_language=%s WHERE contest_id=%s AND round_number=%s",
             (allowed_language, contest_id, round_number)
         )
+        # Cached questions carry their round's allowed_language
+        invalidate_question_cache()
     
     # Handle Question Reordering
     # Expects: questions_order = [{'id': 123, 'number': 1}, ...]
@@ -258,7 +271,6 @@ def update_round(contest_id, round_number):
     return jsonify({'success': True})
 
 
-from utils.logic import execute_code_internal
 from utils.contest_service import create_question_logic
 
 # ... (Imports)
@@ -285,60 +297,20 @@ def get_questions():
     level = request.args.get('level', 1)
 
     # Robustness: If contest_id is missing, find the LIVE one
-    if not contest_id or contest_id == 'null' or contest_id == 'undefined':
-        l_res = db_manager.execute_query("SELECT contest_id FROM contests WHERE status='live' LIMIT 1")
+    if hot_reads.needs_live_contest(contest_id):
+        l_res = db_manager.execute_named('live_contest_id')
         if l_res:
             contest_id = l_res[0]['contest_id']
         else:
             # Fallback to id=1
             contest_id = 1
 
-    # 1. Fetch Round Config strictly first (for Language)
-    round_query = "SELECT allowed_language, time_limit_minutes FROM rounds WHERE contest_id=%s AND round_number=%s"
-    r_res = db_manager.execute_query(round_query, (contest_id, level))
-    
-    allowed_lang = 'python' # Global Default
-    if r_res and r_res[0].get('allowed_language'):
-        allowed_lang = r_res[0]['allowed_language']
+    # Round config (for Language) and the questions in one round trip
+    with db_manager.batch() as b:
+        round_q = b.query(hot_reads.QUESTIONS_ROUND_QUERY, (contest_id, level))
+        questions_q = b.query(hot_reads.QUESTIONS_QUERY, (contest_id, level))
 
-    # 2. Fetch Questions
-    query = """
-        SELECT q.*, r.round_number
-        FROM questions q
-        JOIN rounds r ON q.round_id = r.round_id
-        WHERE r.contest_id = %s AND r.round_number = %s
-        ORDER BY q.question_number ASC
-    """
-    
-    res = db_manager.execute_query(query, (contest_id, level))
-    
-    questions = []
-    
-    for q in res:
-        # Construct useful object for frontend
-        tcs = []
-        try:
-            if q['test_cases']: tcs = json.loads(q['test_cases'])
-        except: pass
-        
-        # Ensure only buggy_code is sent, NO expected code or hidden details
-        questions.append({
-            'id': q['question_id'],
-            'round_number': q['round_number'],
-            'number': q['question_number'],
-            'title': q['question_title'],
-            'description': q.get('question_description', ''), 
-            'expected_output': q.get('expected_output'),
-            'buggy_code': q['buggy_code'], # Send directly 
-            'boilerplate': {allowed_lang: q['buggy_code']}, # Use correct lang key
-            'test_cases': tcs, 
-            'difficulty': q['difficulty_level'],
-            # If question has specific override (unlikely in current schema but possible), use it? 
-            # No, strictly follow Round language.
-            'allowed_language': allowed_lang
-        })
-        
-    return jsonify({'questions': questions, 'allowed_language': allowed_lang})
+    return jsonify(hot_reads.build_questions(round_q.value, questions_q.value))
 
 @bp.route('/run', methods=['POST'])
 def run_code():
@@ -356,32 +328,11 @@ def run_code():
 
     print(f"RUN CODE: Fetching Question ID: {question_id} (Type: {type(question_id)})")
 
-    # 1. Fetch Question & Config
-    # Join with rounds to get allowed_language STRICTLY
-    query = """
-        SELECT q.test_input, q.expected_output, q.test_cases, r.allowed_language
-        FROM questions q
-        LEFT JOIN rounds r ON q.round_id = r.round_id
-        WHERE q.question_id = %s
-    """
-    
-    # Attempt 1: As provided
-    q_res = db_manager.execute_query(query, (question_id,))
-    
-    # Attempt 2: If not found, try type juggle (Int <-> String)
-    if not q_res:
-        try:
-            if str(question_id).isdigit():
-                q_res = db_manager.execute_query(query, (int(question_id),))
-            else:
-                q_res = db_manager.execute_query(query, (str(question_id),))
-        except: pass
-        
-    if not q_res:
+    # 1. Fetch Question & Config (cached; allowed_language comes from the round STRICTLY)
+    question = get_question(question_id)
+    if not question:
         print(f"RUN CODE WARN: Question ID {question_id} NOT FOUND in DB.")
         return jsonify({'error': 'Question not found', 'success': False})
-    
-    question = q_res[0]
 
     # Enforce Allowed Language STRICTLY
     allowed = question.get('allowed_language')
@@ -398,73 +349,51 @@ def run_code():
     if language in ['javascript', 'js', 'node']: language = 'javascript'
     
     # 2. Determine input/expected (Inputs)
-    inputs = []
-    if question.get('test_input') is not None:
-        inputs.append({
-            'input': question['test_input'], 
-            'expected': question['expected_output']
-        })
-    elif question.get('test_cases'):
-        try:
-            tcs = json.loads(question['test_cases'])
-            inputs = tcs if isinstance(tcs, list) else []
-        except: pass
-        
+    inputs = question['cases']
     if not inputs:
         # Fallback for RUN only - warn user
         inputs = [{'input': '', 'expected': ''}] 
         print(f"WARN: No inputs found for QID {question_id}, running with empty input.")
 
     # 2. Track Execution (Run Count)
+    uid = None
     if user_id:
         uid = user_id
         if isinstance(user_id, str) and not user_id.isdigit():
-             u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (user_id,))
+             u_res = db_manager.execute_named('user_id_by_username', (user_id,))
              if u_res: uid = u_res[0]['user_id']
         
         try:
-            track_query = """
-                INSERT INTO participant_level_stats (user_id, contest_id, level, run_count)
-                VALUES (%s, %s, %s, 1)
-                ON DUPLICATE KEY UPDATE run_count = run_count + 1
-            """
-            db_manager.execute_update(track_query, (uid, contest_id, level))
+            db_manager.execute_named('track_run', (uid, contest_id, level))
         except: pass
 
     # 3. Execute Code (Sandbox Interface)
-    test_results = []
-    
-    # Run first 3 sample cases
+    # Run first 3 sample cases (compiled once, judged as one batch)
     sample_inputs = inputs[:3] 
-    
-    for i, case in enumerate(sample_inputs):
-        inp = case.get('input', '')
-        exp = case.get('expected', '')
-        
-        start_t = time.time()
-        result = execute_code_internal(code, language, inp)
-        duration = time.time() - start_t
-        
-        # Normalize for comparison
-        def normalize(s):
-            if not s: return ""
-            return "\n".join([line.strip() for line in s.splitlines() if line.strip()])
-
-        passed = False
-        if result['success']:
-            output = result['output'].replace('\r\n', '\n').strip()
-            passed = (normalize(output) == normalize(exp))
-        else:
-            output = result['error']
-            
+    # Runs go through the fair-share judge queue too (behind submissions)
+    try:
+        batch = judge_queue.run(
+            functools.partial(execute_batch, code, language, sample_inputs, question_id=question['question_id'],
+                              comparator=question.get('comparator'), owner=uid),
+            owner=uid, level=level
+        )
+    except JudgeQueueFull as e:
+        resp = jsonify({'error': 'Judge is busy, please retry shortly.', 'retry_after': e.retry_after})
+        resp.headers['Retry-After'] = str(e.retry_after)
+        return resp, 429
+
+    test_results = []
+    for r in batch['results']:
         test_results.append({
-            'passed': passed,
-            'input': inp,
-            'output': output,
-            'expected': exp,
-            'error': result.get('error') if not result['success'] else None,
-            'duration': duration,
-            'warnings': result.get('warnings')
+            'passed': r['passed'],
+            'input': r['input'],
+            'output': r['output'] if r['success'] else r['error'],
+            'expected': r['expected'],
+            'error': r['error'],
+            'duration': r['duration'],
+            'cpu_time': r['cpu_time'],
+            'memory_kb': r['memory_kb'],
+            'warnings': r['warnings']
         })
 
     # Summary Execution Time
@@ -478,6 +407,7 @@ def run_code():
         'success': True,
         'test_results': test_results,
         'execution_time': f"{total_time:.3f}s",
+        'cpu_time': batch['cpu_time'],
         'warnings': warnings_str
     })
 
@@ -497,37 +427,17 @@ def submit_question():
     # User ID Resolution
     uid = user_id
     if isinstance(user_id, str) and not user_id.isdigit():
-         u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (user_id,))
+         u_res = db_manager.execute_named('user_id_by_username', (user_id,))
          if u_res: uid = u_res[0]['user_id']
          else: return jsonify({'error': 'User not found'}), 404
 
-    # 1. Authoritative Question Lookup (Left Join to be safe)
-    query = """
-        SELECT q.question_id, q.round_id, q.test_input, q.expected_output, q.test_cases, q.points, r.allowed_language
-        FROM questions q
-        LEFT JOIN rounds r ON q.round_id = r.round_id
-        WHERE q.question_id = %s
-    """
-    
-    # Robust ID Handling (Int/Str)
-    q_res = db_manager.execute_query(query, (question_id,))
-    if not q_res:
-        # Try type conversion retry
-        try:
-            if str(question_id).isdigit():
-                q_res = db_manager.execute_query(query, (int(question_id),))
-            else:
-                q_res = db_manager.execute_query(query, (str(question_id),))
-        except: pass
-
-    if not q_res: 
+    # 1. Authoritative Question Lookup (cached, invalidated by the admin routes)
+    question = get_question(question_id)
+    if not question:
         return jsonify({'error': f'Question {question_id} not found in database'}), 404
-        
-    question = q_res[0]
     
     # 2. Check for Duplicate Submission (Success Only)
-    check_query = "SELECT is_correct FROM submissions WHERE user_id=%s AND question_id=%s AND is_correct=TRUE"
-    check_res = db_manager.execute_query(check_query, (uid, question['question_id']))
+    check_res = db_manager.execute_named('correct_submission', (uid, question['question_id']))
     if check_res:
          return jsonify({'error': 'Already submitted successfully', 'submitted': True}), 400
 
@@ -545,49 +455,49 @@ def submit_question():
     if language in ['javascript', 'js', 'node']: language = 'javascript'
 
     # 4. Input Preparation
-    inputs = []
-    if question.get('test_input') is not None:
-        inputs.append({'input': question['test_input'], 'expected': question['expected_output']})
-    elif question.get('test_cases'):
-        try:
-            tcs = json.loads(question['test_cases'])
-            inputs = tcs if isinstance(tcs, list) else []
-        except: pass
-    
+    inputs = question['cases']
     if not inputs:
         # Critical Data Error
         return jsonify({'error': 'System Error: Question has no test cases configured'}), 500
 
-    # 5. Execution (Strict)
-    all_passed = True
-    test_results = []
+    # 5. Enqueue for judging; the verdict is pushed over Socket.IO as 'judge:result'
+    level = data.get('level', 1)
+    try:
+        job_id = judge_queue.submit(
+            judge_submission, uid, user_id, question, code, language, inputs, contest_id, level,
+            owner=uid, level=level, on_complete=push_judge_result
+        )
+    except JudgeQueueFull as e:
+        resp = jsonify({'error': 'Judge is busy, please retry shortly.', 'retry_after': e.retry_after})
+        resp.headers['Retry-After'] = str(e.retry_after)
+        return resp, 429
+    store_queued_job(job_id)
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'queue_depth': judge_queue.depth()
+    }), 202
+
+def judge_submission(uid, user_id, question, code, language, inputs, contest_id, level):
+    """Judge worker body: executes, persists and broadcasts one submission."""
+    # 5. Execution (Strict) - stops at the first failing test case
     start_time = time.time()
-    
-    for tc in inputs:
-        inp = str(tc.get('input', ''))
-        exp = str(tc.get('expected', '')).replace('\r\n', '\n').strip()
-        
-        res = execute_code_internal(code, language, inp)
-        
-        if res['success']:
-            actual = res['output'].replace('\r\n', '\n').strip()
-        else:
-            actual = ""
-        
-        def normalize(s):
-            if not s: return ""
-            return "\n".join([line.strip() for line in s.splitlines() if line.strip()])
-        
-        passed = False
-        if res['success']:
-             passed = (normalize(actual) == normalize(exp))
-             
-        if not passed: all_passed = False
-        
+    batch = execute_batch(code, language, inputs, stop_on_failure=True, question_id=question['question_id'],
+                          comparator=question.get('comparator'), owner=uid)
+    all_passed = batch['all_passed']
+
+    test_results = []
+    for r in batch['results']:
+        exp = '' if r['expected'] is None else str(r['expected'])
         test_results.append({
-            'input': inp, 'expected': exp, 'output': actual, 'passed': passed, 
-            'error': res['error'] if not res['success'] else None,
-            'warnings': res.get('warnings')
+            'input': str(r['input']), 'expected': exp.replace('\r\n', '\n').strip(), 'output': r['output'], 'passed': r['passed'], 
+            'error': r['error'],
+            'warnings': r['warnings'],
+            'duration': r['duration'],
+            'cpu_time': r['cpu_time'],
+            'memory_kb': r['memory_kb'],
+            'skipped': r['skipped']
         })
 
     execution_duration = int(time.time() - start_time)
@@ -602,62 +512,129 @@ def submit_question():
     warnings = list(set([r['warnings'] for r in test_results if r.get('warnings')]))
     warnings_str = "\n".join(warnings) if warnings else None
 
-    save_query = """
-        INSERT INTO submissions 
-        (user_id, contest_id, round_id, question_id, submitted_code, status, is_correct, test_results, score_awarded, time_taken_seconds)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    
     # Use Authoritative Question Data
     final_round_id = question.get('round_id')
     final_qid = question['question_id']
     
+    # 7. Level Stats Update - one transaction with the submission, so the
+    # stored submission and the participant's totals never disagree
+    already_solved = False
     try:
-        insert_res = db_manager.execute_update(save_query, (
-            uid, contest_id, final_round_id, final_qid, code, status, is_correct, json.dumps(test_results), score, execution_duration
-        ))
-        
-        if not insert_res:
-            print(f"SUBMIT DATA LOSS: Insert returned False for UID {uid} QID {final_qid}")
-            # Try to fetch last error from db manager if possible, or just fail hard.
-            return jsonify({'error': 'Database Error: Submission could not be saved. Please retry.'}), 500
-            
+        with db_manager.transaction() as tx:
+            if all_passed:
+                # Several submits for one question can be queued: check the
+                # duplicate again under a lock so only the first one scores
+                tx.named('lock_user_question', (uid, final_qid))
+                already_solved = bool(tx.named('correct_submission', (uid, final_qid)))
+            if not already_solved:
+                tx.named('insert_submission', (
+                    uid, contest_id, final_round_id, final_qid, code, status, is_correct, json.dumps(test_results), score, execution_duration
+                ))
+                if all_passed:
+                    # Update Participant Stats
+                    tx.named('touch_level_stats', (uid, contest_id, level))
+                    tx.named('recalc_level_stats', (uid, contest_id, level))
     except Exception as e:
-        print(f"SUBMIT EXCEPTION: {e}")
-        return jsonify({'error': f'Submission Persistence Failed: {str(e)}'}), 500
+        print(f"SUBMIT DATA LOSS: Insert failed for UID {uid} QID {final_qid}: {e}")
+        return {'error': 'Database Error: Submission could not be saved. Please retry.', 'success': False}
 
-    # 7. Level Stats Update
-    if all_passed:
-        level = data.get('level', 1)
-        # Update Participant Stats
-        recalc_query = """
-            UPDATE participant_level_stats ps
-            SET 
-                questions_solved = (SELECT COUNT(*) FROM submissions s WHERE s.user_id=ps.user_id AND s.is_correct=TRUE),
-                level_score = (SELECT SUM(score_awarded) FROM submissions s WHERE s.user_id=ps.user_id)
-            WHERE ps.user_id=%s AND ps.contest_id=%s AND ps.level=%s
-        """
-        db_manager.execute_update("INSERT IGNORE INTO participant_level_stats (user_id, contest_id, level) VALUES (%s, %s, %s)", (uid, contest_id, level))
-        db_manager.execute_update(recalc_query, (uid, contest_id, level))
+    if already_solved:
+        return {'error': 'Already submitted successfully', 'submitted': True, 'success': False}
 
+    if all_passed:
         # Real-time Broadcast
         from extensions import socketio
         socketio.emit('admin:stats_update', {'user_id': uid, 'contest_id': contest_id})
         socketio.emit('participant:submitted', {
             'participant_id': uid,
             'name': user_id,
-            'question': f"Q{question_id}",
+            'question': f"Q{final_qid}",
             'contest_id': contest_id
         })
         
-    return jsonify({
+    return {
         'success': all_passed,
         'status': status,
         'warnings': warnings_str,
         'message': 'Solution Submitted' if all_passed else 'Solution Incorrect',
         'score': score,
-        'execution_time': f"{execution_duration}s"
-    })
+        'execution_time': f"{execution_duration}s",
+        'cpu_time': batch['cpu_time'],
+        # Submit cases are hidden: per-case verdicts only, never their input/expected
+        'test_results': [{k: v for k, v in r.items() if k not in ('input', 'expected')} for r in test_results]
+    }
+
+def _job_payload(job):
+    payload = {'job_id': job['job_id'], 'status': job['status']}
+    if job['status'] == 'done':
+        payload['result'] = job['result']
+    elif job['status'] == 'failed':
+        payload['result'] = {'success': False, 'error': 'Internal judge error. Please resubmit.'}
+    return payload
+
+# Job state lives in the memory of the worker process that judges it. A
+# 'queued' row is stored in admin_state on enqueue and replaced by the outcome,
+# so polls (and subscriptions) landing on any other worker can answer.
+# Expired entries are pruned once a minute.
+JUDGE_JOB_KEY = 'judge_job_{}'
+_last_job_prune = [0.0]
+
+def store_queued_job(job_id):
+    payload = {'job_id': job_id, 'status': 'queued'}
+    db_manager.execute_named('queue_judge_job', (JUDGE_JOB_KEY.format(job_id), json.dumps(payload)))
+
+def store_judge_result(job):
+    payload = _job_payload(job)
+    db_manager.execute_named('store_judge_job', (JUDGE_JOB_KEY.format(job['job_id']), json.dumps(payload, default=str)))
+    if time.time() - _last_job_prune[0] >= 60:
+        _last_job_prune[0] = time.time()
+        db_manager.execute_named('prune_judge_jobs', (JUDGE_RESULT_TTL,))
+    return payload
+
+def find_judge_job(job_id):
+    """Job payload from this worker's queue, else the stored outcome; None if unknown here."""
+    job = judge_queue.get(job_id)
+    if job:
+        payload = _job_payload(job)
+        if job['status'] == 'queued':
+            payload['queue_depth'] = judge_queue.depth()
+        return payload
+    res = db_manager.execute_named('admin_state_value', (JUDGE_JOB_KEY.format(job_id),))
+    if res:
+        try:
+            return json.loads(res[0]['value'])
+        except (TypeError, ValueError):
+            pass
+    return None
+
+def push_judge_result(job):
+    """Completion hook: store the verdict and push it to whoever subscribed to this job."""
+    from extensions import socketio
+    payload = store_judge_result(job)
+    socketio.emit('judge:result', payload, to=f"judge:{job['job_id']}")
+
+@socketio.on('judge:subscribe')
+def subscribe_judge_job(data):
+    job_id = (data or {}).get('job_id')
+    if not job_id:
+        return
+    join_room(f"judge:{job_id}")
+    # The job may have finished before the client subscribed
+    payload = find_judge_job(job_id)
+    if payload and payload['status'] in ('done', 'failed'):
+        emit('judge:result', payload)
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_judge_job(job_id):
+    """
+    Polling fallback for clients that miss the Socket.IO push. Jobs of
+    other workers are answered from admin_state ('queued' until their
+    outcome is stored); 404 means unknown or expired.
+    """
+    payload = find_judge_job(job_id)
+    if not payload:
+        return jsonify({'error': 'Job not found or expired', 'job_id': job_id}), 404
+    return jsonify(payload)
 
 def execute_code_secure(code, language, input_data):
     ext_map = {'python': '.py', 'javascript': '.js'}
@@ -705,135 +682,22 @@ def get_participant_state():
         contest_id = data.get('contest_id', 1)
         
         uid = user_id
+        proctor_id = user_id
         if isinstance(user_id, str) and not user_id.isdigit():
-             u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (user_id,))
+             u_res = db_manager.execute_named('user_id_by_username', (user_id,))
              if u_res: uid = u_res[0]['user_id']
              else: return jsonify({'error': 'User not found'}), 404
-             
-        # Fetch latest level
-        query = "SELECT level, violation_count, questions_solved, start_time, status FROM participant_level_stats WHERE user_id=%s AND contest_id=%s ORDER BY level DESC LIMIT 1"
-        res = db_manager.execute_query(query, (uid, contest_id))
-
-        # Fetch ALL Round Statuses (Single Source of Truth)
-        rounds_query = "SELECT round_number, status FROM rounds WHERE contest_id=%s ORDER BY round_number ASC"
-        rounds_res = db_manager.execute_query(rounds_query, (contest_id,))
-        rounds_map = {r['round_number']: r['status'] for r in rounds_res} if rounds_res else {}
-        
-        if rounds_map.get(1) == 'pending' or 1 not in rounds_map:
-             rounds_map[1] = 'active'
-
-        # Fetch Global Active Level
-        gl_query = "SELECT round_number, status FROM rounds WHERE contest_id=%s AND status='active' ORDER BY round_number ASC LIMIT 1"
-        gl_res = db_manager.execute_query(gl_query, (contest_id,))
-        global_active_level = gl_res[0]['round_number'] if gl_res else 1
-        
-        current_state = res[0] if res else None
-        
-        # CLAMP: Ensure user cannot be ahead of the global active round
-        if current_state and current_state['level'] > global_active_level:
-            current_state['level'] = global_active_level
-            # Reset status for this view to avoid confusion
-            current_state['status'] = 'NOT_STARTED' # Force them to 'enter' again if needed
-        
-        # QUALIFICATION CHECK:
-        # If the global active level is > 1, we must verify if the user is in the 'shortlisted_participants' for this level.
-        # This handles the case where a user completed Level X but was not selected for Level X+1.
-        if global_active_level > 1:
-            # Check if user is allowed for this level
-            q_check = "SELECT is_allowed FROM shortlisted_participants WHERE contest_id=%s AND level=%s AND user_id=%s AND is_allowed=1"
-            q_res = db_manager.execute_query(q_check, (contest_id, global_active_level, uid))
-            
-            if not q_res:
-                # User is NOT Shortlisted for this Active Level.
-                # However, we must be careful:
-                # If they are currently playing Level < Global Level, that's fine (maybe they are lagging behind?) 
-                # BUT the user request implies strict "if not select for next level block that id".
-                # Usually, if Level 3 is Active, everyone who passed Level 2 should have been shortlisted OR eliminated.
-                
-                # Check if they have completed the PREVIOUS level
-                prev_completed = False
-                if current_state:
-                     # If they are seemingly on the previous level completed?
-                     if current_state['level'] == global_active_level - 1 and current_state['status'] == 'COMPLETED':
-                         prev_completed = True
-                     # Or if they are on global level but not started yet?
-                     elif current_state['level'] == global_active_level:
-                         prev_completed = True # They reached it somehow?
-                
-                # If they are "at the door" of the global active level but not allowed:
-                is_disqualified_state = True
-                disq_reason = f"Not selected for Level {global_active_level}"
-
-        # RESTORE: Needed for JSON response
-        global_level_data = {'round_number': global_active_level, 'status': 'active'}
-        
-        cd_key = f"contest_{contest_id}_countdown"
-        cd_res = db_manager.execute_query("SELECT value FROM admin_state WHERE key_name=%s", (cd_key,))
-
-
-        
-        # 1. Fetch TOTAL Violations and Disqualification Status
-        pr_query = "SELECT total_violations, is_disqualified, disqualification_reason FROM participant_proctoring WHERE participant_id=%s AND contest_id=%s"
-        p_res = db_manager.execute_query(pr_query, (user_id if isinstance(user_id, str) and not user_id.isdigit() else (u_res[0]['username'] if u_res else ''), contest_id))
-        
-        total_violations = 0
-        is_disqualified_state = False
-        disq_reason = None
-        
-        if p_res:
-             total_violations = p_res[0]['total_violations'] if p_res[0]['total_violations'] is not None else 0
-             is_disqualified_state = bool(p_res[0]['is_disqualified'])
-             disq_reason = p_res[0]['disqualification_reason']
-
-        # 2. Get Duration (With Strict Defaults + Admin Override)
-        def get_default_duration(l):
-            if l <= 3: return 20
-            if l == 4: return 30
-            if l == 5: return 45
-            return 45
-
-        level_duration = get_default_duration(current_state['level'] if current_state else 1)
-        if current_state:
-            lvl = current_state['level']
-            rd_res = db_manager.execute_query("SELECT time_limit_minutes FROM rounds WHERE contest_id=%s AND round_number=%s", (contest_id, lvl))
-            if rd_res and rd_res[0]['time_limit_minutes'] and rd_res[0]['time_limit_minutes'] > 0:
-                 level_duration = rd_res[0]['time_limit_minutes']
-
-        # 3. Decode Countdown State
-        countdown_data = {'active': False}
-        if cd_res:
-             try:
-                 countdown_data = json.loads(cd_res[0]['value'])
-             except: pass
-
-        # 4. Solved Question IDs
-        s_query = "SELECT question_id FROM submissions WHERE user_id=%s AND contest_id=%s AND is_correct=TRUE"
-        s_res = db_manager.execute_query(s_query, (uid, contest_id))
-        solved_ids = [str(r['question_id']) for r in s_res] if s_res else []
+        else:
+             # participant_proctoring is keyed by username
+             u_res = db_manager.execute_named('user_by_username_or_id', (str(user_id), user_id))
+             proctor_id = u_res[0]['username'] if u_res else ''
 
-        # 5. Format Start Time (Strict UTC with Z to prevent browser drift)
-        def format_utc(dt):
-            if not dt: return None
-            # Ensure it's treated as UTC. 
-            # If the DB returned a naive object, we just add Z.
-            return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        # All reads are independent: one pipelined round trip
+        plan = hot_reads.participant_state_plan(uid, contest_id, proctor_id)
+        with db_manager.batch() as b:
+            pending = {key: b.named(name, params) for key, (name, params) in plan.items()}
 
-        return jsonify({
-            'success': True,
-            'level': current_state['level'] if current_state else 1,
-            'level_duration_minutes': level_duration,
-            'violations': total_violations,
-            'solved': current_state['questions_solved'] if current_state else 0,
-            'solved_ids': solved_ids,
-            'status': current_state['status'] or 'NOT_STARTED' if current_state else 'NOT_STARTED',
-            'start_time': format_utc(current_state['start_time']) if current_state else None,
-            'global_level': global_level_data['round_number'],
-            'global_level_status': global_level_data['status'],
-            'rounds_map': rounds_map,
-            'countdown': countdown_data,
-            'is_eliminated': is_disqualified_state,
-            'disqualification_reason': disq_reason
-        })
+        return jsonify(hot_reads.build_participant_state({key: q.value for key, q in pending.items()}))
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -854,7 +718,7 @@ def start_level():
         # 1. Resolve User ID
         uid = user_id
         if isinstance(user_id, str) and not user_id.isdigit():
-             u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (user_id,))
+             u_res = db_manager.execute_named('user_id_by_username', (user_id,))
              if u_res: uid = u_res[0]['user_id']
              else: return jsonify({'error': f'User {user_id} not found'}), 404
         
@@ -862,25 +726,22 @@ def start_level():
         # Use Python UTC time for consistency across systems
         now_utc = datetime.datetime.utcnow()
         
-        db_manager.execute_update(
-            "INSERT IGNORE INTO participant_level_stats (user_id, contest_id, level, status, start_time) VALUES (%s, %s, %s, 'NOT_STARTED', %s)",
-            (uid, contest_id, level, now_utc)
-        )
-        
-        # 3. Start Level (Update Status & Time ONLY if new)
-        db_manager.execute_update(
-            "UPDATE participant_level_stats SET start_time = %s, status = 'IN_PROGRESS' WHERE user_id=%s AND contest_id=%s AND level=%s AND (status='NOT_STARTED' OR status IS NULL OR status='PAUSED')",
-            (now_utc, uid, contest_id, level)
-        )
-        
-        # 4. Fetch Actual Start Time & Duration
-        stats_query = "SELECT start_time FROM participant_level_stats WHERE user_id=%s AND contest_id=%s AND level=%s"
-        stats_res = db_manager.execute_query(stats_query, (uid, contest_id, level))
+        # 2-4 are sent as one pipelined batch
+        with db_manager.batch() as b:
+            b.named('ensure_level_stats', (uid, contest_id, level, now_utc))
+
+            # 3. Start Level (Update Status & Time ONLY if new)
+            b.named('start_level_stats', (now_utc, uid, contest_id, level))
+
+            # 4. Fetch Actual Start Time & Duration
+            start_q = b.named('level_start_time', (uid, contest_id, level))
+            duration_q = b.named('round_time_limit', (contest_id, level))
+
+        stats_res = start_q.value
         # Ensure UTC suffix
         start_time = stats_res[0]['start_time'] if stats_res and stats_res[0]['start_time'] else now_utc
 
-        dur_query = "SELECT time_limit_minutes FROM rounds WHERE contest_id=%s AND round_number=%s"
-        dur_res = db_manager.execute_query(dur_query, (contest_id, level))
+        dur_res = duration_q.value
         
         # Requested Defaults
         def get_default_duration(l):
@@ -922,20 +783,20 @@ def submit_level():
     # Get User INT ID
     uid = user_id
     if isinstance(user_id, str) and not user_id.isdigit():
-         u_res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (user_id,))
+         u_res = db_manager.execute_named('user_id_by_username', (user_id,))
          if u_res: uid = u_res[0]['user_id']
     
     # 1. Update Status to COMPLETED
     # Set completion time
     now_utc = datetime.datetime.utcnow()
-    db_manager.execute_update(
-        "UPDATE participant_level_stats SET status='COMPLETED', completed_at=%s WHERE user_id=%s AND contest_id=%s AND level=%s", 
-        (now_utc, uid, contest_id, level)
-    )
-    
-    # Fetch Updated Stats for Broadccast
-    stats_q = "SELECT level_score, violation_count, completed_at, start_time FROM participant_level_stats WHERE user_id=%s AND contest_id=%s AND level=%s"
-    stats = db_manager.execute_query(stats_q, (uid, contest_id, level))
+    next_level = int(level) + 1
+    with db_manager.batch() as b:
+        b.named('complete_level_stats', (now_utc, uid, contest_id, level))
+        # Updated Stats for Broadccast
+        stats_q = b.named('level_summary', (uid, contest_id, level))
+        # Does the next level exist in Rounds?
+        next_round_q = b.named('round_id_by_number', (contest_id, next_level))
+    stats = stats_q.value
     
     score = 0
     violations = 0
@@ -959,15 +820,9 @@ def submit_level():
     })
     
     # 2. Automatically Unlock Next Level
-    next_level = int(level) + 1
-    
-    # Check if next level exists in Rounds
-    r_check = db_manager.execute_query("SELECT round_id FROM rounds WHERE contest_id=%s AND round_number=%s", (contest_id, next_level))
+    r_check = next_round_q.value
     if r_check:
-        db_manager.execute_update(
-            "INSERT IGNORE INTO participant_level_stats (user_id, contest_id, level, status) VALUES (%s, %s, %s, 'NOT_STARTED')",
-            (uid, contest_id, next_level)
-        )
+        db_manager.execute_named('unlock_level_stats', (uid, contest_id, next_level))
     
     return jsonify({
         "success": True,
@@ -993,23 +848,30 @@ def qualify_participants(contest_id):
          # Need better logic: find NEXT level. For now, try manual or default
          level = 2 
 
-    # 1. Reset selection for this level (Requirement: Uncheck others)
-    # We set all is_allowed=0 for this contest+level first
-    db_manager.execute_update("UPDATE shortlisted_participants SET is_allowed=0 WHERE contest_id=%s AND level=%s", (contest_id, level))
+    # pid could be int or string: resolve all usernames in one query
+    usernames = [pid for pid in participant_ids if isinstance(pid, str) and not pid.isdigit()]
+    user_ids = {}
+    if usernames:
+        u_res = db_manager.execute_query("SELECT user_id, username FROM users WHERE username = ANY(%s)", (usernames,))
+        user_ids = {r['username']: r['user_id'] for r in u_res or []}
 
-    count = 0
+    rows = []
     for pid in participant_ids:
-        # pid could be int or string
-        uid = pid
-        if isinstance(pid, str) and not pid.isdigit():
-             res = db_manager.execute_query("SELECT user_id FROM users WHERE username=%s", (pid,))
-             if res: uid = res[0]['user_id']
-        
-        db_manager.execute_update(
-            "INSERT INTO shortlisted_participants (contest_id, level, user_id, is_allowed) VALUES (%s, %s, %s, 1) ON DUPLICATE KEY UPDATE is_allowed=1",
-            (contest_id, level, uid)
+        if pid in usernames and pid not in user_ids:
+            continue # Unknown username
+        rows.append((contest_id, level, user_ids.get(pid, pid)))
+
+    # 1. Reset selection for this level (Requirement: Uncheck others), then
+    # allow the chosen ones in one batched upsert - in one transaction, so
+    # nobody is briefly locked out
+    with db_manager.transaction() as tx:
+        tx.execute("UPDATE shortlisted_participants SET is_allowed=0 WHERE contest_id=%s AND level=%s", (contest_id, level))
+        tx.execute_many(
+            "INSERT INTO shortlisted_participants (contest_id, level, user_id, is_allowed) VALUES (%s, %s, %s, 1) "
+            "ON CONFLICT (contest_id, level, user_id) DO UPDATE SET is_allowed=1",
+            rows
         )
-        count += 1
+    count = len(rows)
 
     return jsonify({'success': True, 'count': count})
 
@@ -1133,7 +995,7 @@ def get_contest_stats(contest_id):
     
     # Get Configured Wait Time + Countdown Status
     cd_key = f"contest_{contest_id}_countdown"
-    cd_res = db_manager.execute_query("SELECT value FROM admin_state WHERE key_name=%s", (cd_key,))
+    cd_res = db_manager.execute_named('admin_state_value', (cd_key,))
     countdown_state = cd_res[0]['value'] if cd_res else 'stopped'
 
     return jsonify({
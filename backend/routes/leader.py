@@ -1,11 +1,12 @@
 
 from flask import Blueprint, jsonify, request
-from db_connection import db_manager
+from db_connection import db_manager, replica_reads
 import datetime
 
 bp = Blueprint('leader', __name__)
 
 @bp.route('/live-stats', methods=['GET'])
+@replica_reads
 def live_stats():
     # 1. Get Active Contest
     c_query = "SELECT contest_id, contest_name as title, status, start_datetime FROM contests WHERE status='live' LIMIT 1"
@@ -1,79 +1,24 @@
 from flask import Blueprint, jsonify, request, Response
+from db_connection import replica_reads
 from utils.db import get_db
-import datetime
+from utils import hot_reads
 import io
 import csv
 
 bp = Blueprint('leaderboard', __name__)
 
 @bp.route('/', methods=['GET'])
+@replica_reads
 def get_leaderboard():
     db = get_db()
     level = request.args.get('level', 1, type=int) # Default to Level 1
     
-    # Check if we are querying for a specific level
-    # Use participant_level_stats
-    query = """
-        SELECT 
-            u.username as participant_id, 
-            u.full_name, 
-            u.department, 
-            u.college,
-            pls.level_score as total_score,
-            pls.questions_solved,
-            pls.status,
-            pls.start_time, 
-            pls.completed_at,
-            TIMESTAMPDIFF(SECOND, pls.start_time, pls.completed_at) as time_taken_sec
-        FROM participant_level_stats pls
-        JOIN users u ON pls.user_id = u.user_id
-        WHERE u.role = 'participant' AND pls.level = %s
-        ORDER BY pls.level_score DESC, 
-                 CASE WHEN pls.status = 'COMPLETED' THEN 0 ELSE 1 END ASC,
-                 time_taken_sec ASC
-    """
-    
-    # We use db_manager via get_db() which returns the bridge or manager
-    # execute_query supports params
-    res = db.execute_query(query, (level,))
-    
-    data = []
-    if res:
-        for idx, row in enumerate(res):
-            # Format time
-            seconds = row.get('time_taken_sec')
-            if seconds is not None:
-                m, s = divmod(int(seconds), 60)
-                h, m = divmod(m, 60)
-                time_str = "{:02d}:{:02d}:{:02d}".format(h, m, s)
-            else:
-                # If not completed or calculated, show -- or duration so far?
-                # Usually leaderboard shows finalized time.
-                time_str = "--:--:--"
-                if row.get('status') == 'IN_PROGRESS' and row.get('start_time'):
-                    # Optional: Could show current running time, but cache implications.
-                    # Let's keep it simple: -- for incomplete.
-                    pass
-
-            data.append({
-                'id': row['participant_id'],
-                'rank': idx + 1,
-                'name': row['full_name'],
-                'department': row.get('department'),
-                'college': row.get('college'),
-                'score': float(row['total_score']),
-                'time': time_str,
-                'solved': row['questions_solved'],
-                'status': row['status']
-            })
-            
-    return jsonify({
-        "leaderboard": data,
-        "level": level,
-        "generated_at": datetime.datetime.utcnow().isoformat()
-    })
+    # Level-wise standings from participant_level_stats
+    res = db.execute_query(hot_reads.LEADERBOARD_QUERY, (level,))
+    return jsonify(hot_reads.build_leaderboard(res, level))
 
 @bp.route('/report', methods=['GET'])
+@replica_reads
 def download_leaderboard_report():
     db = get_db()
     level = request.args.get('level', 1, type=int)
@@ -19,7 +19,7 @@ def get_participant_levels(participant_id):
         user_id = None
         username = participant_id
         
-        u_res = db.execute_query("SELECT user_id, username FROM users WHERE username=%s OR user_id=%s", (username, username))
+        u_res = db.execute_named('user_by_username_or_id', (username, username))
         if u_res:
              user_id = u_res[0]['user_id']
         else:
@@ -82,7 +82,7 @@ def unlock_level_logic(data):
     try:
         # Resolve ID
         user_id = None
-        u_res = db.execute_query("SELECT user_id FROM users WHERE username=%s OR user_id=%s", (participant_id, participant_id))
+        u_res = db.execute_named('user_id_by_username_or_id', (participant_id, participant_id))
         if u_res:
              user_id = u_res[0]['user_id']
         else:
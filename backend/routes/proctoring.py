@@ -6,6 +6,7 @@ Handles proctoring configuration, violation tracking, monitoring, and admin acti
 
 from flask import Blueprint, jsonify, request
 from utils.db import get_db
+from db_connection import replica_reads
 from auth_middleware import admin_required
 import uuid
 import datetime
@@ -52,92 +53,110 @@ def calculate_risk_level(total_violations):
     if total_violations > 2: return 'medium'
     return 'low'
 
-def update_participant_aggregates(participant_id, user_db_id, contest_id, violation_points, violation_col=None, level=1):
+def update_participant_aggregates(participant_id, user_db_id, contest_id, violation_points, violation_col=None, level=1, violation_log=None):
     """
     Update participant_proctoring table with strict category incrementing.
     Now accepts user_db_id as required int/string ID to avoid re-lookup failures.
+
+    Runs as one transaction with the participant_proctoring row locked
+    (SELECT ... FOR UPDATE), so concurrent violations of the same participant
+    cannot overwrite each other's counts. When violation_log is given it is
+    inserted in the same transaction, which keeps the level-wise count exact.
     """
     db = get_db()
     
-    # 1. Get Current State (Fresh Read)
     try:
-        # Check if record exists
-        res = db.table('participant_proctoring').select("*").eq("participant_id", participant_id).eq("contest_id", contest_id).execute()
-        
-        state = {}
-        if not res.data:
-            # Create fresh
-            state = {
-                'id': str(uuid.uuid4()),
-                'user_id': user_db_id, # Ensure we link user_id if column exists
-                'participant_id': participant_id,
-                'contest_id': contest_id,
-                'total_violations': 0,
-                'violation_score': 0,
-                'risk_level': 'low',
-                'is_disqualified': False,
-                'created_at': get_current_time(),
-                'tab_switches': 0,
-                'copy_attempts': 0,
-                'screenshot_attempts': 0,
-                'focus_losses': 0,
-                'extra_violations': 0,
+        # Config (read before taking the row lock)
+        config = get_config(contest_id)
+        auto_disqualified = False
+
+        with db.transaction() as tx:
+            # 1. Get Current State (Locked Read)
+            rows = tx.named('proctoring_state_for_update', (participant_id, contest_id))
+            if not rows:
+                # Create fresh; a concurrent report may have created it first
+                tx.insert('participant_proctoring', {
+                    'id': str(uuid.uuid4()),
+                    'user_id': user_db_id, # Ensure we link user_id if column exists
+                    'participant_id': participant_id,
+                    'contest_id': contest_id,
+                    'total_violations': 0,
+                    'violation_score': 0,
+                    'risk_level': 'low',
+                    'is_disqualified': False,
+                    'created_at': get_current_time(),
+                    'tab_switches': 0,
+                    'copy_attempts': 0,
+                    'screenshot_attempts': 0,
+                    'focus_losses': 0,
+                    'extra_violations': 0,
+                    'updated_at': get_current_time()
+                }, on_conflict=('participant_id', 'contest_id'))
+                rows = tx.named('proctoring_state_for_update', (participant_id, contest_id))
+            state = rows[0]
+
+            # 2. Calculate New Values
+            current_total = int(state.get('total_violations') or 0)
+            current_score = int(state.get('violation_score') or 0)
+            
+            new_total = current_total + 1
+            new_score = current_score + violation_points
+            
+            # Update specific column text
+            col_update = {}
+            if violation_col:
+                 current_val = int(state.get(violation_col) or 0)
+                 col_update[violation_col] = current_val + 1
+            
+            # 3. Level-Wise Count (Robust Query)
+            # Count existing violations in 'violations' table for this level + 1 (the current one)
+            v_res = tx.named('level_violation_count', (user_db_id, contest_id, level))
+            existing_level_count = v_res[0]['cnt'] if v_res else 0
+            level_violations = existing_level_count + 1
+            
+            # 4. Risk & Disqualification Logic
+            risk = calculate_risk_level(new_total)
+            is_disqualified = bool(state.get('is_disqualified', False))
+            disq_reason = state.get('disqualification_reason')
+            disq_at = state.get('disqualified_at')
+            
+            extra = int(state.get('extra_violations') or 0)
+            max_allowed = config.get('max_violations', 10) + extra
+            
+            # Auto-DQ Logic (Trigger only if not already DQ'd)
+            if config.get('auto_disqualify') and level_violations > max_allowed and not is_disqualified:
+                is_disqualified = True
+                risk = 'critical'
+                disq_reason = f'Auto: Exceeded max violations ({max_allowed}) for Level {level}'
+                disq_at = get_current_time()
+                auto_disqualified = True
+
+            # 5. Execute Update
+            # Prepare payload
+            update_payload = {
+                'total_violations': new_total,
+                'violation_score': new_score,
+                'risk_level': risk,
+                'is_disqualified': is_disqualified,
+                'last_violation_at': get_current_time(),
                 'updated_at': get_current_time()
             }
-            # Attempt insert
-            try:
-                db.table('participant_proctoring').insert(state).execute()
-            except Exception as e:
-                # Race condition handling: if insert fails, assume exists and re-read
-                print(f"Insert race caught: {e}")
-                res = db.table('participant_proctoring').select("*").eq("participant_id", participant_id).eq("contest_id", contest_id).execute()
-                if res.data: state = res.data[0]
-        else:
-            state = res.data[0]
-
-        # 2. Config
-        config = get_config(contest_id)
-        
-        # 3. Calculate New Values
-        # Note: We do "Read-Modify-Write". 
-        current_total = int(state.get('total_violations') or 0)
-        current_score = int(state.get('violation_score') or 0)
-        
-        new_total = current_total + 1
-        new_score = current_score + violation_points
-        
-        # Update specific column text
-        col_update = {}
-        if violation_col:
-             current_val = int(state.get(violation_col) or 0)
-             col_update[violation_col] = current_val + 1
-        
-        # 4. Level-Wise Count (Robust Query)
-        # Count existing violations in 'violations' table for this level + 1 (the current one)
-        v_res = db.execute_query(
-            "SELECT COUNT(*) as cnt FROM violations WHERE user_id=%s AND contest_id=%s AND level=%s", 
-            (user_db_id, contest_id, level)
-        )
-        existing_level_count = v_res[0]['cnt'] if v_res else 0
-        level_violations = existing_level_count + 1
-        
-        # 5. Risk & Disqualification Logic
-        risk = calculate_risk_level(new_total)
-        is_disqualified = bool(state.get('is_disqualified', False))
-        disq_reason = state.get('disqualification_reason')
-        disq_at = state.get('disqualified_at')
-        
-        extra = int(state.get('extra_violations') or 0)
-        max_allowed = config.get('max_violations', 10) + extra
-        
-        # Auto-DQ Logic (Trigger only if not already DQ'd)
-        if config.get('auto_disqualify') and level_violations > max_allowed and not is_disqualified:
-            is_disqualified = True
-            risk = 'critical'
-            disq_reason = f'Auto: Exceeded max violations ({max_allowed}) for Level {level}'
-            disq_at = get_current_time()
+            if is_disqualified:
+                update_payload['disqualification_reason'] = disq_reason
+                update_payload['disqualified_at'] = disq_at
+                
+            # Merge column update
+            update_payload.update(col_update)
             
-            # Emit Socket Event
+            tx.update('participant_proctoring', update_payload, {'participant_id': participant_id, 'contest_id': contest_id})
+
+            # 6. Individual Violation Log
+            if violation_log is not None:
+                violation_log.setdefault('severity', risk)
+                tx.insert('violations', violation_log)
+
+        # Emit Socket Event (after commit)
+        if auto_disqualified:
             try:
                 from extensions import socketio
                 socketio.emit('proctoring:disqualified', {
@@ -146,25 +165,6 @@ def update_participant_aggregates(participant_id, user_db_id, contest_id, violat
                     'reason': disq_reason
                 })
             except: pass
-
-        # 6. Execute Update
-        # Prepare payload
-        update_payload = {
-            'total_violations': new_total,
-            'violation_score': new_score,
-            'risk_level': risk,
-            'is_disqualified': is_disqualified,
-            'last_violation_at': get_current_time(),
-            'updated_at': get_current_time()
-        }
-        if is_disqualified:
-            update_payload['disqualification_reason'] = disq_reason
-            update_payload['disqualified_at'] = disq_at
-            
-        # Merge column update
-        update_payload.update(col_update)
-        
-        db.table('participant_proctoring').update(update_payload).eq("participant_id", participant_id).eq("contest_id", contest_id).execute()
         
         return {**state, **update_payload, 'level_violations': level_violations}
         
@@ -273,16 +273,7 @@ def report_violation():
         try: current_level = int(current_level)
         except: current_level = 1
 
-        updated_state = update_participant_aggregates(
-            participant_id=username, 
-            user_db_id=user_id,
-            contest_id=contest_id, 
-            violation_points=points, 
-            violation_col=mapping_col, 
-            level=current_level
-        )
-        
-        # 5. Log Individual Violation
+        # 5. Individual Violation (logged in the same transaction as the aggregates)
         violation_log = {
             'user_id': user_id,
             'contest_id': contest_id,
@@ -292,14 +283,25 @@ def report_violation():
             'timestamp': get_current_time(),
             'round_id': data.get('round_id'), # Optional
             'level': current_level,
-            'question_id': data.get('question_id'),
-            'severity': updated_state.get('risk_level', 'low')
+            'question_id': data.get('question_id')
         }
-        # Refine severity for the individual log
+        # Refine severity for the individual log (otherwise the new risk level)
         if points >= 3: violation_log['severity'] = 'critical'
         elif points >= 2: violation_log['severity'] = 'medium'
-        
-        db.table('violations').insert(violation_log).execute()
+
+        updated_state = update_participant_aggregates(
+            participant_id=username, 
+            user_db_id=user_id,
+            contest_id=contest_id, 
+            violation_points=points, 
+            violation_col=mapping_col, 
+            level=current_level,
+            violation_log=violation_log
+        )
+        if not updated_state:
+            # Aggregates were rolled back; still keep the individual log
+            violation_log.setdefault('severity', 'low')
+            db.table('violations').insert(violation_log).execute()
         
         # 6. Real-time Alert
         try:
@@ -330,6 +332,7 @@ def report_violation():
 
 @bp.route('/stats/<contest_id>', methods=['GET'])
 @admin_required
+@replica_reads
 def get_stats(contest_id):
     """
     Returns object with: total_violations, active_risky_participants, auto_disqualifications
@@ -362,6 +365,7 @@ def get_stats(contest_id):
 
 @bp.route('/status/<contest_id>', methods=['GET'])
 @admin_required
+@replica_reads
 def get_status(contest_id):
     """
     Returns a list of all participants sorted by risk level.
@@ -637,7 +641,7 @@ def reset_violations():
         if not contest_id:
              # Try to resolve. 
              # SELECT contest_id FROM contests WHERE status='live' LIMIT 1
-             c_res = db.execute_query("SELECT contest_id FROM contests WHERE status='live' LIMIT 1")
+             c_res = db.execute_named('live_contest_id')
              if c_res: contest_id = c_res[0]['contest_id']
              else: return jsonify({'error': 'No live contest found and contest_id not provided'}), 400
 
@@ -680,13 +684,13 @@ def reset_progress():
     try:
         # Resolve User ID Integer
         user_id = None
-        u_res = db.execute_query("SELECT user_id FROM users WHERE username=%s OR user_id=%s", (participant_id, participant_id))
+        u_res = db.execute_named('user_id_by_username_or_id', (participant_id, participant_id))
         if u_res: user_id = u_res[0]['user_id']
         else: return jsonify({'error': 'User not found'}), 404
         
         # If contest_id not provided, try live
         if not contest_id:
-             c_res = db.execute_query("SELECT contest_id FROM contests WHERE status='live' LIMIT 1")
+             c_res = db.execute_named('live_contest_id')
              if c_res: contest_id = c_res[0]['contest_id']
              else: return jsonify({'error': 'Contest not found'}), 400
 
@@ -1,10 +1,11 @@
 
 from flask import Blueprint, jsonify, request
-from db_connection import db_manager
+from db_connection import db_manager, replica_reads
 
 bp = Blueprint('rankings', __name__)
 
 @bp.route('/view', methods=['GET'])
+@replica_reads
 def get_public_rankings():
     """
     Get finalized rankings for a specific level.
@@ -97,6 +98,7 @@ def get_public_rankings():
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/levels', methods=['GET'])
+@replica_reads
 def get_finalized_levels():
     """
     Get a list of ALL levels for the dropdown (Levels 1-5).
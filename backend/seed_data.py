@@ -85,11 +85,6 @@ def seed_data():
             ])
             # Buggy Code for Q1
             buggy1 = "import sys\n\ndef solve(a, b):\n    return a - b  # Bug: should be a + b\n\nif __name__ == '__main__':\n    # Simple runner\n    line = sys.stdin.read().strip()\n    if line:\n        parts = line.split()\n        if len(parts) >= 2:\n            print(solve(int(parts[0]), int(parts[1])))"
-            
-            db_manager.execute_update("""
-                INSERT INTO questions (round_id, question_number, question_title, question_description, buggy_code, expected_output, test_cases, difficulty_level, points, test_input)
-                VALUES (%s, 1, 'Fix the Sum', 'The function should return the sum of two numbers, but it subtracts them.', %s, '5', %s, 'Easy', 10, '2 3')
-            """, (round_id, buggy1, tcs1))
 
             # Q2
             tcs2 = json.dumps([
@@ -98,10 +93,14 @@ def seed_data():
             ])
             buggy2 = "import sys\nimport ast\n\ndef solve(arr):\n    return sorted(arr) # Bug: should reverse\n\nif __name__ == '__main__':\n    input_str = sys.stdin.read().strip()\n    if input_str:\n        arr = [int(x) for x in input_str.split(',')]\n        print(solve(arr))"
 
-            db_manager.execute_update("""
+            # Both questions in one batched statement
+            db_manager.execute_many("""
                 INSERT INTO questions (round_id, question_number, question_title, question_description, buggy_code, expected_output, test_cases, difficulty_level, points, test_input)
-                VALUES (%s, 2, 'Array Reverse', 'Reverse the array.', %s, '[3, 2, 1]', %s, 'Easy', 20, '1,2,3')
-            """, (round_id, buggy2, tcs2))
+                VALUES (%s, %s, %s, %s, %s, %s, %s, 'Easy', %s, %s)
+            """, [
+                (round_id, 1, 'Fix the Sum', 'The function should return the sum of two numbers, but it subtracts them.', buggy1, '5', tcs1, 10, '2 3'),
+                (round_id, 2, 'Array Reverse', 'Reverse the array.', buggy2, '[3, 2, 1]', tcs2, 20, '1,2,3')
+            ])
             
         else:
             print("Questions exist")
@@ -60,6 +60,7 @@ CREATE TABLE IF NOT EXISTS questions (
   expected_output TEXT,
   test_input TEXT,
   test_cases JSON,
+  comparator TEXT DEFAULT 'whitespace',
   difficulty_level TEXT NOT NULL,
   points INTEGER DEFAULT 10,
   hints TEXT,
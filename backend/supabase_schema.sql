@@ -101,6 +101,7 @@ CREATE TABLE IF NOT EXISTS questions (
   difficulty_level VARCHAR(20),
   expected_output TEXT,
   test_cases JSONB,
+  comparator VARCHAR(20) DEFAULT 'whitespace',
   sample_input TEXT,
   sample_output TEXT,
   points INTEGER DEFAULT 10,
@@ -93,6 +93,7 @@ CREATE TABLE questions (
   time_estimate_minutes INTEGER,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   test_input TEXT,
+  comparator VARCHAR(20) DEFAULT 'whitespace',
   UNIQUE(round_id, question_number)
 );
 
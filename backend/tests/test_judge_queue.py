@@ -0,0 +1,56 @@
+"""
+Tests for the fair-share judge queue (utils/judge_queue.py).
+
+    cd backend && python -m pytest -q tests
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.judge_queue import JudgeQueue  # noqa: E402
+
+
+def make_queue(workers=2):
+    return JudgeQueue(workers, max_depth=20, result_ttl=60, max_inflight_per_user=1, max_queued_per_user=5)
+
+
+def test_run_is_not_held_behind_own_submit():
+    queue = make_queue()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_submit():
+        started.set()
+        release.wait(5)
+        return 'submitted'
+
+    job_id = queue.submit(slow_submit, owner='alice')
+    assert started.wait(5)
+    try:
+        # Same owner, submission still executing: the run gets the free worker
+        assert queue.run(lambda: 'ran', owner='alice') == 'ran'
+        assert queue.get(job_id)['status'] == 'running'
+    finally:
+        release.set()
+
+
+def test_inflight_cap_still_applies_per_kind():
+    queue = make_queue()
+    started, release = threading.Event(), threading.Event()
+    order = []
+
+    def first():
+        started.set()
+        release.wait(5)
+        order.append('first')
+
+    queue.submit(first, owner='bob')
+    assert started.wait(5)
+    second_done = threading.Event()
+    queue.submit(lambda: order.append('second'), owner='bob', on_complete=lambda job: second_done.set())
+    # A second submission of the same owner waits although a worker is idle
+    assert not second_done.wait(0.2)
+    release.set()
+    assert second_done.wait(5)
+    assert order == ['first', 'second']
@@ -0,0 +1,97 @@
+"""
+Tests for the Python submission policy (utils/python_policy.py).
+
+    cd backend && python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.python_policy import check_python_code  # noqa: E402
+from utils.logic import validate_code_security  # noqa: E402
+
+# Modules reached through the attributes of allowed ones
+MODULE_ESCAPES = [
+    'import random\nrandom._os.system("id")',
+    'import random\nrandom._os.getcwd()',
+    'import typing\ntyping.sys.modules["os"].system("id")',
+    'import collections\ncollections._sys.exit(0)',
+    'import dataclasses\ndataclasses.sys.modules',
+    'import json\njson.codecs.open("/etc/passwd").read()',
+    'import enum\nenum.bltns.open("/etc/passwd")',
+    'import random as r\nm = r._os\nm.system("id")',
+    'from random import _os',
+    'from typing import sys',
+    'import random\ngetattr(random, "_os").system("id")',
+    'import random\ngetattr(random, "_o" "s")',
+    'import typing\nhasattr(typing, "sys")',
+]
+
+# Ways around the literal-name checks
+REFLECTION_ESCAPES = [
+    'import random\ng = getattr\ng(random, "_o" + "s")',
+    'import random\nlist(map(getattr, [random], ["_os"]))',
+    'import operator, random\noperator.attrgetter("_os")(random)',
+    'import operator, random\noperator.attrgetter("x._os")(random)',
+    'import operator, random\nf = operator.attrgetter\nf("_os")(random)',
+    'from operator import attrgetter\nimport random\nattrgetter("_os")(random)',
+    'import operator\noperator.methodcaller("__subclasses__")(object)',
+    'import random\nmatch random:\n    case object(_os=m):\n        m.system("id")',
+    'b = locals()["__builtins__"]\nb.open("/etc/passwd")',
+    'from operator import attrgetter as ag\nimport random\nprint(ag("_os")(random).getcwd())',
+    'from operator import methodcaller as mc\nimport random\nmc("__subclasses__")(object)',
+    'import operator, random\ngetattr(operator, "attrgetter")("_os")(random)',
+    'import operator, random\noperator.methodcaller("attrgetter", "_os")(operator)(random)',
+]
+
+# typing / functools helpers that eval string annotations
+ANNOTATION_ESCAPES = [
+    'import typing\ndef f(x: "__import__(\'os\').getcwd()"): pass\ntyping.get_type_hints(f)',
+    'from typing import get_type_hints',
+    'from typing import *\nget_type_hints(print)',
+    'import typing\ntyping.ForwardRef("__import__(\'os\')")',
+    'from typing import List\ndef f(x: List["__import__(\'os\')"]) -> int: pass',
+    'def f() -> "__import__(\'os\')": pass',
+    'x: "__import__(\'os\')" = 1',
+    'import functools\n@functools.singledispatch\ndef f(x): pass',
+    'from functools import singledispatch',
+    'def f(x): pass\nf.__annotations__ = {"x": "__import__(\'os\')"}',
+]
+
+# Ordinary solutions must still pass
+ALLOWED = [
+    'import math\nprint(math.sqrt(16))',
+    'import random\nrandom.seed(1)\nprint(random.randint(1, 6))',
+    'from collections import defaultdict, Counter\nprint(Counter("aab"))',
+    'import operator\nprint(sorted([(1, 2)], key=operator.itemgetter(1)))',
+    'class Stack:\n    def __init__(self):\n        self._items = []\n    def push(self, x):\n        self._items.append(x)\n',
+    'class A:\n    @classmethod\n    def make(cls):\n        return cls._build()\n    @classmethod\n    def _build(cls):\n        return cls()\n',
+    'class B(Exception):\n    def __init__(self, msg):\n        super().__init__(msg)\n',
+    'for _ in range(3):\n    print(_)',
+    'x = {"a": 1}\nprint(getattr(x, "get")("a"))',
+    '# random._os is not real code here\nprint("typing.sys")',
+    'from typing import List, Dict\ndef f(xs: List[int]) -> Dict[str, int]:\n    return {"n": len(xs)}',
+    'from dataclasses import dataclass\n@dataclass\nclass P:\n    x: int\n    y: int = 0\n',
+    'import operator\nprint(operator.attrgetter("real")(3))',
+]
+
+
+@pytest.mark.parametrize('code', MODULE_ESCAPES + REFLECTION_ESCAPES + ANNOTATION_ESCAPES)
+def test_escapes_are_rejected(code):
+    safe, message = check_python_code(code)
+    assert not safe
+    assert message.startswith('Security Violation')
+
+
+@pytest.mark.parametrize('code', ALLOWED)
+def test_ordinary_code_is_allowed(code):
+    assert check_python_code(code) == (True, None)
+
+
+def test_judge_rejects_module_escape():
+    safe, message = validate_code_security('import random\nrandom._os.getcwd()', 'python')
+    assert not safe
+    assert '_os' in message
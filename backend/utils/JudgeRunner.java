@@ -0,0 +1,233 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+
+/**
+ * Persistent JVM that judges compiled Java submissions (started by utils/sandbox_pool.py).
+ *
+ * Request frame:  int timeoutMs, int stdoutLimit, int stderrLimit, bytes classDir, bytes stdin
+ * Response frame: int exitCode, bool timedOut, bool outputLimitExceeded, bool recycle,
+ *                 long cpuNanos, bytes stdout, bytes stderr
+ * where "bytes" is an int length followed by the raw bytes.
+ *
+ * Each job loads Main through a fresh classloader (so static state never
+ * leaks between jobs) and runs it on its own thread with System.in/out/err
+ * redirected to bounded in-memory buffers: stdout past its limit aborts the
+ * job with outputLimitExceeded, stderr past its limit is dropped. A job that
+ * times out, runs out of memory or leaves threads behind sets recycle and the
+ * JVM exits after answering.
+ * System.exit() in user code ends the JVM too; the Python side then re-runs
+ * the case in a fresh `java` process.
+ */
+public class JudgeRunner {
+
+    private static final long USER_STACK_BYTES = 256L * 1024 * 1024;
+    private static final PrintStream SINK = new PrintStream(new OutputStream() {
+        public void write(int b) {
+        }
+    });
+
+    public static void main(String[] args) throws IOException {
+        DataInputStream in = new DataInputStream(new BufferedInputStream(new FileInputStream(FileDescriptor.in)));
+        DataOutputStream out = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(FileDescriptor.out)));
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        System.setOut(SINK);
+        System.setErr(SINK);
+
+        while (true) {
+            int timeoutMs;
+            try {
+                timeoutMs = in.readInt();
+            } catch (EOFException e) {
+                return;
+            }
+            int stdoutLimit = in.readInt();
+            int stderrLimit = in.readInt();
+            String classDir = new String(readBytes(in), "UTF-8");
+            byte[] input = readBytes(in);
+
+            Job job = new Job(classDir, input, stdoutLimit, stderrLimit);
+            job.run(timeoutMs);
+
+            out.writeInt(job.exitCode);
+            out.writeBoolean(job.timedOut);
+            out.writeBoolean(job.stdout.exceeded);
+            out.writeBoolean(job.recycle);
+            out.writeLong(job.cpuNanos);
+            writeBytes(out, job.stdout.toByteArray());
+            writeBytes(out, job.stderr.toByteArray());
+            out.flush();
+
+            if (job.recycle) {
+                Runtime.getRuntime().halt(0);
+            }
+        }
+    }
+
+    private static byte[] readBytes(DataInputStream in) throws IOException {
+        byte[] data = new byte[in.readInt()];
+        in.readFully(data);
+        return data;
+    }
+
+    private static void writeBytes(DataOutputStream out, byte[] data) throws IOException {
+        out.writeInt(data.length);
+        out.write(data);
+    }
+
+    /** Thrown into user code once stdout passes its limit. */
+    private static final class OutputLimitExceeded extends Error {
+        OutputLimitExceeded() {
+            super("Output Limit Exceeded", null, false, false);
+        }
+    }
+
+    private static final class BoundedBuffer extends ByteArrayOutputStream {
+        private final int limit;
+        private final boolean abortOnOverflow;
+        volatile boolean exceeded = false;
+
+        BoundedBuffer(int limit, boolean abortOnOverflow) {
+            this.limit = limit;
+            this.abortOnOverflow = abortOnOverflow;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            write(new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            int room = limit - count;
+            if (len <= room) {
+                super.write(b, off, len);
+                return;
+            }
+            if (room > 0) {
+                super.write(b, off, room);
+            }
+            if (abortOnOverflow) {
+                exceeded = true;
+                throw new OutputLimitExceeded();
+            }
+        }
+    }
+
+    private static final class Job implements Runnable {
+        private final String classDir;
+        private final byte[] input;
+        final BoundedBuffer stdout;
+        final BoundedBuffer stderr;
+        volatile int exitCode = 0;
+        volatile long cpuNanos = -1;
+        boolean timedOut = false;
+        boolean recycle = false;
+
+        Job(String classDir, byte[] input, int stdoutLimit, int stderrLimit) {
+            this.classDir = classDir;
+            this.input = input;
+            this.stdout = new BoundedBuffer(stdoutLimit, true);
+            this.stderr = new BoundedBuffer(stderrLimit, false);
+        }
+
+        void run(int timeoutMs) {
+            PrintStream out;
+            PrintStream err;
+            try {
+                out = new PrintStream(stdout, false, "UTF-8");
+                err = new PrintStream(stderr, true, "UTF-8");
+            } catch (IOException e) {
+                throw new IllegalStateException(e);
+            }
+            System.setIn(new ByteArrayInputStream(input));
+            System.setOut(out);
+            System.setErr(err);
+
+            ThreadGroup group = new ThreadGroup("judge-job");
+            Thread thread = new Thread(group, this, "main", USER_STACK_BYTES);
+            thread.setDaemon(true);
+            thread.start();
+            try {
+                thread.join(timeoutMs);
+            } catch (InterruptedException e) {
+                Thread.currentThread().interrupt();
+            }
+
+            if (thread.isAlive()) {
+                timedOut = true;
+                recycle = true;
+                ThreadMXBean bean = ManagementFactory.getThreadMXBean();
+                cpuNanos = bean.getThreadCpuTime(thread.getId());
+            } else if (group.activeCount() > 0) {
+                // Threads started by the submission would keep running into the next job
+                recycle = true;
+            }
+
+            out.flush();
+            err.flush();
+            System.setIn(new ByteArrayInputStream(new byte[0]));
+            System.setOut(SINK);
+            System.setErr(SINK);
+        }
+
+        public void run() {
+            ThreadMXBean bean = ManagementFactory.getThreadMXBean();
+            URLClassLoader loader = null;
+            try {
+                URL[] urls = {new File(classDir).toURI().toURL()};
+                // Parent is the platform/extension loader: the runner's own classes stay invisible
+                loader = new URLClassLoader(urls, JudgeRunner.class.getClassLoader().getParent());
+                Class<?> main = Class.forName("Main", true, loader);
+                Method entry = main.getMethod("main", String[].class);
+                entry.invoke(null, (Object) new String[0]);
+            } catch (InvocationTargetException e) {
+                reportUncaught(e.getCause());
+            } catch (ClassNotFoundException | NoSuchMethodException | NoClassDefFoundError e) {
+                System.err.println("Error: Could not find or load main class Main");
+                exitCode = 1;
+            } catch (Throwable t) {
+                reportUncaught(t);
+            } finally {
+                System.out.flush();
+                cpuNanos = bean.getCurrentThreadCpuTime();
+                if (loader != null) {
+                    try {
+                        loader.close();
+                    } catch (IOException ignored) {
+                    }
+                }
+            }
+        }
+
+        private void reportUncaught(Throwable t) {
+            if (stdout.exceeded) {
+                exitCode = 1;
+                return;
+            }
+            System.err.print("Exception in thread \"main\" ");
+            t.printStackTrace(System.err);
+            exitCode = 1;
+            if (t instanceof OutOfMemoryError || t instanceof StackOverflowError) {
+                recycle = true;
+            }
+        }
+    }
+}
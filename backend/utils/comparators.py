@@ -0,0 +1,169 @@
+"""
+Output comparators, selectable per question (questions.comparator).
+
+- exact:      identical text, ignoring only CRLF and trailing whitespace at the end
+- whitespace: line-wise strip, blank lines dropped (the judge's historic rule, default)
+- token:      same whitespace-separated tokens, layout ignored
+- float:      like token, but numeric tokens match within FLOAT_ABS_EPS / FLOAT_REL_EPS
+- unordered:  same multiset of non-blank lines, in any order
+
+A comparator turns the expected output into a prepared form once
+(prepare_expected); match() then only does work on the participant's side.
+Prepared test-case sets are cached per (question, cases version, comparator).
+"""
+import logging
+import math
+import os
+import re
+from collections import Counter
+from itertools import zip_longest
+
+from utils.cache import TTLCache
+from utils.testcase_store import case_expected
+from utils.verdict_cache import cases_version
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+FLOAT_ABS_EPS = float(os.getenv('JUDGE_FLOAT_ABS_EPS', 1e-6))
+FLOAT_REL_EPS = float(os.getenv('JUDGE_FLOAT_REL_EPS', 1e-6))
+DEFAULT_COMPARATOR = 'whitespace'
+
+# Runs of characters between str.splitlines() boundaries
+LINE_RE = re.compile('[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]+')
+TOKEN_RE = re.compile(r'\S+')
+
+
+def significant_lines(s):
+    """Lazily yields the stripped, non-blank lines of s."""
+    for m in LINE_RE.finditer(s or ''):
+        line = m.group().strip()
+        if line:
+            yield line
+
+
+def tokens(s):
+    for m in TOKEN_RE.finditer(s or ''):
+        yield m.group()
+
+
+def _parse_float(token):
+    try:
+        value = float(token)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+class ExactComparator:
+    name = 'exact'
+
+    def prepare_expected(self, expected):
+        return expected.replace('\r\n', '\n').rstrip()
+
+    def match(self, actual, prepared):
+        return actual.replace('\r\n', '\n').rstrip() == prepared
+
+
+class WhitespaceComparator:
+    name = 'whitespace'
+
+    def prepare_expected(self, expected):
+        return list(significant_lines(expected))
+
+    def match(self, actual, prepared):
+        # Walks the participant's lines lazily and stops at the first difference
+        for a, b in zip_longest(significant_lines(actual), prepared):
+            if a != b:
+                return False
+        return True
+
+
+class TokenComparator:
+    name = 'token'
+
+    def prepare_expected(self, expected):
+        return list(tokens(expected))
+
+    def match(self, actual, prepared):
+        for a, b in zip_longest(tokens(actual), prepared):
+            if a != b:
+                return False
+        return True
+
+
+class FloatComparator:
+    name = 'float'
+
+    def prepare_expected(self, expected):
+        # (token, parsed float or None), parsed once per question
+        return [(t, _parse_float(t)) for t in tokens(expected)]
+
+    def match(self, actual, prepared):
+        for a, b in zip_longest(tokens(actual), prepared):
+            if a is None or b is None:
+                return False
+            token, value = b
+            if a == token:
+                continue
+            if value is None:
+                return False
+            got = _parse_float(a)
+            if got is None:
+                return False
+            if abs(got - value) > max(FLOAT_ABS_EPS, FLOAT_REL_EPS * abs(value)):
+                return False
+        return True
+
+
+class UnorderedComparator:
+    name = 'unordered'
+
+    def prepare_expected(self, expected):
+        return Counter(significant_lines(expected))
+
+    def match(self, actual, prepared):
+        return Counter(significant_lines(actual)) == prepared
+
+
+COMPARATORS = {c.name: c for c in (
+    ExactComparator(), WhitespaceComparator(), TokenComparator(), FloatComparator(), UnorderedComparator()
+)}
+
+prepared_cases_cache = TTLCache(1024, 3600)
+
+
+def get_comparator(name):
+    """Returns the comparator registered as `name` (the default for None/unknown)."""
+    if not name:
+        return COMPARATORS[DEFAULT_COMPARATOR]
+    comparator = COMPARATORS.get(str(name).lower())
+    if comparator is None:
+        logger.warning(f"Unknown comparator '{name}', using '{DEFAULT_COMPARATOR}'")
+        return COMPARATORS[DEFAULT_COMPARATOR]
+    return comparator
+
+
+def prepare_cases(cases, comparator, question_id=None, version=None):
+    """
+    Prepared expected outputs for a test-case set, in case order.
+    Cached per question so repeated runs/submits skip the expected-side work;
+    `version` is cases_version(cases) when the caller already has it.
+    Stored expected outputs (expected_ref) are read from the store here.
+    """
+    key = None
+    if question_id is not None:
+        key = (str(question_id), version or cases_version(cases), comparator.name)
+        prepared = prepared_cases_cache.get(key)
+        if prepared is not None:
+            return prepared
+    prepared = [comparator.prepare_expected(case_expected(case)) for case in cases]
+    if key is not None:
+        prepared_cases_cache.set(key, prepared)
+    return prepared
+
+
+def invalidate_question(question_id):
+    """Forget the prepared test cases of a question (after edit/delete)."""
+    qid = str(question_id)
+    return prepared_cases_cache.invalidate_where(lambda key: key[0] == qid)
@@ -0,0 +1,309 @@
+"""
+On-disk compile cache for C/C++/Java submissions.
+
+A build is keyed by (language, sha256(code), compiler flags), so all test cases
+of a submission and repeated Run clicks on identical code share one compiler
+invocation. Compile errors are cached too. Entries are evicted least-recently
+used once the cache grows past COMPILE_CACHE_MAX_MB. Each entry records its
+size in build.json; a process keeps a running total of the cache size and
+only lists the directory when that total crosses the limit, or every
+SIZE_RESCAN_SEC to pick up what other processes added or evicted.
+
+Entries are published with an atomic rename, so several gunicorn workers can
+share one cache directory safely. An entry in use is pinned with a lease file
+(.leases/<key>.<pid>) for as long as it is held; eviction skips entries that
+a live process holds.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+COMPILE_CACHE_DIR = os.getenv('COMPILE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'debug_marathon_build_cache'))
+COMPILE_CACHE_MAX_MB = int(os.getenv('COMPILE_CACHE_MAX_MB', 512))
+
+META_FILE = 'build.json'
+LEASE_DIR = '.leases'
+# Age of the running size total before it is recounted from the entries
+SIZE_RESCAN_SEC = 60
+# Eviction frees down to this share of the limit, so a full cache is not
+# rescanned on every miss
+EVICT_TARGET = 0.9
+
+
+def _dir_size(path):
+    size = 0
+    for dirpath, _, files in os.walk(path):
+        for fname in files:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, fname))
+            except OSError:
+                pass
+    return size
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class CompileCache:
+    """Thread-safe, size-bounded LRU cache of build directories."""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # key -> holders in this process; one lease file per (key, process)
+        self._holders = {}
+        self._holders_guard = threading.Lock()
+        # Running size total (None = recount) and the lock of the thread evicting
+        self._total = None
+        self._total_at = 0.0
+        self._size_guard = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lease_root = os.path.join(self.root, LEASE_DIR)
+        os.makedirs(self.lease_root, exist_ok=True)
+
+    @staticmethod
+    def make_key(language, code, flags):
+        h = hashlib.sha256()
+        for part in (language, ' '.join(flags), code):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _key_lock(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _load(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Touch for LRU ordering
+        try:
+            os.utime(os.path.join(entry_dir, META_FILE))
+        except OSError:
+            pass
+        meta['path'] = entry_dir
+        meta['key'] = os.path.basename(entry_dir)
+        return meta
+
+    def _lease_file(self, key):
+        return os.path.join(self.lease_root, f'{key}.{os.getpid()}')
+
+    def _pin(self, key):
+        with self._holders_guard:
+            count = self._holders.get(key, 0)
+            if count == 0:
+                open(self._lease_file(key), 'w').close()
+            self._holders[key] = count + 1
+
+    def _unpin(self, key):
+        with self._holders_guard:
+            count = self._holders.pop(key) - 1
+            if count:
+                self._holders[key] = count
+                return
+            try:
+                os.unlink(self._lease_file(key))
+            except OSError:
+                pass
+
+    def _held(self, key):
+        """True while some live process holds a lease on key; stale leases are removed."""
+        prefix = key + '.'
+        try:
+            names = os.listdir(self.lease_root)
+        except OSError:
+            return False
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+            try:
+                pid = int(name[len(prefix):])
+            except ValueError:
+                continue
+            if _pid_alive(pid):
+                return True
+            try:
+                os.unlink(os.path.join(self.lease_root, name))
+            except OSError:
+                pass
+        return False
+
+    def acquire(self, language, code, flags, build):
+        """
+        Returns the pinned entry {'ok': bool, 'output': compiler stderr,
+        'path': build dir, 'key'}; it is not evicted until release(entry).
+        `build(workdir)` compiles into workdir and returns (ok, output); it may
+        raise, in which case nothing is cached.
+        """
+        key = self.make_key(language, code, flags)
+        # Pinned before the lookup, so eviction either sees the lease or
+        # has already removed the entry (and it is built again below)
+        self._pin(key)
+        try:
+            return self._get_or_build(key, build)
+        except Exception:
+            self._unpin(key)
+            raise
+
+    def release(self, entry):
+        self._unpin(entry['key'])
+
+    @contextmanager
+    def lease(self, language, code, flags, build):
+        """acquire() for the duration of a with block."""
+        entry = self.acquire(language, code, flags, build)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def _get_or_build(self, key, build):
+        entry_dir = os.path.join(self.root, key)
+
+        meta = self._load(entry_dir)
+        if meta is not None:
+            self.hits += 1
+            return meta
+
+        with self._key_lock(key):
+            # Another thread may have built it while we waited
+            meta = self._load(entry_dir)
+            if meta is not None:
+                self.hits += 1
+                return meta
+
+            self.misses += 1
+            workdir = tempfile.mkdtemp(prefix='.build-', dir=self.root)
+            added = 0
+            try:
+                ok, output = build(workdir)
+                # The build output is all there is yet; build.json itself is a few bytes
+                size = _dir_size(workdir)
+                with open(os.path.join(workdir, META_FILE), 'w') as f:
+                    json.dump({'ok': ok, 'output': output, 'size': size}, f)
+                try:
+                    os.rename(workdir, entry_dir)
+                    added = size
+                except OSError:
+                    # Published concurrently by another process; keep theirs
+                    shutil.rmtree(workdir, ignore_errors=True)
+            except Exception:
+                shutil.rmtree(workdir, ignore_errors=True)
+                raise
+            finally:
+                with self._locks_guard:
+                    self._locks.pop(key, None)
+
+        self._evict(added)
+        return self._load(entry_dir) or {'ok': ok, 'output': output, 'path': entry_dir, 'key': key}
+
+    def _evict(self, added):
+        """Accounts for `added` new bytes and evicts LRU entries while over the limit."""
+        # One evicting thread per process is enough; the others just add their size
+        if not self._evict_lock.acquire(blocking=False):
+            with self._size_guard:
+                if self._total is not None:
+                    self._total += added
+            return
+        try:
+            with self._size_guard:
+                fresh = self._total is not None and time.monotonic() - self._total_at < SIZE_RESCAN_SEC
+                if fresh:
+                    self._total += added
+                    if self._total <= self.max_bytes:
+                        return
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                target = self.max_bytes * EVICT_TARGET
+                for used, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    if self._remove_unheld(path):
+                        total -= size
+                        logger.info(f"Compile cache evicted {os.path.basename(path)[:12]} ({size} bytes)")
+            with self._size_guard:
+                self._total = total
+                self._total_at = time.monotonic()
+        finally:
+            self._evict_lock.release()
+
+    def _scan(self):
+        """[(last used, size, path)] of every entry, sizes as recorded in build.json."""
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            if name.startswith('.'):
+                continue
+            path = os.path.join(self.root, name)
+            meta_path = os.path.join(path, META_FILE)
+            try:
+                used = os.path.getmtime(meta_path)
+            except OSError:
+                used = 0
+            try:
+                with open(meta_path) as f:
+                    size = int(json.load(f)['size'])
+            except (OSError, ValueError, KeyError, TypeError):
+                # Written before sizes were recorded
+                size = _dir_size(path)
+            entries.append((used, size, path))
+        return entries
+
+    def _remove_unheld(self, path):
+        """Deletes an entry nobody holds. Returns False if it is (or became) held."""
+        key = os.path.basename(path)
+        if self._held(key):
+            return False
+        # Unpublish first, then look again: a holder that pinned in between
+        # gets the entry back (or, if it was rebuilt meanwhile, that copy)
+        trash = tempfile.mkdtemp(prefix='.evict-', dir=self.root)
+        try:
+            os.rename(path, os.path.join(trash, key))
+        except OSError:
+            os.rmdir(trash)
+            return False
+        if self._held(key):
+            try:
+                os.rename(os.path.join(trash, key), path)
+                os.rmdir(trash)
+                return False
+            except OSError:
+                pass
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+compile_cache = CompileCache(COMPILE_CACHE_DIR, COMPILE_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,380 @@
+"""
+Warm container pool for EXECUTION_MODE='docker'.
+
+Each language has a pool of pre-started, network-less containers
+(`docker run -d --network none ... sleep infinity`). A submission is written
+into a per-code workspace inside a container, built there once (C/C++/Java),
+and every test case is a `docker exec` into a warm container, so judging
+never runs user code on the web host and capacity scales with the docker
+host(s) behind DOCKER_HOST.
+
+Workspaces are cached per container by code hash: a case that lands on a
+container which has not seen the submission yet simply builds it there too.
+
+Workspaces sharing a container are isolated from each other: each one gets
+its own uid/gid from DOCKER_WORKSPACE_UID_BASE up. The source is written and
+built by the container user (65534) into a directory of mode 0750 owned by
+that group, and the submission runs as the workspace uid: it can read and
+execute its own files, cannot change them, and cannot enter any other
+workspace. /work itself is writable by the container user only. When a
+workspace is evicted, its uid's leftover processes are killed before the
+uid is handed to the next submission.
+
+DOCKER_BACKEND=local swaps containers for LocalContainer, a plain subprocess
+stand-in with the same interface, for tests and machines without docker.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+from utils.sandbox import run_process, SANDBOX_MEMORY_LIMIT_MB
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+# 'docker' (real containers) or 'local' (subprocess stand-in)
+DOCKER_BACKEND = os.getenv('DOCKER_BACKEND', 'docker')
+DOCKER_BIN = os.getenv('DOCKER_BIN', 'docker')
+# Warm containers kept per language
+DOCKER_POOL_SIZE = int(os.getenv('DOCKER_POOL_SIZE', 2))
+# Recycle a container after this many executions
+DOCKER_CONTAINER_MAX_JOBS = int(os.getenv('DOCKER_CONTAINER_MAX_JOBS', 200))
+# Submission workspaces kept inside one container
+DOCKER_WORKSPACES_PER_CONTAINER = int(os.getenv('DOCKER_WORKSPACES_PER_CONTAINER', 32))
+# First of the DOCKER_WORKSPACES_PER_CONTAINER uids submissions run as
+DOCKER_WORKSPACE_UID_BASE = int(os.getenv('DOCKER_WORKSPACE_UID_BASE', 20000))
+DOCKER_CPUS = os.getenv('DOCKER_CPUS', '1')
+DOCKER_PIDS_LIMIT = int(os.getenv('DOCKER_PIDS_LIMIT', 64))
+
+# Extra time allowed for `docker exec` itself on top of the job timeout
+EXEC_GRACE_SEC = 3
+# Exit status of `timeout -s KILL` when the job ran out of time
+TIMEOUT_KILLED = 137
+# Owns /work and writes/builds the workspaces; never runs submitted code
+CONTAINER_UID = 65534
+
+LANGUAGE_SPECS = {
+    'python': {
+        'image': os.getenv('DOCKER_IMAGE_PYTHON', 'python:3.11-slim'),
+        'source': 'main.py',
+        'build': None,
+        'run': ['python3', '-u', 'main.py'],
+    },
+    'javascript': {
+        'image': os.getenv('DOCKER_IMAGE_NODE', 'node:20-slim'),
+        'source': 'main.js',
+        'build': None,
+        'run': ['node', f'--max-old-space-size={SANDBOX_MEMORY_LIMIT_MB or 256}', 'main.js'],
+    },
+    'c': {
+        'image': os.getenv('DOCKER_IMAGE_GCC', 'gcc:13'),
+        'source': 'main.c',
+        'build': ['gcc', 'main.c', '-o', 'main.exe'],
+        'run': ['./main.exe'],
+    },
+    'cpp': {
+        'image': os.getenv('DOCKER_IMAGE_GCC', 'gcc:13'),
+        'source': 'main.cpp',
+        'build': ['g++', 'main.cpp', '-o', 'main.exe'],
+        'run': ['./main.exe'],
+    },
+    'java': {
+        'image': os.getenv('DOCKER_IMAGE_JAVA', 'eclipse-temurin:17'),
+        'source': 'Main.java',
+        'build': ['javac', 'Main.java'],
+        'run': ['java', f'-Xmx{SANDBOX_MEMORY_LIMIT_MB or 256}m', '-cp', '.', 'Main'],
+    },
+}
+BUILD_TIMEOUT = {'c': 5, 'cpp': 5, 'java': 10}
+
+
+class ContainerError(Exception):
+    """The container could not be started or stopped answering; the job was not judged."""
+
+
+class DockerContainer:
+    """One warm, network-less container that runs jobs via `docker exec`."""
+
+    def __init__(self, language):
+        spec = LANGUAGE_SPECS[language]
+        self.jobs_done = 0
+        self.name = f"judge-{language}-{uuid.uuid4().hex[:10]}"
+        mem = f"{SANDBOX_MEMORY_LIMIT_MB or 256}m"
+        cmd = [
+            DOCKER_BIN, 'run', '-d', '--rm', '--name', self.name,
+            '--network', 'none',
+            '--read-only', '--tmpfs', f'/work:rw,exec,size=64m,uid={CONTAINER_UID},gid={CONTAINER_UID},mode=0755',
+            '--tmpfs', '/tmp:rw,size=16m',
+            '--memory', mem, '--memory-swap', mem,
+            '--cpus', DOCKER_CPUS, '--pids-limit', str(DOCKER_PIDS_LIMIT),
+            '--cap-drop', 'ALL', '--security-opt', 'no-new-privileges',
+            '--user', f'{CONTAINER_UID}:{CONTAINER_UID}', '--workdir', '/work',
+            spec['image'], 'sleep', 'infinity'
+        ]
+        try:
+            p = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ContainerError(f"docker run failed: {e}")
+        if p.returncode != 0:
+            raise ContainerError(f"docker run failed: {p.stderr.strip()}")
+        self.healthy = True
+
+    def exec(self, argv, input_str, timeout, cwd='.', user=None):
+        """
+        Runs argv inside the container (cwd relative to /work) as `user`
+        ('uid:gid', default the container user). Returns the raw sandbox result.
+        """
+        self.jobs_done += 1
+        cmd = [
+            DOCKER_BIN, 'exec', '-i', '-w', os.path.join('/work', cwd),
+            '-u', user or f'{CONTAINER_UID}:{CONTAINER_UID}', self.name,
+            'timeout', '-s', 'KILL', str(timeout), *argv
+        ]
+        try:
+            result = run_process(cmd, input_str, timeout + EXEC_GRACE_SEC, 'docker')
+        except OSError as e:
+            self.healthy = False
+            raise ContainerError(f"docker exec failed: {e}")
+        if result['timed_out']:
+            # The docker client hung; the container state is unknown
+            self.healthy = False
+        elif result['returncode'] == TIMEOUT_KILLED:
+            result['timed_out'] = True
+        # rusage of the docker client says nothing about the job
+        result['cpu_time'] = result['memory_kb'] = None
+        return result
+
+    def write_file(self, path, content, user=None):
+        # umask 027: the group (the workspace's) may read, nobody else
+        result = self.exec(
+            ['sh', '-c', 'umask 027 && mkdir -p "$(dirname "$1")" && cat > "$1"', 'sh', path],
+            content, EXEC_GRACE_SEC, user=user
+        )
+        if result['returncode'] != 0:
+            self.healthy = False
+            raise ContainerError(f"could not write {path}: {result['stderr'].strip()}")
+
+    def kill_user(self, user):
+        """Kills every process left behind by `user` (e.g. a job's background children)."""
+        self.exec(['sh', '-c', 'kill -9 -1'], '', EXEC_GRACE_SEC, user=user)
+
+    def remove(self, path):
+        self.exec(['rm', '-rf', path], '', EXEC_GRACE_SEC)
+
+    def is_alive(self):
+        return self.healthy
+
+    def close(self):
+        try:
+            subprocess.run([DOCKER_BIN, 'rm', '-f', self.name], capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+class LocalContainer:
+    """Subprocess stand-in for DockerContainer: same interface, a temp dir instead of /work."""
+
+    def __init__(self, language):
+        self.language = language
+        self.jobs_done = 0
+        self.root = tempfile.mkdtemp(prefix=f'judge-{language}-')
+
+    def exec(self, argv, input_str, timeout, cwd='.', user=None):
+        # Runs as the backend's own user: `user` is only honoured by DockerContainer
+        self.jobs_done += 1
+        if argv[0].startswith('./'):
+            argv = [os.path.join(self.root, cwd, argv[0][2:]), *argv[1:]]
+        elif argv[0] == 'python3':
+            argv = ['python', *argv[1:]]
+        try:
+            return run_process(argv, input_str, timeout, self.language, cwd=os.path.join(self.root, cwd))
+        except FileNotFoundError as e:
+            # Same status `docker exec` reports for a missing executable
+            return {'returncode': 127, 'stdout': '', 'stderr': str(e), 'timed_out': False,
+                    'output_limit_exceeded': False, 'cpu_time': None, 'memory_kb': None}
+
+    def write_file(self, path, content, user=None):
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w') as f:
+            f.write(content)
+
+    def kill_user(self, user):
+        pass
+
+    def remove(self, path):
+        shutil.rmtree(os.path.join(self.root, path), ignore_errors=True)
+
+    def is_alive(self):
+        return os.path.isdir(self.root)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+CONTAINER_BACKENDS = {
+    'docker': DockerContainer,
+    'local': LocalContainer,
+}
+
+
+class WarmContainer:
+    """A pooled container plus the submission workspaces already built in it."""
+
+    def __init__(self, language):
+        self.language = language
+        self.spec = LANGUAGE_SPECS[language]
+        self.box = CONTAINER_BACKENDS[DOCKER_BACKEND](language)
+        # code hash -> (workspace uid, build result), in LRU order
+        self.workspaces = OrderedDict()
+        self._free_uids = list(range(DOCKER_WORKSPACE_UID_BASE,
+                                     DOCKER_WORKSPACE_UID_BASE + DOCKER_WORKSPACES_PER_CONTAINER))
+
+    def ensure_workspace(self, code_hash, code):
+        """Writes (and builds) the submission once per container. Returns the build result or None."""
+        if code_hash in self.workspaces:
+            self.workspaces.move_to_end(code_hash)
+            return self.workspaces[code_hash][1]
+
+        if not self._free_uids:
+            self._evict()
+        uid = self._free_uids.pop()
+        # Written and built by the container user with the workspace's group
+        builder = f"{CONTAINER_UID}:{uid}"
+        self.box.write_file(f"{code_hash}/{self.spec['source']}", code, user=builder)
+        build = None
+        if self.spec['build']:
+            build = self.box.exec(['sh', '-c', 'umask 027 && exec "$@"', 'sh', *self.spec['build']], '',
+                                  BUILD_TIMEOUT.get(self.language, 10), cwd=code_hash, user=builder)
+        self.workspaces[code_hash] = (uid, build)
+        return build
+
+    def _evict(self):
+        old_hash, (uid, _) = self.workspaces.popitem(last=False)
+        self.box.kill_user(f"{uid}:{uid}")
+        self.box.remove(old_hash)
+        self._free_uids.append(uid)
+
+    def run(self, code_hash, input_str, timeout):
+        uid = self.workspaces[code_hash][0]
+        return self.box.exec(self.spec['run'], input_str, timeout, cwd=code_hash, user=f"{uid}:{uid}")
+
+
+class ContainerPool:
+    """Keeps up to `size` idle warm containers for one language."""
+
+    def __init__(self, language, size):
+        self.language = language
+        self.size = size
+        self._idle = queue.Queue()
+        self._closed = False
+        # Started ahead of the first job; docker run is slow, so in the
+        # background rather than blocking startup for every language
+        for _ in range(size):
+            self._spawn_async()
+
+    def _new(self):
+        try:
+            return WarmContainer(self.language)
+        except (ContainerError, OSError) as e:
+            raise ContainerError(f"Could not start {self.language} container: {e}")
+
+    def _spawn(self):
+        try:
+            container = self._new()
+        except ContainerError as e:
+            logger.warning(str(e))
+            return
+        if self._closed or self._idle.qsize() >= self.size:
+            container.box.close()
+            return
+        self._idle.put(container)
+
+    def _spawn_async(self):
+        threading.Thread(target=self._spawn, name=f"container-start-{self.language}", daemon=True).start()
+
+    def _acquire(self):
+        while True:
+            try:
+                container = self._idle.get_nowait()
+            except queue.Empty:
+                # Pool drained by a burst: start one on demand
+                return self._new()
+            if container.box.is_alive():
+                return container
+            container.box.close()
+            self._spawn_async()
+
+    def _release(self, container, healthy):
+        if (not self._closed and healthy and container.box.is_alive()
+                and container.box.jobs_done < DOCKER_CONTAINER_MAX_JOBS
+                and self._idle.qsize() < self.size):
+            self._idle.put(container)
+            return
+        threading.Thread(target=container.box.close, daemon=True).start()
+        if not self._closed and self._idle.qsize() < self.size:
+            # Replace the recycled container before the next job needs it
+            self._spawn_async()
+
+    def use(self, fn):
+        """Calls fn(container) with a leased container. ContainerError marks it unhealthy."""
+        container = self._acquire()
+        healthy = False
+        try:
+            result = fn(container)
+            healthy = True
+            return result
+        finally:
+            self._release(container, healthy)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().box.close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_container_pool(language):
+    """Returns the container pool for `language`, or None if it is unsupported."""
+    if language == 'node':
+        language = 'javascript'
+    if language not in LANGUAGE_SPECS:
+        return None
+    with _pools_lock:
+        pool = _pools.get(language)
+        if pool is None:
+            pool = ContainerPool(language, DOCKER_POOL_SIZE)
+            _pools[language] = pool
+        return pool
+
+
+def start_container_pools():
+    """Builds every language's pool, so its containers start before the first submission."""
+    for language in LANGUAGE_SPECS:
+        get_container_pool(language)
+
+
+def code_hash(language, code):
+    return hashlib.sha256(f"{language}\0{code}".encode('utf-8')).hexdigest()[:20]
+
+
+@atexit.register
+def shutdown_container_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -3,9 +3,48 @@ import logging
 import json
 from datetime import datetime, timedelta
 from db_connection import db_manager
+from utils.comparators import COMPARATORS, DEFAULT_COMPARATOR
+from utils.testcase_store import validate_cases
 
 logger = logging.getLogger(__name__)
 
+QUESTION_INSERT = """
+    INSERT INTO questions 
+    (round_id, question_number, question_title, question_description, expected_output, buggy_code, difficulty_level, points, test_cases, test_input, comparator)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def _question_fields(allowed_lang, data):
+    """
+    Validated QUESTION_INSERT values after (round_id, question_number).
+    Raises ValueError for bad test cases or an unknown comparator.
+    """
+    points = data.get('points', 20)
+    validate_cases(data.get('test_cases'))
+    test_cases = json.dumps(data.get('test_cases', []))
+    difficulty = data.get('difficulty', 'Level 1')
+    comparator = (data.get('comparator') or DEFAULT_COMPARATOR).lower()
+    if comparator not in COMPARATORS:
+        raise ValueError(f"Unknown comparator '{comparator}'. Use one of: {', '.join(COMPARATORS)}")
+
+    boilerplate_raw = data.get('boilerplate', {})
+    if isinstance(boilerplate_raw, dict):
+        boilerplate = boilerplate_raw.get(allowed_lang, '') or boilerplate_raw.get('python', '')
+    else:
+        boilerplate = str(boilerplate_raw)
+
+    return (
+        data.get('title'), 
+        data.get('description', ''), 
+        data.get('expected_output'),
+        boilerplate, 
+        difficulty, 
+        points, 
+        test_cases,
+        data.get('test_input') or data.get('input') or data.get('expected_input'),
+        comparator
+    )
+
 def create_question_logic(contest_id, round_number, data):
     """
     Core logic to create a question.
@@ -25,17 +64,8 @@ def create_question_logic(contest_id, round_number, data):
         if dup_check:
             raise ValueError(f"Question '{title}' already exists in Level {round_number}.")
         
-        q_query = """
-            INSERT INTO questions 
-            (round_id, question_number, question_title, question_description, expected_output, buggy_code, difficulty_level, points, test_cases, test_input)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        points = data.get('points', 20)
-        test_cases = json.dumps(data.get('test_cases', []))
-        difficulty = data.get('difficulty', 'Level 1')
-        
         allowed_lang = r_res[0].get('allowed_language') or data.get('language', 'python')
+        fields = _question_fields(allowed_lang, data)
         time_limit = data.get('time_limit')
         
         if time_limit and int(time_limit) > 0:
@@ -48,23 +78,7 @@ def create_question_logic(contest_id, round_number, data):
         count_res = db_manager.execute_query(count_query, (round_id,))
         next_num = (count_res[0]['max_num'] or 0) + 1
         
-        boilerplate_raw = data.get('boilerplate', {})
-        if isinstance(boilerplate_raw, dict):
-            boilerplate = boilerplate_raw.get(allowed_lang, '') or boilerplate_raw.get('python', '')
-        else:
-            boilerplate = str(boilerplate_raw)
-        
-        res = db_manager.execute_update(q_query, (
-            round_id, next_num, 
-            title, 
-            data.get('description', ''), 
-            data.get('expected_output'),
-            boilerplate, 
-            difficulty, 
-            points, 
-            test_cases,
-            data.get('test_input') or data.get('input') or data.get('expected_input')
-        ))
+        res = db_manager.execute_update(QUESTION_INSERT, (round_id, next_num) + fields)
         
         if not res:
             logger.error(f"DB Insert Failed for Question: {title}")
@@ -76,6 +90,91 @@ def create_question_logic(contest_id, round_number, data):
         logger.error(f"Create Question Logic Error: {e}")
         raise e
 
+def create_questions_bulk_logic(contest_id, items):
+    """
+    create_question_logic() for many questions: items is [(round_number, data), ...].
+    Each round is looked up once (its id, language, titles and last question
+    number) and every valid question is inserted with a single execute_many.
+    If that batch fails (nothing is applied), the questions are inserted one
+    by one, so a bad row only rejects itself, as with create_question_logic.
+    Returns (count, errors), one "Title ...: reason" error per rejected question.
+    """
+    rounds = {}
+    valid = []  # (title, round, fields) in upload order
+    time_limits = {}
+    errors = []
+
+    for round_number, data in items:
+        title = data.get('title')
+        try:
+            if round_number not in rounds:
+                r_res = db_manager.execute_query(
+                    "SELECT round_id, allowed_language FROM rounds WHERE contest_id=%s AND round_number=%s",
+                    (contest_id, round_number)
+                )
+                rnd = None
+                if r_res:
+                    existing = db_manager.execute_query(
+                        "SELECT question_title, question_number FROM questions WHERE round_id=%s", (r_res[0]['round_id'],)
+                    ) or []
+                    rnd = {
+                        'round_id': r_res[0]['round_id'],
+                        'allowed_language': r_res[0].get('allowed_language'),
+                        'titles': {q['question_title'] for q in existing},
+                        'first_num': max((q['question_number'] or 0 for q in existing), default=0) + 1
+                    }
+                rounds[round_number] = rnd
+            rnd = rounds[round_number]
+            if rnd is None:
+                raise ValueError(f"Round {round_number} for Contest {contest_id} not found.")
+
+            # Duplicate Check (also against earlier questions in this upload)
+            if title in rnd['titles']:
+                raise ValueError(f"Question '{title}' already exists in Level {round_number}.")
+
+            allowed_lang = rnd['allowed_language'] or data.get('language', 'python')
+            fields = _question_fields(allowed_lang, data)
+            time_limit = data.get('time_limit')
+            if time_limit and int(time_limit) > 0:
+                time_limits[rnd['round_id']] = int(time_limit)
+        except Exception as e:
+            errors.append(f"Title {title}: {str(e)}")
+            continue
+
+        rnd['titles'].add(title)
+        valid.append((title, rnd, fields))
+
+    for round_id, time_limit in time_limits.items():
+        db_manager.execute_update(
+            "UPDATE rounds SET time_limit_minutes=%s WHERE round_id=%s",
+            (time_limit, round_id)
+        )
+    if not valid:
+        return 0, errors
+
+    # Consecutive question numbers per round, after its existing questions
+    next_num = {}
+    rows = []
+    for title, rnd, fields in valid:
+        num = next_num.get(rnd['round_id'], rnd['first_num'])
+        next_num[rnd['round_id']] = num + 1
+        rows.append((rnd['round_id'], num) + fields)
+    if db_manager.execute_many(QUESTION_INSERT, rows):
+        return len(rows), errors
+
+    logger.warning(f"Batched insert of {len(rows)} questions failed, inserting them one by one")
+    next_num = {}
+    count = 0
+    for title, rnd, fields in valid:
+        num = next_num.get(rnd['round_id'], rnd['first_num'])
+        if db_manager.execute_update(QUESTION_INSERT, (rnd['round_id'], num) + fields):
+            next_num[rnd['round_id']] = num + 1
+            count += 1
+        else:
+            logger.error(f"DB Insert Failed for Question: {title}")
+            errors.append(f"Title {title}: Failed to insert question into database.")
+    return count, errors
+
 def activate_level_logic(contest_id, level, wait_time=0):
     start_time = datetime.utcnow()
     if wait_time > 0:
@@ -0,0 +1,79 @@
+"""
+Global core scheduler for the judge.
+
+Every sandboxed execution (one test case, one compilation) holds a core slot
+while it runs, and there are JUDGE_CORES slots per backend process. When a
+slot frees up it goes to the waiting owner (participant) that currently holds
+the fewest slots, FIFO among equals, so a participant whose submission has
+many cases in flight cannot starve the others: a fresh submitter gets the
+next free core ahead of someone who is already running on several.
+"""
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# === CONFIGURATION ===
+JUDGE_CORES = int(os.getenv('JUDGE_CORES', 0)) or os.cpu_count() or 1
+
+
+class CoreScheduler:
+    """Fair counting semaphore keyed by owner."""
+
+    def __init__(self, cores):
+        self.cores = cores
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._held = {}       # owner -> slots currently held
+        self._waiting = []    # [(seq, owner)] in arrival order
+        self._seq = itertools.count()
+        self._granted = 0
+        self._wait_total = 0.0
+
+    def _next_waiter(self):
+        # Fewest held slots first, then longest waiting
+        return min(self._waiting, key=lambda w: (self._held.get(w[1], 0), w[0]))
+
+    @contextmanager
+    def slot(self, owner=None):
+        """Holds one core for the duration of the with-block."""
+        entry = (next(self._seq), owner)
+        start = time.monotonic()
+        with self._cond:
+            self._waiting.append(entry)
+            try:
+                while self._in_use >= self.cores or self._next_waiter() is not entry:
+                    self._cond.wait()
+            finally:
+                self._waiting.remove(entry)
+                # Granted or not (the wait may raise), the head of the queue
+                # changed: the next waiter may be eligible if cores are free
+                self._cond.notify_all()
+            self._in_use += 1
+            self._held[owner] = self._held.get(owner, 0) + 1
+            self._granted += 1
+            self._wait_total += time.monotonic() - start
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                self._held[owner] -= 1
+                if not self._held[owner]:
+                    del self._held[owner]
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'cores': self.cores,
+                'in_use': self._in_use,
+                'waiting': len(self._waiting),
+                'owners_running': len(self._held),
+                'granted': self._granted,
+                'avg_wait_ms': round(self._wait_total * 1000 / self._granted, 2) if self._granted else 0.0
+            }
+
+
+core_scheduler = CoreScheduler(JUDGE_CORES)
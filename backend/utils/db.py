@@ -11,12 +11,27 @@ class MySQLBridge:
     def table(self, table_name):
         return MySQLTable(table_name)
     
-    def execute_query(self, query, params=None):
-        return db_manager.execute_query(query, params)
+    def execute_query(self, query, params=None, read_only=False):
+        return db_manager.execute_query(query, params, read_only)
 
     def execute_update(self, query, params=None):
         return db_manager.execute_update(query, params)
 
+    def execute_many(self, query, params_seq):
+        return db_manager.execute_many(query, params_seq)
+
+    def bulk_insert(self, table, columns, rows, on_conflict=None):
+        return db_manager.bulk_insert(table, columns, rows, on_conflict)
+
+    def execute_named(self, name, params=None, read_only=False):
+        return db_manager.execute_named(name, params, read_only)
+
+    def transaction(self):
+        return db_manager.transaction()
+
+    def batch(self, transaction=False):
+        return db_manager.batch(transaction)
+
 class MySQLTable:
     def __init__(self, table_name):
         self.table_name = table_name
@@ -0,0 +1,214 @@
+"""
+Queries and response builders for the hottest read endpoints
+(participant-state, leaderboard, questions).
+
+The Flask routes and the async handlers in asgi.py share them, so both
+execution paths return the same payloads; a route only decides how the
+queries are run (sync pool in one pipeline, or the async pool).
+"""
+import datetime
+import json
+
+# === PARTICIPANT STATE ===
+
+def participant_state_plan(uid, contest_id, proctor_id):
+    """Independent hot queries behind participant-state, as {key: (name, params)}."""
+    return {
+        'level': ('latest_level_stats', (uid, contest_id)),
+        'rounds': ('round_statuses', (contest_id,)),
+        'active': ('active_round', (contest_id,)),
+        'countdown': ('admin_state_value', (f"contest_{contest_id}_countdown",)),
+        'proctoring': ('proctoring_status', (proctor_id, contest_id)),
+        'solved': ('solved_question_ids', (uid, contest_id)),
+    }
+
+
+def default_level_duration(level):
+    """Minutes per level when the round has no time limit set."""
+    if level <= 3: return 20
+    if level == 4: return 30
+    if level == 5: return 45
+    return 45
+
+
+def format_utc(dt):
+    """Strict UTC with Z to prevent browser drift (naive DB values are UTC)."""
+    if not dt: return None
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def build_participant_state(results):
+    """participant-state payload from the participant_state_plan results."""
+    res = results['level']
+
+    # Round Statuses (Single Source of Truth)
+    rounds_res = results['rounds'] or []
+    rounds_map = {r['round_number']: r['status'] for r in rounds_res}
+    if rounds_map.get(1) == 'pending' or 1 not in rounds_map:
+         rounds_map[1] = 'active'
+
+    # Global Active Level
+    gl_res = results['active']
+    global_active_level = gl_res[0]['round_number'] if gl_res else 1
+
+    current_state = res[0] if res else None
+
+    # CLAMP: Ensure user cannot be ahead of the global active round
+    if current_state and current_state['level'] > global_active_level:
+        current_state['level'] = global_active_level
+        # Reset status for this view to avoid confusion
+        current_state['status'] = 'NOT_STARTED' # Force them to 'enter' again if needed
+
+    # 1. TOTAL Violations and Disqualification Status
+    p_res = results['proctoring']
+    total_violations = 0
+    is_disqualified_state = False
+    disq_reason = None
+    if p_res:
+         total_violations = p_res[0]['total_violations'] if p_res[0]['total_violations'] is not None else 0
+         is_disqualified_state = bool(p_res[0]['is_disqualified'])
+         disq_reason = p_res[0]['disqualification_reason']
+
+    # 2. Duration (With Strict Defaults + Admin Override)
+    level_duration = default_level_duration(current_state['level'] if current_state else 1)
+    if current_state:
+        time_limits = {r['round_number']: r.get('time_limit_minutes') for r in rounds_res}
+        time_limit = time_limits.get(current_state['level'])
+        if time_limit and time_limit > 0:
+             level_duration = time_limit
+
+    # 3. Decode Countdown State
+    countdown_data = {'active': False}
+    cd_res = results['countdown']
+    if cd_res:
+         try:
+             countdown_data = json.loads(cd_res[0]['value'])
+         except: pass
+
+    # 4. Solved Question IDs
+    s_res = results['solved']
+    solved_ids = [str(r['question_id']) for r in s_res] if s_res else []
+
+    return {
+        'success': True,
+        'level': current_state['level'] if current_state else 1,
+        'level_duration_minutes': level_duration,
+        'violations': total_violations,
+        'solved': current_state['questions_solved'] if current_state else 0,
+        'solved_ids': solved_ids,
+        'status': current_state['status'] or 'NOT_STARTED' if current_state else 'NOT_STARTED',
+        'start_time': format_utc(current_state['start_time']) if current_state else None,
+        'global_level': global_active_level,
+        'global_level_status': 'active',
+        'rounds_map': rounds_map,
+        'countdown': countdown_data,
+        'is_eliminated': is_disqualified_state,
+        'disqualification_reason': disq_reason
+    }
+
+
+# === LEADERBOARD ===
+
+LEADERBOARD_QUERY = """
+    SELECT
+        u.username as participant_id,
+        u.full_name,
+        u.department,
+        u.college,
+        pls.level_score as total_score,
+        pls.questions_solved,
+        pls.status,
+        pls.start_time,
+        pls.completed_at,
+        TIMESTAMPDIFF(SECOND, pls.start_time, pls.completed_at) as time_taken_sec
+    FROM participant_level_stats pls
+    JOIN users u ON pls.user_id = u.user_id
+    WHERE u.role = 'participant' AND pls.level = %s
+    ORDER BY pls.level_score DESC,
+             CASE WHEN pls.status = 'COMPLETED' THEN 0 ELSE 1 END ASC,
+             time_taken_sec ASC
+"""
+
+
+def build_leaderboard(res, level):
+    data = []
+    if res:
+        for idx, row in enumerate(res):
+            # Format time
+            seconds = row.get('time_taken_sec')
+            if seconds is not None:
+                m, s = divmod(int(seconds), 60)
+                h, m = divmod(m, 60)
+                time_str = "{:02d}:{:02d}:{:02d}".format(h, m, s)
+            else:
+                # Leaderboard shows finalized time only: -- for incomplete
+                time_str = "--:--:--"
+
+            data.append({
+                'id': row['participant_id'],
+                'rank': idx + 1,
+                'name': row['full_name'],
+                'department': row.get('department'),
+                'college': row.get('college'),
+                'score': float(row['total_score']),
+                'time': time_str,
+                'solved': row['questions_solved'],
+                'status': row['status']
+            })
+
+    return {
+        "leaderboard": data,
+        "level": level,
+        "generated_at": datetime.datetime.utcnow().isoformat()
+    }
+
+
+# === QUESTIONS ===
+
+def needs_live_contest(contest_id):
+    """True when the client did not send a usable contest_id (use the LIVE one)."""
+    return not contest_id or contest_id == 'null' or contest_id == 'undefined'
+
+
+# Round Config strictly first (for Language)
+QUESTIONS_ROUND_QUERY = "SELECT allowed_language, time_limit_minutes FROM rounds WHERE contest_id=%s AND round_number=%s"
+
+QUESTIONS_QUERY = """
+    SELECT q.*, r.round_number
+    FROM questions q
+    JOIN rounds r ON q.round_id = r.round_id
+    WHERE r.contest_id = %s AND r.round_number = %s
+    ORDER BY q.question_number ASC
+"""
+
+
+def build_questions(r_res, res):
+    allowed_lang = 'python' # Global Default
+    if r_res and r_res[0].get('allowed_language'):
+        allowed_lang = r_res[0]['allowed_language']
+
+    questions = []
+    for q in res or []:
+        # Construct useful object for frontend
+        tcs = []
+        try:
+            if q['test_cases']: tcs = json.loads(q['test_cases'])
+        except: pass
+
+        # Ensure only buggy_code is sent, NO expected code or hidden details
+        questions.append({
+            'id': q['question_id'],
+            'round_number': q['round_number'],
+            'number': q['question_number'],
+            'title': q['question_title'],
+            'description': q.get('question_description', ''),
+            'expected_output': q.get('expected_output'),
+            'buggy_code': q['buggy_code'], # Send directly
+            'boilerplate': {allowed_lang: q['buggy_code']}, # Use correct lang key
+            'test_cases': tcs,
+            'difficulty': q['difficulty_level'],
+            # Strictly follow Round language
+            'allowed_language': allowed_lang
+        })
+
+    return {'questions': questions, 'allowed_language': allowed_lang}
@@ -0,0 +1,312 @@
+"""
+Fair-share judge queue.
+
+Every execution - asynchronous submissions and the synchronous Run button -
+goes through this queue and is executed by a bounded pool of worker threads,
+so a slow compile/run no longer pins a web worker and a participant spamming
+Run cannot take more than their share of the judge:
+
+- jobs wait in per-participant queues, served round-robin;
+- a participant has at most JUDGE_MAX_INFLIGHT_PER_USER submissions (and as
+  many runs) executing and JUDGE_MAX_QUEUED_PER_USER of each waiting, beyond
+  which submit/run is rejected with a Retry-After hint; the two kinds are
+  counted apart, so a participant's Run is not held up by their own Submit;
+- submissions are dispatched before runs, except that a run which has waited
+  JUDGE_RUN_AGING_SEC is promoted so runs are never starved completely.
+
+Job state is kept in memory for JUDGE_RESULT_TTL seconds after completion so
+clients can poll GET /api/contest/jobs/<id> when the Socket.IO push is missed.
+stats() exposes queue depth and wait times per kind and per level.
+
+The workers must be real threads: a job blocks in subprocess pipes, wait4()
+and CPU-bound checks. Under the eventlet Procfile command they are green
+threads, and one running job stalls every request of that gunicorn worker.
+Judge under a threaded server (the ASGI entrypoint, or gunicorn
+--worker-class gthread); a warning is logged when started monkey-patched.
+"""
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+JUDGE_WORKERS = int(os.getenv('JUDGE_WORKERS', 4))
+JUDGE_QUEUE_MAX_DEPTH = int(os.getenv('JUDGE_QUEUE_MAX_DEPTH', 200))
+JUDGE_RESULT_TTL = int(os.getenv('JUDGE_RESULT_TTL', 600))
+JUDGE_MAX_INFLIGHT_PER_USER = int(os.getenv('JUDGE_MAX_INFLIGHT_PER_USER', 1))
+JUDGE_MAX_QUEUED_PER_USER = int(os.getenv('JUDGE_MAX_QUEUED_PER_USER', 5))
+JUDGE_RUN_AGING_SEC = float(os.getenv('JUDGE_RUN_AGING_SEC', 5))
+# How long a synchronous run may wait for a worker before it is rejected
+JUDGE_RUN_MAX_WAIT_SEC = float(os.getenv('JUDGE_RUN_MAX_WAIT_SEC', 30))
+
+# Dispatch order; runs can overtake submissions only through aging
+KINDS = ('submit', 'run')
+WAIT_SAMPLES = 500
+
+
+class JudgeQueueFull(Exception):
+    """Raised when the queue (or the caller's share of it) is at capacity; carries a retry hint in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Judge queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JudgeQueue:
+    """Per-owner round-robin queues of judge jobs consumed by a fixed pool of worker threads."""
+
+    def __init__(self, workers, max_depth, result_ttl, max_inflight_per_user=1, max_queued_per_user=5,
+                 run_aging=5.0):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.max_inflight_per_user = max(1, max_inflight_per_user)
+        self.max_queued_per_user = max(1, max_queued_per_user)
+        self.run_aging = run_aging
+        self._queues = {kind: OrderedDict() for kind in KINDS}   # kind -> owner -> deque of jobs
+        self._queued = {}       # (kind, owner) -> jobs waiting
+        self._inflight = {}     # (kind, owner) -> jobs executing
+        self._depth = 0
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._started = False
+        # Moving average of job run time, used for the Retry-After hint
+        self._avg_duration = 1.0
+        self._waits = {kind: deque(maxlen=WAIT_SAMPLES) for kind in KINDS}
+        self._counters = {'completed': 0, 'failed': 0, 'rejected': 0, 'expired': 0}
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._started:
+                return
+            patcher = sys.modules.get('eventlet.patcher')
+            if patcher is not None and patcher.is_monkey_patched('thread'):
+                logger.warning("Judge workers are eventlet green threads: a running job blocks this "
+                               "server process. Use a threaded worker class for judging.")
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f"judge-worker-{i}", daemon=True)
+                t.start()
+            self._started = True
+
+    def _enqueue(self, fn, args, owner, kind, level, on_complete):
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'kind': kind,
+            'owner': owner,
+            'level': level,
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        entry = (job, fn, args, on_complete)
+        with self._cond:
+            # Per kind, so a participant with queued runs can still submit
+            if self._depth >= self.max_depth or self._queued.get((kind, owner), 0) >= self.max_queued_per_user:
+                self._counters['rejected'] += 1
+                raise JudgeQueueFull(self.retry_after())
+            self._queues[kind].setdefault(owner, deque()).append(entry)
+            self._queued[(kind, owner)] = self._queued.get((kind, owner), 0) + 1
+            self._depth += 1
+            if kind == 'submit':
+                self._jobs[job['job_id']] = job
+            self._cond.notify()
+        return job
+
+    def submit(self, fn, *args, owner=None, on_complete=None, kind='submit', level=None):
+        """
+        Enqueue fn(*args). Returns the job id, or raises JudgeQueueFull.
+        on_complete(job) is called from the worker thread once the job finished.
+        """
+        self._ensure_started()
+        self._prune()
+        return self._enqueue(fn, args, owner, kind, level, on_complete)['job_id']
+
+    def run(self, fn, *args, owner=None, level=None):
+        """
+        Runs fn(*args) as a 'run' job and blocks until it is done; returns its
+        result or re-raises its exception. Raises JudgeQueueFull when the job
+        is rejected or not picked up within JUDGE_RUN_MAX_WAIT_SEC.
+        """
+        self._ensure_started()
+        done = threading.Event()
+        outcome = {}
+
+        def on_complete(job):
+            outcome['job'] = job
+            done.set()
+
+        job = self._enqueue(self._capture(fn, outcome), args, owner, 'run', level, on_complete)
+        if not done.wait(JUDGE_RUN_MAX_WAIT_SEC) and self._withdraw(job):
+            raise JudgeQueueFull(self.retry_after())
+        done.wait()
+        if 'exception' in outcome:
+            raise outcome['exception']
+        return outcome['job']['result']
+
+    @staticmethod
+    def _capture(fn, outcome):
+        def call(*args):
+            try:
+                return fn(*args)
+            except Exception as e:
+                outcome['exception'] = e
+                raise
+        return call
+
+    def _withdraw(self, job):
+        """Removes a job that is still waiting; False if a worker already took it."""
+        with self._cond:
+            if job['status'] != 'queued':
+                return False
+            jobs = self._queues[job['kind']].get(job['owner'])
+            for entry in jobs or ():
+                if entry[0] is job:
+                    jobs.remove(entry)
+                    break
+            if jobs is not None and not jobs:
+                del self._queues[job['kind']][job['owner']]
+            self._release_queued(job['kind'], job['owner'])
+            self._counters['expired'] += 1
+            return True
+
+    def _release_queued(self, kind, owner):
+        self._depth -= 1
+        self._queued[(kind, owner)] -= 1
+        if not self._queued[(kind, owner)]:
+            del self._queued[(kind, owner)]
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def depth(self):
+        return self._depth
+
+    def retry_after(self):
+        """Rough seconds until a queue slot frees up."""
+        waves = self.depth() / max(self.workers, 1)
+        return max(1, int(waves * self._avg_duration + 0.5))
+
+    def _kind_order(self):
+        runs = self._queues['run']
+        if runs and self.run_aging >= 0:
+            oldest = min(q[0][0]['created_at'] for q in runs.values())
+            if time.time() - oldest >= self.run_aging:
+                return ('run', 'submit')
+        return KINDS
+
+    def _take(self):
+        """Next dispatchable job (caller holds the lock), or None."""
+        for kind in self._kind_order():
+            owners = self._queues[kind]
+            for owner in list(owners):
+                if self._inflight.get((kind, owner), 0) >= self.max_inflight_per_user:
+                    continue
+                jobs = owners[owner]
+                entry = jobs.popleft()
+                # Round-robin: this owner goes to the back of the line
+                del owners[owner]
+                if jobs:
+                    owners[owner] = jobs
+                self._release_queued(kind, owner)
+                self._inflight[(kind, owner)] = self._inflight.get((kind, owner), 0) + 1
+                return entry
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                entry = self._take()
+                while entry is None:
+                    self._cond.wait()
+                    entry = self._take()
+                job, fn, args, on_complete = entry
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+                self._waits[job['kind']].append((job['level'], job['started_at'] - job['created_at']))
+
+            try:
+                job['result'] = fn(*args)
+                job['status'] = 'done'
+            except Exception as e:
+                logger.exception(f"Judge job {job['job_id']} failed")
+                job['error'] = str(e)
+                job['status'] = 'failed'
+            finally:
+                job['finished_at'] = time.time()
+                with self._cond:
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * (job['finished_at'] - job['started_at'])
+                    self._counters['completed' if job['status'] == 'done' else 'failed'] += 1
+                    inflight_key = (job['kind'], job['owner'])
+                    self._inflight[inflight_key] -= 1
+                    if not self._inflight[inflight_key]:
+                        del self._inflight[inflight_key]
+                    # A worker may be idle waiting for this owner's next job
+                    self._cond.notify_all()
+
+            if on_complete:
+                try:
+                    on_complete(dict(job))
+                except Exception as e:
+                    logger.error(f"Judge job {job['job_id']} completion hook failed: {e}")
+
+    def stats(self):
+        """Queue depth, in-flight jobs and queue wait times (ms, recent jobs) per kind and level."""
+        def summary(samples):
+            if not samples:
+                return {'samples': 0, 'avg_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+            ordered = sorted(samples)
+            return {
+                'samples': len(ordered),
+                'avg_ms': round(sum(ordered) * 1000 / len(ordered), 2),
+                'p95_ms': round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2)
+            }
+
+        with self._cond:
+            depth_by_kind = {kind: sum(len(q) for q in self._queues[kind].values()) for kind in KINDS}
+            depth_by_level = {}
+            for kind in KINDS:
+                for jobs in self._queues[kind].values():
+                    for job, _, _, _ in jobs:
+                        depth_by_level[str(job['level'])] = depth_by_level.get(str(job['level']), 0) + 1
+            waits = {kind: list(self._waits[kind]) for kind in KINDS}
+            stats = {
+                'workers': self.workers,
+                'depth': self._depth,
+                'depth_by_kind': depth_by_kind,
+                'depth_by_level': depth_by_level,
+                'users_queued': len({owner for _, owner in self._queued}),
+                'in_flight': sum(self._inflight.values()),
+                'users_in_flight': len({owner for _, owner in self._inflight}),
+                'avg_job_sec': round(self._avg_duration, 3),
+                **self._counters
+            }
+        stats['wait'] = {kind: summary([w for _, w in waits[kind]]) for kind in KINDS}
+        by_level = {}
+        for kind in KINDS:
+            for level, wait in waits[kind]:
+                by_level.setdefault(str(level), []).append(wait)
+        stats['wait_by_level'] = {level: summary(samples) for level, samples in by_level.items()}
+        return stats
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        with self._cond:
+            expired = [jid for jid, j in self._jobs.items() if j['finished_at'] and j['finished_at'] < cutoff]
+            for jid in expired:
+                del self._jobs[jid]
+
+
+judge_queue = JudgeQueue(JUDGE_WORKERS, JUDGE_QUEUE_MAX_DEPTH, JUDGE_RESULT_TTL,
+                         JUDGE_MAX_INFLIGHT_PER_USER, JUDGE_MAX_QUEUED_PER_USER, JUDGE_RUN_AGING_SEC)
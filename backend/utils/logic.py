@@ -1,222 +1,571 @@
 
 import logging
 import json
+import copy
+import hashlib
+import re
 import subprocess
-import tempfile
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.sandbox_pool import get_pool, SandboxWorkerError
+from utils.sandbox import run_process, cpu_limit_hit, SANDBOX_MEMORY_LIMIT_MB
+from utils.container_pool import get_container_pool, start_container_pools, code_hash as container_code_hash, ContainerError
+from utils.compile_cache import compile_cache
+from utils.cache import TTLCache
+from utils.python_policy import check_python_code
+from utils.comparators import get_comparator, prepare_cases, significant_lines
+from utils.verdict_cache import verdict_cache, cases_version, make_key as verdict_cache_key, is_cacheable as is_cacheable_verdict
+from utils.core_scheduler import core_scheduler
+from utils.testcase_store import StoredInput, TestCaseStoreError, case_input, display as display_case
 
 logger = logging.getLogger(__name__)
 
 # === CONFIGURATION ===
-# In production, set this to 'docker' or 'judge0'
+# In production, set this to 'docker' (warm container pool, see utils/container_pool.py) or 'judge0'
 EXECUTION_MODE = os.getenv('EXECUTION_MODE', 'local_secure') 
+if EXECUTION_MODE == 'docker':
+    start_container_pools()
 
 # === SECURITY WRAPPER ===
+
+# 1. Global Blocklist (case-insensitive)
+# Block file system access, network access, and process management
+DANGEROUS_GLOBALS = [
+    'rm -rf', 'wget', 'curl', 'shutdown', 'reboot'
+]
+
+# 2-3. Language specific blocklists (case-sensitive)
+# Python is checked on its AST instead, see utils/python_policy.py
+DANGEROUS_JS = [
+    'require("child_process")', "require('child_process')",
+    'require("fs")', "require('fs')",
+    'require("net")', "require('net')",
+    'require("http")', "require('http')",
+    'process.env', 'process.kill', 'process.exit', 'exec(', 'spawn('
+]
+DANGEROUS_C = [
+    'system(', 'fork(', 'popen(', 'execl(', 'execv(', 'remove(', 'rename(', 'fopen(', 'socket('
+]
+
+LANGUAGE_BLOCKLISTS = {
+    'javascript': (DANGEROUS_JS, "Security Violation: usage of '{}' is prohibited."),
+    'nodejs': (DANGEROUS_JS, "Security Violation: usage of '{}' is prohibited."),
+    'node': (DANGEROUS_JS, "Security Violation: usage of '{}' is prohibited."),
+    'c': (DANGEROUS_C, "Security Violation: system call '{}' is prohibited."),
+    'cpp': (DANGEROUS_C, "Security Violation: system call '{}' is prohibited."),
+}
+
+def _keyword_regex(words):
+    """
+    Compiles a keyword list into one regex shaped as a prefix trie, e.g.
+    import (?:os|sys|...). A single left-to-right pass then finds any keyword,
+    without re-scanning the code once per keyword.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+        if not alts:
+            return ''
+        body = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+        if '' in node:
+            body = '(?:' + body + ')?'
+        return body
+
+    return re.compile(build(trie))
+
+# Built once at import
+GLOBAL_SCANNER = _keyword_regex(DANGEROUS_GLOBALS)
+SECURITY_SCANNERS = {lang: _keyword_regex(words) for lang, (words, _) in LANGUAGE_BLOCKLISTS.items()}
+
+# Verdicts per (language, code hash): the scan runs once per distinct submission
+security_scan_cache = TTLCache(max_entries=4096, ttl=3600)
+
 def validate_code_security(code, language):
     """
     Scans the user code for potentially malicious patterns.
     Returns: (is_safe: bool, error_message: str)
     """
-    code_lower = code.lower()
-    
-    # 1. Global Blocklist
-    # Block file system access, network access, and process management
-    dangerous_globals = [
-        'rm -rf', 'wget', 'curl', 'shutdown', 'reboot'
-    ]
-    for k in dangerous_globals:
-        if k in code_lower:
-             return False, f"Security Violation: '{k}' is prohibited."
-
-    # 2. Python Specific
+    cache_key = (language, hashlib.sha256(code.encode('utf-8')).hexdigest())
+    verdict = security_scan_cache.get(cache_key)
+    if verdict is None:
+        verdict = _scan_code(code, language)
+        security_scan_cache.set(cache_key, verdict)
+    return verdict
+
+def _scan_code(code, language):
     if language == 'python':
-        dangerous_py = [
-            'import os', 'from os', 'import subprocess', 'import sys', 'import pty', 'import shutil', 
-            'import requests', 'import urllib', 'import socket', 'import multiprocessing', 'import threading',
-            'open(', 'exec(', 'eval(', '__import__', 'os.system', 'os.popen', 'os.walk', 'os.remove',
-            'subprocess.run', 'subprocess.Popen', 'sys.modules'
-        ]
-        for keyword in dangerous_py:
-            if keyword in code: # Case sensitive for Python imports mostly, but safer to check strict
-                return False, f"Security Violation: usage of '{keyword}' is prohibited."
-
-    # 3. Node.js Specific
-    if language in ['javascript', 'nodejs', 'node']:
-         dangerous_js = [
-             'require("child_process")', "require('child_process')",
-             'require("fs")', "require('fs')",
-             'require("net")', "require('net')",
-             'require("http")', "require('http')",
-             'process.env', 'process.kill', 'process.exit', 'exec(', 'spawn('
-         ]
-         for keyword in dangerous_js:
-             if keyword in code:
-                 return False, f"Security Violation: usage of '{keyword}' is prohibited."
-
-    # 4. C/C++ Specific
-    if language in ['c', 'cpp']:
-        dangerous_c = [
-            'system(', 'fork(', 'popen(', 'execl(', 'execv(', 'remove(', 'rename(', 'fopen(', 'socket('
-        ]
-        for keyword in dangerous_c:
-             if keyword in code:
-                  return False, f"Security Violation: system call '{keyword}' is prohibited."
+        return check_python_code(code)
+
+    # Global keywords are case-insensitive and take precedence
+    match = GLOBAL_SCANNER.search(code.lower())
+    if match:
+        return False, f"Security Violation: '{match.group()}' is prohibited."
 
+    scanner = SECURITY_SCANNERS.get(language)
+    if scanner:
+        match = scanner.search(code)
+        if match:
+            return False, LANGUAGE_BLOCKLISTS[language][1].format(match.group())
     return True, None
 
 # === EXECUTION ENGINE ===
 
+# Common Resource Limits (Time in seconds)
+TIMEOUT_SEC = 2
+# How many test cases of one submission may run at the same time
+JUDGE_BATCH_CONCURRENCY = int(os.getenv('JUDGE_BATCH_CONCURRENCY', 2))
+# Aggregate CPU seconds one submission may use across its test cases (0 = unlimited)
+JUDGE_CPU_BUDGET_SEC = float(os.getenv('JUDGE_CPU_BUDGET_SEC', 10))
+CPU_BUDGET_ERROR = "CPU Budget Exceeded"
+
 def execute_code_internal(code, language, input_str):
     """
     Facade for code execution. Dispatches to local sandbox or docker/external service.
     """
+    with core_scheduler.slot(object()):
+        run_case, error = prepare_execution(code, language)
+        if error:
+            return error
+        return run_case(input_str)
+
+def prepare_execution(code, language):
+    """
+    Does the per-submission work exactly once: security scan and, for compiled
+    languages, compilation.
+    Returns: (run_case, error_result). run_case(input_str) -> result dict.
+    """
     # 1. Security Check (Always applied first)
     is_safe, violation_msg = validate_code_security(code, language)
     if not is_safe:
-        return {'success': False, 'output': '', 'error': violation_msg}
+        return None, {'success': False, 'output': '', 'error': violation_msg}
 
     # 2. Dispatch
     if EXECUTION_MODE == 'local_secure':
-        return execute_local_secure(code, language, input_str)
+        return prepare_local_secure(code, language)
     elif EXECUTION_MODE == 'docker':
-        return {'success': False, 'error': "Docker execution not yet implemented"}
+        return prepare_docker(code, language)
     else:
-        return {'success': False, 'error': "Unknown Execution Mode"}
+        return None, {'success': False, 'error': "Unknown Execution Mode"}
 
-def execute_local_secure(code, language, input_str):
+def prepare_local_secure(code, language):
     """
-    Executes code locally using subprocess with strict timeouts and (where possible) limits.
+    Prepares local execution using subprocess with strict timeouts and (where possible) limits.
     """
-    input_str = str(input_str)
-    
-    # Common Resource Limits (Time in seconds)
-    TIMEOUT_SEC = 2
-    
     try:
         if language == 'python':
-            return run_python(code, input_str, TIMEOUT_SEC)
+            run, error = (lambda inp: run_python(code, inp, TIMEOUT_SEC)), None
         elif language in ['c', 'cpp']:
-            return run_cpp(code, language, input_str, TIMEOUT_SEC)
+            run, error = prepare_cpp(code, language, TIMEOUT_SEC)
         elif language == 'java':
-            return run_java(code, input_str, TIMEOUT_SEC)
+            run, error = prepare_java(code, TIMEOUT_SEC)
         elif language in ['javascript', 'node']:
-            return run_node(code, input_str, TIMEOUT_SEC)
+            run, error = (lambda inp: run_node(code, inp, TIMEOUT_SEC)), None
         else:
-            return {'success': False, 'error': f"Language {language} not supported"}
-            
+            return None, {'success': False, 'error': f"Language {language} not supported"}
     except Exception as e:
         logger.error(f"Execution Error: {e}")
-        return {'success': False, 'error': "Internal Execution Error"}
+        return None, {'success': False, 'error': "Internal Execution Error"}
+
+    if error:
+        return None, error
+
+    def run_case(input_str):
+        try:
+            return run(as_input(input_str))
+        except Exception as e:
+            logger.error(f"Execution Error: {e}")
+            return {'success': False, 'error': "Internal Execution Error"}
+
+    return run_case, None
+
+def prepare_docker(code, language):
+    """
+    Prepares execution in the warm container pool (utils/container_pool.py).
+    The first build happens here so compile errors surface once; containers
+    that later receive a case build the same workspace on demand.
+    """
+    pool = get_container_pool(language)
+    if pool is None:
+        return None, {'success': False, 'error': f"Language {language} not supported"}
+    key = container_code_hash(language, code)
+    compile_failed = "Java Compiler not found." if language == 'java' else "Compiler not found or failed."
+
+    def build_error(build):
+        if build is None or build['returncode'] == 0:
+            return None
+        if build['timed_out'] or build['returncode'] == 127:
+            return {'success': False, 'output': '', 'error': compile_failed}
+        return {'success': False, 'output': '', 'error': "Compilation Error:\n" + build['stderr']}
 
-def run_python(code, input_str, timeout):
     try:
-        # '-u' for unbuffered output
-        p = subprocess.run(
-            ['python', '-u', '-c', code],
-            input=input_str,
+        build = pool.use(lambda c: c.ensure_workspace(key, code))
+    except ContainerError as e:
+        logger.error(f"Container pool error: {e}")
+        return None, {'success': False, 'error': "Internal Execution Error"}
+    error = build_error(build)
+    if error:
+        return None, error
+    warnings = build['stderr'] if build is not None else None
+
+    def run_case(input_str):
+        def run(container):
+            failed = build_error(container.ensure_workspace(key, code))
+            return failed or _judge_result(container.run(key, as_input(input_str), TIMEOUT_SEC), warnings)
+        try:
+            return pool.use(run)
+        except ContainerError as e:
+            logger.error(f"Container pool error: {e}")
+            return {'success': False, 'error': "Internal Execution Error"}
+
+    return run_case, None
+
+def as_input(input_str):
+    """Sandbox stdin: file-backed test cases (StoredInput) pass through, anything else as str."""
+    return input_str if isinstance(input_str, StoredInput) else str(input_str)
+
+def execute_local_secure(code, language, input_str):
+    """
+    Executes code locally using subprocess with strict timeouts and (where possible) limits.
+    """
+    run_case, error = prepare_local_secure(code, language)
+    if error:
+        return error
+    return run_case(input_str)
+
+# === BATCH EXECUTION ===
+
+def normalize_output(s):
+    """Line-wise strip, blank lines dropped: the comparison the judge has always used."""
+    return "\n".join(significant_lines(s))
+
+def outputs_match(actual, expected, comparator=None):
+    """Compares one output with one expected output (see utils/comparators.py)."""
+    comparator = get_comparator(comparator)
+    return comparator.match(actual, comparator.prepare_expected(expected))
+
+def execute_batch(code, language, cases, stop_on_failure=False, concurrency=None, question_id=None, comparator=None,
+                  owner=None, cpu_budget=None):
+    """
+    Judges one submission against several test cases.
+
+    The security scan and compilation run once; cases then run with up to
+    `concurrency` in flight (JUDGE_BATCH_CONCURRENCY by default). With
+    stop_on_failure (submit mode) no new case is started after the first
+    failing one; the cases not run are reported with skipped=True.
+
+    Compilation and every case hold a core of the global core scheduler
+    (utils/core_scheduler.py) on behalf of `owner` (the participant), so
+    concurrent submitters share the judge's cores fairly. Once the cases have
+    used `cpu_budget` CPU seconds (JUDGE_CPU_BUDGET_SEC by default) the
+    remaining ones fail with CPU_BUDGET_ERROR without running.
+
+    Outputs are judged with the named comparator (utils/comparators.py,
+    'whitespace' by default) against expected outputs prepared once per
+    question. When question_id is given, identical (question, cases,
+    comparator, language, code) batches are answered from the verdict cache
+    without touching the sandbox.
+
+    cases: list of {'input': ..., 'expected': ...}; large cases use
+    'input_ref'/'expected_ref' instead (utils/testcase_store.py) and are fed
+    from the stored file, with only a preview in the results.
+    Returns: {'all_passed': bool, 'total_time': float, 'cpu_time': float,
+    'cpu_budget_exceeded': bool, 'worker_lost': bool, 'cached': bool,
+    'results': [...]} where
+    each result has input, expected, success, output,
+    passed, error, warnings, duration, cpu_time (user+sys seconds), memory_kb
+    (peak RSS) and skipped.
+    """
+    comparator = get_comparator(comparator)
+    cache_key = version = None
+    if question_id is not None:
+        version = cases_version(cases)
+        cache_key = verdict_cache_key(question_id, version, comparator.name, language, code, stop_on_failure)
+        cached = verdict_cache.get(cache_key)
+        if cached is not None:
+            return dict(copy.deepcopy(cached), cached=True)
+    prepared = prepare_cases(cases, comparator, question_id, version)
+
+    batch_start = time.time()
+    results = [None] * len(cases)
+    if owner is None:
+        owner = object()
+    if cpu_budget is None:
+        cpu_budget = JUDGE_CPU_BUDGET_SEC
+    budget = {'spent': 0.0, 'exceeded': False}
+    # Set when a sandbox worker died mid-case: that verdict depends on load, not on the code
+    worker_lost = threading.Event()
+    budget_lock = threading.Lock()
+
+    def charge(result):
+        with budget_lock:
+            budget['spent'] += result.get('cpu_time') or 0.0
+
+    def record(i, result, duration):
+        case = cases[i]
+        if result.get('worker_lost'):
+            worker_lost.set()
+        output = ''
+        passed = False
+        if result['success']:
+            output = result['output'].replace('\r\n', '\n').strip()
+            passed = comparator.match(result['output'], prepared[i])
+        results[i] = {
+            'input': display_case(case, 'input'),
+            'expected': display_case(case, 'expected'),
+            'success': result['success'],
+            'output': output,
+            'passed': passed,
+            'error': result.get('error') if not result['success'] else None,
+            'warnings': result.get('warnings'),
+            'duration': duration,
+            'cpu_time': result.get('cpu_time'),
+            'memory_kb': result.get('memory_kb'),
+            'skipped': False
+        }
+        return passed
+
+    prep_start = time.time()
+    with core_scheduler.slot(owner):
+        run_case, error = prepare_execution(code, language)
+    if error:
+        # Security violation / compile error: same verdict for every case
+        prep_duration = time.time() - prep_start
+        for i in range(len(cases)):
+            record(i, error, prep_duration)
+            if stop_on_failure:
+                break
+    else:
+        def timed_run(i):
+            with budget_lock:
+                if cpu_budget and budget['spent'] >= cpu_budget:
+                    budget['exceeded'] = True
+                    return {'success': False, 'error': f"{CPU_BUDGET_ERROR} ({cpu_budget:g}s for all test cases)"}, 0.0
+            with core_scheduler.slot(owner):
+                start_t = time.time()
+                try:
+                    result = run_case(case_input(cases[i]))
+                except TestCaseStoreError as e:
+                    logger.error(f"Test case {i + 1} unavailable: {e}")
+                    result = {'success': False, 'error': "Internal Execution Error"}
+                duration = time.time() - start_t
+            charge(result)
+            return result, duration
+
+        workers = max(1, min(concurrency or JUDGE_BATCH_CONCURRENCY, len(cases)))
+        if workers == 1:
+            for i in range(len(cases)):
+                result, duration = timed_run(i)
+                if not record(i, result, duration) and stop_on_failure:
+                    break
+        else:
+            failed = threading.Event()
+
+            def guarded_run(i):
+                if stop_on_failure and failed.is_set():
+                    return
+                if not record(i, *timed_run(i)):
+                    failed.set()
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(guarded_run, i) for i in range(len(cases))]:
+                    future.result()
+
+    for i, res in enumerate(results):
+        if res is None:
+            results[i] = {
+                'input': display_case(cases[i], 'input'),
+                'expected': display_case(cases[i], 'expected'),
+                'success': False,
+                'output': '',
+                'passed': False,
+                'error': "Skipped after an earlier test case failed",
+                'warnings': None,
+                'duration': 0.0,
+                'cpu_time': None,
+                'memory_kb': None,
+                'skipped': True
+            }
+
+    batch = {
+        'all_passed': bool(results) and all(r['passed'] for r in results),
+        'total_time': time.time() - batch_start,
+        'cpu_time': round(sum(r['cpu_time'] or 0.0 for r in results), 4),
+        'cpu_budget_exceeded': budget['exceeded'],
+        'worker_lost': worker_lost.is_set(),
+        'cached': False,
+        'results': results
+    }
+    if cache_key is not None and is_cacheable_verdict(batch):
+        verdict_cache.set(cache_key, copy.deepcopy(batch))
+    return batch
+
+def _judge_result(result, warnings=None):
+    """Maps a raw sandbox result (pool worker or run_process) onto the judge's result dict."""
+    usage = {'cpu_time': result.get('cpu_time'), 'memory_kb': result.get('memory_kb')}
+    if result['timed_out'] or cpu_limit_hit(result):
+        return {'success': False, 'output': '', 'error': "Time Limit Exceeded", **usage}
+    if result.get('output_limit_exceeded'):
+        return {'success': False, 'output': '', 'error': "Output Limit Exceeded", **usage}
+    extra = {'warnings': warnings} if warnings is not None else {}
+    if result['returncode'] != 0:
+        return {'success': False, 'output': result['stdout'], 'error': result['stderr'] or "Runtime Error", **extra, **usage}
+    return {'success': True, 'output': result['stdout'], 'error': None, **extra, **usage}
+
+def _worker_lost(language, e):
+    """
+    Result for a pool worker that failed after it received the job: the
+    submission may already have run (or killed the worker itself), so it is
+    not run a second time.
+    """
+    logger.warning(f"{language} sandbox worker failed during a job: {e}")
+    return {'success': False, 'output': '', 'error': "Runtime Error", 'cpu_time': None, 'memory_kb': None,
+            'worker_lost': True}
+
+def run_python(code, input_str, timeout):
+    pool = get_pool('python')
+    if pool:
+        try:
+            return _judge_result(pool.run(code, input_str, timeout))
+        except SandboxWorkerError as e:
+            if e.started:
+                return _worker_lost('Python', e)
+            logger.warning(f"Python sandbox pool unavailable, falling back to subprocess: {e}")
+
+    # '-u' for unbuffered output
+    return _judge_result(run_process(['python', '-u', '-c', code], input_str, timeout, 'python'))
+
+# Compiler flags are part of the compile cache key
+CPP_FLAGS = []
+JAVA_FLAGS = ['--release', '8']
+
+def compile_cpp(code, lang):
+    """
+    Compiles a C/C++ submission, reusing a cached build of identical code.
+    Returns a context manager yielding the compile cache entry {'ok', 'output',
+    'path'}, pinned against eviction inside the with block.
+    """
+    compiler = 'gcc' if lang == 'c' else 'g++'
+    ext = '.c' if lang == 'c' else '.cpp'
+
+    def build(workdir):
+        with open(os.path.join(workdir, f'main{ext}'), 'w') as f:
+            f.write(code)
+        c_proc = subprocess.run(
+            [compiler, f'main{ext}', *CPP_FLAGS, '-o', 'main.exe'],
+            cwd=workdir,
             capture_output=True,
             text=True,
-            timeout=timeout
+            timeout=5 # Compile timeout
         )
-        if p.returncode != 0:
-            return {'success': False, 'output': p.stdout, 'error': p.stderr or "Runtime Error"}
-        return {'success': True, 'output': p.stdout, 'error': None}
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'output': '', 'error': "Time Limit Exceeded"}
+        return c_proc.returncode == 0, c_proc.stderr
 
-def run_cpp(code, lang, input_str, timeout):
-    compiler = 'gcc' if lang == 'c' else 'g++'
-    ext = '.c' if lang == 'c' else '.cpp'
-    
-    with tempfile.TemporaryDirectory() as tmpdir:
-        src_path = os.path.join(tmpdir, f'main{ext}')
-        exe_path = os.path.join(tmpdir, 'main.exe')
-        
-        with open(src_path, 'w') as f:
+    return compile_cache.lease(lang, code, [compiler, *CPP_FLAGS], build)
+
+def compile_java(code):
+    """
+    Compiles a Java submission (class Main), reusing a cached build of identical code.
+    Returns a context manager yielding the compile cache entry {'ok', 'output',
+    'path'}, pinned against eviction inside the with block.
+    """
+    def build(workdir):
+        with open(os.path.join(workdir, 'Main.java'), 'w') as f:
             f.write(code)
-            
-        # Compile
-        try:
-            c_proc = subprocess.run(
-                [compiler, src_path, '-o', exe_path],
-                capture_output=True,
-                text=True,
-                timeout=5 # Compile timeout
-            )
-            if c_proc.returncode != 0:
-                 return {'success': False, 'output': '', 'error': "Compilation Error:\n" + c_proc.stderr}
-            warnings = c_proc.stderr # Capture warnings
-        except Exception as e:
-             return {'success': False, 'output': '', 'error': "Compiler not found or failed."}
+        c_proc = subprocess.run(
+            ['javac', *JAVA_FLAGS, 'Main.java'],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        return c_proc.returncode == 0, c_proc.stderr
+
+    return compile_cache.lease('java', code, JAVA_FLAGS, build)
+
+def run_binary(cmd, input_str, timeout, language, warnings=None):
+    """Runs an already-built program for one test case."""
+    return _judge_result(run_process(cmd, input_str, timeout, language), warnings)
 
-        # Run
+def prepare_cpp(code, lang, timeout):
+    # Compile (cached across test cases and identical resubmissions)
+    try:
+        with compile_cpp(code, lang) as build:
+            pass
+    except Exception as e:
+        return None, {'success': False, 'output': '', 'error': "Compiler not found or failed."}
+    if not build['ok']:
+        return None, {'success': False, 'output': '', 'error': "Compilation Error:\n" + build['output']}
+    warnings = build['output'] # Capture warnings
+
+    def run(inp):
+        # Each case pins the build, so the cache cannot evict the binary mid-run
+        with compile_cpp(code, lang) as build:
+            return run_binary([os.path.join(build['path'], 'main.exe')], inp, timeout, lang, warnings)
+    return run, None
+
+def run_cpp(code, lang, input_str, timeout):
+    run, error = prepare_cpp(code, lang, timeout)
+    return error or run(input_str)
+
+def prepare_java(code, timeout):
+    # Compile (cached across test cases and identical resubmissions)
+    try:
+        with compile_java(code) as build:
+            pass
+    except:
+        return None, {'success': False, 'output': '', 'error': "Java Compiler not found."}
+    if not build['ok']:
+        return None, {'success': False, 'output': '', 'error': "Compilation Error:\n" + build['output']}
+
+    def run(inp):
+        # Main.class is loaded during the run, so the build stays pinned until it ends
+        with compile_java(code) as build:
+            return run_java_class(build['path'], inp, timeout)
+    return run, None
+
+def run_java_class(class_dir, input_str, timeout):
+    """Runs a compiled Main on a warm JVM, or in a fresh `java` process without one."""
+    pool = get_pool('java')
+    if pool:
         try:
-            r_proc = subprocess.run(
-                [exe_path],
-                input=input_str,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            if r_proc.returncode != 0:
-                return {'success': False, 'output': r_proc.stdout, 'error': r_proc.stderr or "Runtime Error", 'warnings': warnings}
-            return {'success': True, 'output': r_proc.stdout, 'error': None, 'warnings': warnings}
-        except subprocess.TimeoutExpired:
-            return {'success': False, 'output': '', 'error': "Time Limit Exceeded"}
+            return _judge_result(pool.run(class_dir, input_str, timeout))
+        except SandboxWorkerError as e:
+            if e.started:
+                # Also reached when the submission called System.exit() and took the JVM with it
+                return _worker_lost('Java', e)
+            logger.warning(f"Java runner unavailable, falling back to subprocess: {e}")
+
+    # The JVM cannot start under RLIMIT_AS; its heap is capped with -Xmx instead
+    cmd = ['java', '-cp', class_dir, 'Main']
+    if SANDBOX_MEMORY_LIMIT_MB:
+        cmd.insert(1, f'-Xmx{SANDBOX_MEMORY_LIMIT_MB}m')
+    return run_binary(cmd, input_str, timeout, 'java')
 
 def run_java(code, input_str, timeout):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        src_path = os.path.join(tmpdir, 'Main.java')
-        # Ensure class Main exists. Simple heuristic check.
-        if 'class Main' not in code:
-             # Just a warning or auto-inject? Assuming strict 'Main' requirement.
-             pass
-
-        with open(src_path, 'w') as f:
-            f.write(code)
-            
-        # Compile
-        try:
-            c_proc = subprocess.run(
-                ['javac', '--release', '8', src_path],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if c_proc.returncode != 0:
-                 return {'success': False, 'output': '', 'error': "Compilation Error:\n" + c_proc.stderr}
-        except:
-             return {'success': False, 'output': '', 'error': "Java Compiler not found."}
-
-        # Run
-        try:
-            r_proc = subprocess.run(
-                ['java', '-cp', tmpdir, 'Main'],
-                input=input_str,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            if r_proc.returncode != 0:
-                return {'success': False, 'output': r_proc.stdout, 'error': r_proc.stderr or "Runtime Error"}
-            return {'success': True, 'output': r_proc.stdout, 'error': None}
-        except subprocess.TimeoutExpired:
-            return {'success': False, 'output': '', 'error': "Time Limit Exceeded"}
+    run, error = prepare_java(code, timeout)
+    return error or run(input_str)
 
 def run_node(code, input_str, timeout):
+    pool = get_pool('javascript')
+    if pool:
+        try:
+            return _judge_result(pool.run(code, input_str, timeout))
+        except SandboxWorkerError as e:
+            if e.started:
+                return _worker_lost('Node', e)
+            logger.warning(f"Node sandbox pool unavailable, falling back to subprocess: {e}")
+
+    cmd = ['node', '-e', code]
+    if SANDBOX_MEMORY_LIMIT_MB:
+        cmd.insert(1, f'--max-old-space-size={SANDBOX_MEMORY_LIMIT_MB}')
     try:
-        p = subprocess.run(
-            ['node', '-e', code],
-            input=input_str,
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        if p.returncode != 0:
-             return {'success': False, 'output': p.stdout, 'error': p.stderr}
-        return {'success': True, 'output': p.stdout, 'error': None}
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'output': '', 'error': "Time Limit Exceeded"}
-    except:
+        return _judge_result(run_process(cmd, input_str, timeout, 'javascript'))
+    except OSError:
         return {'success': False, 'output': '', 'error': "Node.js not found."}
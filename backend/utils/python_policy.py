@@ -0,0 +1,217 @@
+"""
+AST-based policy checker for Python submissions.
+
+Replaces the substring blocklist for Python: it sees through obfuscated imports
+(`__import__('o' + 's')`, `getattr(__builtins__, ...)`), rejects the modules an
+allowed one exposes (`random._os`, `typing.sys`) and ignores harmless text in
+comments and strings (e.g. `# don't open( this`). String annotations are the
+exception: typing.get_type_hints and functools.singledispatch eval them, so
+they are rejected along with those evaluators.
+Results are cached per code hash by validate_code_security in utils/logic.py.
+"""
+import ast
+
+# Modules a debugging-contest solution may import
+ALLOWED_MODULES = {
+    'math', 'cmath', 'collections', 'itertools', 'functools', 'heapq', 'bisect',
+    're', 'string', 'decimal', 'fractions', 'statistics', 'random', 'datetime',
+    'typing', 'dataclasses', 'copy', 'operator', 'array', 'enum', 'json', 'abc'
+}
+
+# Builtins that reach the file system, the interpreter or dynamic code
+BLOCKED_CALLS = {
+    'open', 'exec', 'eval', 'compile', '__import__', 'breakpoint', 'globals',
+    'vars', 'locals', 'help'
+}
+
+# Names that expose the interpreter internals directly
+BLOCKED_NAMES = {'__builtins__', '__import__', '__loader__', '__spec__'}
+
+# Attribute hops used to escape to object/frames/globals
+BLOCKED_ATTRIBUTES = {
+    '__subclasses__', '__globals__', '__builtins__', '__code__', '__bases__',
+    '__base__', '__mro__', '__getattribute__', '__closure__', '__func__',
+    '__self__', '__dict__', '__loader__', '__spec__', '__import__',
+    'f_globals', 'f_locals', 'f_back', 'f_builtins', 'gi_frame', 'gi_code',
+    'cr_frame', 'tb_frame', 'co_code', '__annotations__'
+}
+
+# Helpers of allowed modules that eval string annotations / forward references
+ANNOTATION_EVALUATORS = {
+    'get_type_hints', 'ForwardRef', '_eval_type', 'singledispatch', 'singledispatchmethod'
+}
+
+# Modules the allowed ones expose as attributes (random._os, typing.sys,
+# json.codecs, enum.bltns, ...) plus other interpreter/OS modules: reaching
+# any of them undoes the import allowlist
+MODULE_ATTRIBUTES = {
+    'os', 'sys', 'builtins', 'bltns', 'codecs', 'contextlib', 'copyreg',
+    'inspect', 'types', 'warnings', 'importlib', 'subprocess', 'io', 'posix',
+    'nt', 'shutil', 'socket', 'ctypes', 'pathlib', 'gc', 'marshal', 'pickle'
+}
+
+# A solution's own objects: their private attributes are its own business
+OWN_OBJECT_NAMES = {'self', 'cls'}
+
+# getattr-style builtins whose attribute name must be a plain literal
+REFLECTION_CALLS = {'getattr', 'setattr', 'delattr', 'hasattr'}
+# operator helpers that read attributes named by their string arguments
+ATTRIBUTE_GETTERS = {'attrgetter', 'methodcaller'}
+
+
+def _blocked_attribute(name, owner):
+    """
+    True when attribute `name` of the expression `owner` may not be read.
+    Private names (random._os, collections._sys) and module attributes are
+    only allowed on self/cls; dunders are limited to BLOCKED_ATTRIBUTES.
+    """
+    if name in BLOCKED_ATTRIBUTES or name in ANNOTATION_EVALUATORS:
+        return True
+    if isinstance(owner, ast.Name) and owner.id in OWN_OBJECT_NAMES:
+        return False
+    is_dunder = name.startswith('__') and name.endswith('__')
+    return name in MODULE_ATTRIBUTES or (name.startswith('_') and not is_dunder)
+
+
+def _blocked_lookup(name, owner):
+    """
+    Attribute names a reflective lookup (getattr, attrgetter, methodcaller)
+    may not use: no dunders at all, and no way to reach another reflection
+    helper whose own arguments would then go unchecked.
+    """
+    return (name.startswith('__') or name in ATTRIBUTE_GETTERS | REFLECTION_CALLS
+            or _blocked_attribute(name, owner))
+
+
+def _violation(what, node):
+    return f"Security Violation: usage of '{what}' is prohibited (line {getattr(node, 'lineno', '?')})."
+
+
+class PolicyVisitor(ast.NodeVisitor):
+    """Collects the first policy violation in source order."""
+
+    def __init__(self):
+        self.violation = None
+        # ids of the nodes called directly (the func of an ast.Call)
+        self._called = set()
+
+    def _flag(self, what, node):
+        if self.violation is None:
+            self.violation = _violation(what, node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            root = alias.name.split('.')[0]
+            if root not in ALLOWED_MODULES:
+                self._flag(f"import {alias.name}", node)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ''
+        if node.level or module.split('.')[0] not in ALLOWED_MODULES:
+            self._flag(f"from {'.' * node.level}{module} import", node)
+        for alias in node.names:
+            # from random import _os / from typing import sys
+            if alias.name != '*' and _blocked_attribute(alias.name, None):
+                self._flag(f"from {module} import {alias.name}", node)
+            elif alias.asname and alias.name in ATTRIBUTE_GETTERS | REFLECTION_CALLS:
+                # Calls are matched by name: `attrgetter as ag` would dodge them
+                self._flag(f"from {module} import {alias.name} as {alias.asname}", node)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        self._called.add(id(func))
+        if isinstance(func, ast.Name):
+            if func.id in BLOCKED_CALLS:
+                self._flag(f"{func.id}()", node)
+            elif func.id in REFLECTION_CALLS and len(node.args) >= 2:
+                attr = node.args[1]
+                if not (isinstance(attr, ast.Constant) and isinstance(attr.value, str)):
+                    self._flag(f"{func.id}() with a computed name", node)
+                elif _blocked_lookup(attr.value, node.args[0]):
+                    self._flag(f"{func.id}(..., '{attr.value}')", node)
+        func_name = func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+        if func_name in ATTRIBUTE_GETTERS:
+            names = node.args if func_name == 'attrgetter' else node.args[:1]
+            for arg in names:
+                if not (isinstance(arg, ast.Constant) and isinstance(arg.value, str)):
+                    self._flag(f"{func_name}() with a computed name", node)
+                elif any(_blocked_lookup(part, None) for part in arg.value.split('.')):
+                    self._flag(f"{func_name}('{arg.value}')", node)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        if _blocked_attribute(node.attr, node.value):
+            self._flag(f".{node.attr}", node)
+        elif node.attr in ATTRIBUTE_GETTERS and id(node) not in self._called:
+            # g = operator.attrgetter would dodge the literal-name check
+            self._flag(node.attr, node)
+        self.generic_visit(node)
+
+    def _check_annotation(self, annotation):
+        # `x: "__import__('os')"`, also nested as in List["..."]
+        if annotation is None:
+            return
+        for sub in ast.walk(annotation):
+            if isinstance(sub, ast.Constant) and isinstance(sub.value, str):
+                self._flag("string annotation", sub)
+                return
+
+    def visit_arg(self, node):
+        self._check_annotation(node.annotation)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self._check_annotation(node.returns)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_AnnAssign(self, node):
+        self._check_annotation(node.annotation)
+        self.generic_visit(node)
+
+    def visit_MatchClass(self, node):
+        # case object(_os=m) reads the attribute like m = subject._os
+        for name in node.kwd_attrs:
+            if _blocked_attribute(name, None):
+                self._flag(f"case ...({name}=...)", node)
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id in BLOCKED_NAMES:
+            self._flag(node.id, node)
+        elif node.id in ANNOTATION_EVALUATORS:
+            # from typing import * brings get_type_hints in as a bare name
+            self._flag(node.id, node)
+        elif node.id in BLOCKED_CALLS and isinstance(node.ctx, ast.Load):
+            # Aliasing a blocked builtin, e.g. `f = open`
+            self._flag(node.id, node)
+        elif node.id in REFLECTION_CALLS | ATTRIBUTE_GETTERS and isinstance(node.ctx, ast.Load) and id(node) not in self._called:
+            # `g = getattr` would dodge the literal-name check
+            self._flag(node.id, node)
+
+
+def check_python_code(code):
+    """
+    Returns: (is_safe: bool, error_message: str)
+    Code that does not parse is let through: it cannot run, and the
+    interpreter reports the SyntaxError to the participant.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return True, None
+    except (RecursionError, MemoryError, ValueError):
+        return False, "Security Violation: code could not be analysed."
+
+    visitor = PolicyVisitor()
+    try:
+        visitor.visit(tree)
+    except RecursionError:
+        return False, "Security Violation: code could not be analysed."
+
+    if visitor.violation:
+        return False, visitor.violation
+    return True, None
@@ -0,0 +1,95 @@
+"""
+In-process cache of the question data the judge needs.
+
+During a level every participant runs and submits against the same handful of
+questions, so run_code/submit_question read them from here instead of
+re-querying questions JOIN rounds and re-parsing test_cases on every click.
+Entries expire after QUESTION_CACHE_TTL seconds and are dropped explicitly by
+the admin routes that change questions or rounds (invalidate_question /
+invalidate_all), so an edit is visible immediately on this worker and within
+the TTL on the others.
+
+Cached entries are shared between requests: treat them as read-only.
+"""
+import json
+import logging
+import os
+
+from db_connection import db_manager
+from utils.cache import TTLCache
+from utils import comparators, verdict_cache
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+QUESTION_CACHE_TTL = int(os.getenv('QUESTION_CACHE_TTL', 120))
+QUESTION_CACHE_MAX_ENTRIES = int(os.getenv('QUESTION_CACHE_MAX_ENTRIES', 512))
+
+question_cache = TTLCache(QUESTION_CACHE_MAX_ENTRIES, QUESTION_CACHE_TTL)
+
+
+def parse_cases(row):
+    """Test cases of a questions row: test_input/expected_output, else the test_cases JSON list."""
+    if row.get('test_input') is not None:
+        return [{'input': row['test_input'], 'expected': row['expected_output']}]
+    raw = row.get('test_cases')
+    if not raw:
+        return []
+    try:
+        # JSONB columns arrive already decoded; TEXT/JSON columns as strings
+        tcs = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    except ValueError:
+        logger.warning(f"Question {row.get('question_id')} has malformed test_cases JSON")
+        return []
+    return tcs if isinstance(tcs, list) else []
+
+
+def _load(question_id):
+    q_res = db_manager.execute_named('question_for_judge', (question_id,))
+    if not q_res:
+        # Ids arrive as int or str depending on the client
+        try:
+            if str(question_id).isdigit():
+                q_res = db_manager.execute_named('question_for_judge', (int(question_id),))
+            else:
+                q_res = db_manager.execute_named('question_for_judge', (str(question_id),))
+        except Exception:
+            pass
+    if not q_res:
+        return None
+
+    row = q_res[0]
+    return {
+        'question_id': row['question_id'],
+        'round_id': row.get('round_id'),
+        'points': row.get('points'),
+        'allowed_language': row.get('allowed_language'),
+        'comparator': row.get('comparator'),
+        'cases': parse_cases(row)
+    }
+
+
+def get_question(question_id):
+    """
+    Returns {question_id, round_id, points, allowed_language, comparator, cases}
+    or None when the question does not exist (misses are not cached).
+    """
+    key = str(question_id)
+    question = question_cache.get(key)
+    if question is None:
+        question = _load(question_id)
+        if question is not None:
+            question_cache.set(key, question)
+    return question
+
+
+def invalidate_question(question_id):
+    """Drops everything cached for one question: row, prepared cases and verdicts."""
+    question_cache.pop(str(question_id))
+    comparators.invalidate_question(question_id)
+    verdict_cache.invalidate_question(question_id)
+
+
+def invalidate_all():
+    """For round-level changes (e.g. allowed_language) that touch many questions."""
+    question_cache.clear()
@@ -0,0 +1,299 @@
+"""
+Kernel-enforced limits for judged processes.
+
+Every submission process gets per-execution rlimits (CPU seconds, address
+space, file size, optionally process count) via preexec_fn and its own session
+so a timeout kills the whole process group, fork children included. When
+SANDBOX_CGROUP_ROOT points at a delegated cgroup v2 directory, each execution
+also gets its own cgroup (memory.max, pids.max) and the CPU/memory numbers are
+read from it.
+
+run_process() returns the raw result shape shared with utils/sandbox_pool.py:
+{returncode, stdout, stderr, timed_out, output_limit_exceeded, cpu_time, memory_kb}
+where cpu_time is user+system seconds and memory_kb the peak RSS (from wait4,
+or memory.peak when a cgroup slice is active).
+"""
+import logging
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import time
+import uuid
+
+from utils.testcase_store import StoredInput
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+# Address-space cap (MB, 0 = unlimited). Not applied to JVM/V8, which reserve
+# large virtual ranges up front; they get heap flags instead.
+SANDBOX_MEMORY_LIMIT_MB = int(os.getenv('SANDBOX_MEMORY_LIMIT_MB', 256))
+# Largest file a submission may write (MB)
+SANDBOX_MAX_FILE_MB = int(os.getenv('SANDBOX_MAX_FILE_MB', 16))
+# RLIMIT_NPROC counts every task of the uid, so it only works when the judge
+# runs under a dedicated user. 0 = off (use cgroup pids.max instead).
+SANDBOX_MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', 0))
+# Delegated cgroup v2 directory, e.g. /sys/fs/cgroup/judge (empty = off)
+SANDBOX_CGROUP_ROOT = os.getenv('SANDBOX_CGROUP_ROOT', '')
+SANDBOX_CGROUP_PIDS = int(os.getenv('SANDBOX_CGROUP_PIDS', 32))
+# stdout beyond this is "Output Limit Exceeded"; stderr beyond its cap is dropped
+SANDBOX_OUTPUT_LIMIT_KB = int(os.getenv('SANDBOX_OUTPUT_LIMIT_KB', 1024))
+SANDBOX_STDERR_LIMIT_KB = int(os.getenv('SANDBOX_STDERR_LIMIT_KB', 64))
+
+# Runtimes that cannot live under RLIMIT_AS (the docker client is a Go binary;
+# the container itself carries the memory limit)
+NO_ADDRESS_LIMIT = {'java', 'javascript', 'node', 'docker'}
+
+CHUNK_SIZE = 65536
+
+
+def limits_for(language, timeout):
+    """rlimits for one execution as {name: (soft, hard)} (JSON-friendly for the pool workers)."""
+    cpu = int(timeout) + 1
+    limits = {
+        'RLIMIT_CPU': (cpu, cpu + 1),
+        'RLIMIT_FSIZE': (SANDBOX_MAX_FILE_MB * 1024 * 1024,) * 2,
+        'RLIMIT_CORE': (0, 0),
+    }
+    if SANDBOX_MEMORY_LIMIT_MB and language not in NO_ADDRESS_LIMIT:
+        limits['RLIMIT_AS'] = (SANDBOX_MEMORY_LIMIT_MB * 1024 * 1024,) * 2
+    if SANDBOX_MAX_PROCESSES:
+        limits['RLIMIT_NPROC'] = (SANDBOX_MAX_PROCESSES,) * 2
+    return limits
+
+
+def apply_limits(limits):
+    for name, (soft, hard) in limits.items():
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+
+class CgroupSlice:
+    """A throwaway cgroup v2 child for one execution. No-op if unavailable."""
+
+    def __init__(self, language):
+        self.path = None
+        if not SANDBOX_CGROUP_ROOT:
+            return
+        path = os.path.join(SANDBOX_CGROUP_ROOT, f"job-{uuid.uuid4().hex[:12]}")
+        try:
+            os.mkdir(path)
+            if SANDBOX_MEMORY_LIMIT_MB and language not in NO_ADDRESS_LIMIT:
+                self._write(path, 'memory.max', str(SANDBOX_MEMORY_LIMIT_MB * 1024 * 1024))
+            self._write(path, 'memory.swap.max', '0')
+            self._write(path, 'pids.max', str(SANDBOX_CGROUP_PIDS))
+            self.path = path
+        except OSError as e:
+            logger.warning(f"cgroup slice unavailable, using rlimits only: {e}")
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write(path, name, value):
+        try:
+            with open(os.path.join(path, name), 'w') as f:
+                f.write(value)
+        except FileNotFoundError:
+            # Controller not enabled for this subtree
+            pass
+
+    def enter(self):
+        """Called in the child (preexec) to move itself into the slice."""
+        if self.path:
+            with open(os.path.join(self.path, 'cgroup.procs'), 'w') as f:
+                f.write('0')
+
+    def usage(self):
+        """(cpu_seconds, peak_memory_kb) from the slice, or (None, None)."""
+        if not self.path:
+            return None, None
+        cpu = mem = None
+        try:
+            with open(os.path.join(self.path, 'cpu.stat')) as f:
+                for line in f:
+                    key, _, value = line.partition(' ')
+                    if key == 'usage_usec':
+                        cpu = int(value) / 1e6
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(os.path.join(self.path, 'memory.peak')) as f:
+                mem = int(f.read()) // 1024
+        except (OSError, ValueError):
+            pass
+        return cpu, mem
+
+    def close(self):
+        if not self.path:
+            return
+        try:
+            with open(os.path.join(self.path, 'cgroup.kill'), 'w') as f:
+                f.write('1')
+        except OSError:
+            pass
+        for _ in range(50):
+            try:
+                os.rmdir(self.path)
+                break
+            except OSError:
+                time.sleep(0.01)
+        self.path = None
+
+
+def usage_from_rusage(rusage):
+    """(cpu_seconds, peak_rss_kb) from a wait4() rusage, or (None, None)."""
+    if rusage is None:
+        return None, None
+    return round(rusage.ru_utime + rusage.ru_stime, 4), rusage.ru_maxrss
+
+
+def make_preexec(limits, cgroup=None):
+    def preexec():
+        os.setsid()
+        if cgroup is not None:
+            cgroup.enter()
+        apply_limits(limits)
+    return preexec
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_process(cmd, input_str, timeout, language, env=None, cwd=None):
+    """
+    Runs one judged process under limits_for(language, timeout).
+    Wall-clock timeout kills the whole process group. A StoredInput
+    (utils/testcase_store.py) becomes the process's stdin file as is.
+    """
+    stored = isinstance(input_str, StoredInput)
+    cgroup = CgroupSlice(language)
+    stdin = input_str.open() if stored else subprocess.PIPE
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=make_preexec(limits_for(language, timeout), cgroup),
+            env=env,
+            cwd=cwd
+        )
+    except Exception:
+        cgroup.close()
+        raise
+    finally:
+        if stored:
+            stdin.close()
+
+    try:
+        data = None if stored else input_str.encode('utf-8')
+        stdout, stderr, timed_out, exceeded = communicate(proc, data, time.monotonic() + timeout)
+        if timed_out or exceeded:
+            kill_group(proc.pid)
+        returncode, rusage = reap(proc, time.monotonic() + 1)
+        cg_cpu, cg_mem = cgroup.usage()
+    finally:
+        kill_group(proc.pid)
+        cgroup.close()
+
+    cpu_time, memory_kb = usage_from_rusage(rusage)
+    return {
+        'returncode': returncode,
+        'stdout': stdout.decode('utf-8', errors='replace'),
+        'stderr': stderr.decode('utf-8', errors='replace'),
+        'timed_out': timed_out,
+        'output_limit_exceeded': exceeded,
+        'cpu_time': cg_cpu if cg_cpu is not None else cpu_time,
+        'memory_kb': cg_mem if cg_mem is not None else memory_kb
+    }
+
+
+def communicate(proc, data, deadline, output_limit=None, stderr_limit=None):
+    """
+    Feeds stdin and drains stdout/stderr in chunks until EOF or the deadline.
+    data may be a memoryview (sliced without copying), or None when stdin is
+    not a pipe.
+    Reading stops as soon as stdout passes output_limit bytes, so a runaway
+    print loop costs at most the limit in memory; stderr past stderr_limit is
+    read and discarded. Returns (stdout, stderr, timed_out, output_limit_exceeded).
+    """
+    if output_limit is None:
+        output_limit = SANDBOX_OUTPUT_LIMIT_KB * 1024
+    if stderr_limit is None:
+        stderr_limit = SANDBOX_STDERR_LIMIT_KB * 1024
+    outputs = {proc.stdout: bytearray(), proc.stderr: bytearray()}
+    sel = selectors.DefaultSelector()
+    if data:
+        os.set_blocking(proc.stdin.fileno(), False)
+        sel.register(proc.stdin, selectors.EVENT_WRITE)
+    elif proc.stdin:
+        proc.stdin.close()
+    sel.register(proc.stdout, selectors.EVENT_READ)
+    sel.register(proc.stderr, selectors.EVENT_READ)
+
+    timed_out = exceeded = False
+    try:
+        while sel.get_map() and not exceeded:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in sel.select(remaining):
+                f = key.fileobj
+                if f is proc.stdin:
+                    try:
+                        written = os.write(f.fileno(), data[:CHUNK_SIZE])
+                        data = data[written:]
+                    except BrokenPipeError:
+                        data = b''
+                    if not data:
+                        sel.unregister(f)
+                        f.close()
+                    continue
+                chunk = os.read(f.fileno(), CHUNK_SIZE)
+                if not chunk:
+                    sel.unregister(f)
+                    f.close()
+                    continue
+                buf = outputs[f]
+                if f is proc.stdout:
+                    buf += chunk
+                    if len(buf) > output_limit:
+                        del buf[output_limit:]
+                        exceeded = True
+                        break
+                elif len(buf) < stderr_limit:
+                    buf += chunk[:stderr_limit - len(buf)]
+    finally:
+        for key in list(sel.get_map().values()):
+            key.fileobj.close()
+        sel.close()
+    return bytes(outputs[proc.stdout]), bytes(outputs[proc.stderr]), timed_out, exceeded
+
+
+def cpu_limit_hit(result):
+    """True when the kernel stopped the process for exceeding RLIMIT_CPU."""
+    return result['returncode'] == -signal.SIGXCPU
+
+
+def reap(proc, deadline):
+    """wait4() the child so we get its rusage; kills it if it lingers past the deadline."""
+    while True:
+        try:
+            pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        except ChildProcessError:
+            return proc.returncode if proc.returncode is not None else -1, None
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return proc.returncode, rusage
+        if time.monotonic() > deadline:
+            kill_group(proc.pid)
+            deadline = time.monotonic() + 1
+        time.sleep(0.002)
@@ -0,0 +1,426 @@
+"""
+Warm sandbox worker pools for interpreted languages.
+
+Starting a fresh `python -c` / `node -e` per test case dominates judge latency
+under load. This module keeps per-language pools of pre-started workers:
+
+- Python: a long-lived zygote (utils/sandbox_worker.py) that forks a child per
+  job and is recycled after SANDBOX_POOL_MAX_JOBS jobs or on any failure.
+- Node.js: pre-spawned single-use workers (utils/sandbox_worker.js). V8 cannot
+  fork, so each worker is booted ahead of time and replaced after one job.
+- Java: a persistent JVM (utils/JudgeRunner.java) that loads each compiled
+  Main through a fresh classloader, recycled after JAVA_RUNNER_MAX_JOBS jobs
+  or after a job that timed out, ran out of memory or left threads running.
+
+Jobs run under the rlimits from utils/sandbox.py, and results carry the
+consumed CPU time and peak RSS.
+
+Callers should treat SandboxWorkerError as "pool unavailable" and fall back to
+the plain subprocess runners in utils/logic.py - unless its `started` flag is
+set: then the submission may already have run (and e.g. killed the worker with
+sys.exit/System.exit), so it must not be run a second time.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import select
+import struct
+import subprocess
+import threading
+import time
+
+from utils.compile_cache import compile_cache
+from utils.testcase_store import StoredInput, input_bytes
+from utils.sandbox import (limits_for, make_preexec, communicate, reap, kill_group, usage_from_rusage,
+                           SANDBOX_MEMORY_LIMIT_MB, SANDBOX_OUTPUT_LIMIT_KB, SANDBOX_STDERR_LIMIT_KB)
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+# Number of warm workers kept per language (0 disables the pool)
+SANDBOX_POOL_SIZE = int(os.getenv('SANDBOX_POOL_SIZE', 4))
+# Recycle a Python zygote after this many jobs
+SANDBOX_POOL_MAX_JOBS = int(os.getenv('SANDBOX_POOL_MAX_JOBS', 50))
+# Warm JVMs kept for Java (each costs ~50MB, so fewer than the other pools)
+JAVA_RUNNER_POOL_SIZE = int(os.getenv('JAVA_RUNNER_POOL_SIZE', 2))
+JAVA_RUNNER_MAX_JOBS = int(os.getenv('JAVA_RUNNER_MAX_JOBS', 100))
+# CPU seconds a pre-booted Node worker may use in total (boot + one job);
+# it is spawned before the job's timeout is known.
+NODE_WORKER_CPU_SEC = int(os.getenv('NODE_WORKER_CPU_SEC', 10))
+
+WORKER_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_WORKER = os.path.join(WORKER_DIR, 'sandbox_worker.py')
+NODE_WORKER = os.path.join(WORKER_DIR, 'sandbox_worker.js')
+JAVA_RUNNER = os.path.join(WORKER_DIR, 'JudgeRunner.java')
+
+HEADER = struct.Struct('>I')
+# JudgeRunner request header: timeout ms, stdout limit, stderr limit
+JAVA_REQUEST = struct.Struct('>iii')
+# JudgeRunner response header: exit code, timed out, output limit exceeded, recycle, cpu nanos
+JAVA_RESULT = struct.Struct('>i???q')
+# Extra wall time allowed for the worker itself on top of the job timeout
+WORKER_GRACE_SEC = 2
+
+
+class SandboxWorkerError(Exception):
+    """
+    The worker died, hung or spoke garbage; the job was not judged.
+    started=True: the failure came after the job was handed to the worker.
+    """
+
+    def __init__(self, message, started=False):
+        super().__init__(message)
+        self.started = started
+
+
+class FramedWorker:
+    """Base for long-lived workers that answer length-prefixed frames on stdout."""
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+    def _read_exact(self, n, deadline):
+        fd = self.proc.stdout.fileno()
+        buf = b''
+        while len(buf) < n:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SandboxWorkerError(f"{type(self).__name__} did not answer in time", started=True)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, n - len(buf))
+            if not chunk:
+                raise SandboxWorkerError(f"{type(self).__name__} exited unexpectedly", started=True)
+            buf += chunk
+        return buf
+
+    def close(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class PythonZygoteWorker(FramedWorker):
+    """A warm Python interpreter that forks one child per job."""
+
+    max_jobs = SANDBOX_POOL_MAX_JOBS
+
+    def __init__(self):
+        self.jobs_done = 0
+        self.proc = subprocess.Popen(
+            ['python', '-u', PYTHON_WORKER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=WORKER_DIR
+        )
+
+    def run(self, code, input_str, timeout):
+        stored = isinstance(input_str, StoredInput)
+        job = {
+            'code': code,
+            'input': '' if stored else input_str,
+            # The forked child opens a stored test case as its stdin
+            'input_path': input_str.path if stored else None,
+            'timeout': timeout,
+            'limits': limits_for('python', timeout),
+            'output_limit': SANDBOX_OUTPUT_LIMIT_KB * 1024,
+            'stderr_limit': SANDBOX_STDERR_LIMIT_KB * 1024
+        }
+        try:
+            try:
+                payload = json.dumps(job).encode('utf-8')
+                self.proc.stdin.write(HEADER.pack(len(payload)) + payload)
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise SandboxWorkerError(f"Python worker failed: {e}")
+            try:
+                deadline = time.monotonic() + timeout + WORKER_GRACE_SEC
+                header = self._read_exact(HEADER.size, deadline)
+                result = json.loads(self._read_exact(HEADER.unpack(header)[0], deadline).decode('utf-8'))
+            except (OSError, ValueError) as e:
+                raise SandboxWorkerError(f"Python worker failed: {e}", started=True)
+        finally:
+            self.jobs_done += 1
+
+        if result.get('worker_error'):
+            raise SandboxWorkerError(result['worker_error'], started=True)
+        return result
+
+
+class NodeWorker:
+    """A pre-booted Node.js process waiting for exactly one submission."""
+
+    max_jobs = 1
+
+    def __init__(self):
+        self.jobs_done = 0
+        code_r, self._code_w = os.pipe()
+        env = dict(os.environ, JUDGE_CODE_FD=str(code_r))
+        cmd = ['node', NODE_WORKER]
+        if SANDBOX_MEMORY_LIMIT_MB:
+            # V8 reserves too much address space for RLIMIT_AS; cap the heap instead
+            cmd.insert(1, f'--max-old-space-size={SANDBOX_MEMORY_LIMIT_MB}')
+        try:
+            self.proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(code_r,),
+                env=env,
+                cwd=WORKER_DIR,
+                preexec_fn=make_preexec(limits_for('javascript', NODE_WORKER_CPU_SEC))
+            )
+        except OSError:
+            os.close(self._code_w)
+            raise
+        finally:
+            os.close(code_r)
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+    def run(self, code, input_str, timeout):
+        self.jobs_done += 1
+        try:
+            data = code.encode('utf-8')
+            while data:
+                written = os.write(self._code_w, data)
+                data = data[written:]
+            self._close_code_pipe()
+        except OSError as e:
+            raise SandboxWorkerError(f"Node worker failed: {e}")
+
+        try:
+            with input_bytes(input_str) as data:
+                stdout, stderr, timed_out, exceeded = communicate(self.proc, data, time.monotonic() + timeout)
+            if timed_out or exceeded:
+                kill_group(self.proc.pid)
+            returncode, rusage = reap(self.proc, time.monotonic() + WORKER_GRACE_SEC)
+        except OSError as e:
+            raise SandboxWorkerError(f"Node worker failed: {e}", started=True)
+        # CPU time includes the worker's boot, which happened before the job
+        cpu_time, memory_kb = usage_from_rusage(rusage)
+        return {
+            'returncode': returncode,
+            'stdout': '' if timed_out else stdout.decode('utf-8', errors='replace'),
+            'stderr': '' if timed_out else stderr.decode('utf-8', errors='replace'),
+            'timed_out': timed_out,
+            'output_limit_exceeded': exceeded,
+            'cpu_time': cpu_time,
+            'memory_kb': memory_kb
+        }
+
+    def _close_code_pipe(self):
+        # Close exactly once: the fd number is reused by other workers' pipes
+        fd, self._code_w = self._code_w, None
+        if fd is not None:
+            os.close(fd)
+
+    def close(self):
+        try:
+            self._close_code_pipe()
+        except OSError:
+            pass
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class JavaRunnerWorker(FramedWorker):
+    """A warm JVM running utils/JudgeRunner.java; `code` is the directory holding Main.class."""
+
+    max_jobs = JAVA_RUNNER_MAX_JOBS
+    pool_size = JAVA_RUNNER_POOL_SIZE
+
+    def __init__(self):
+        self.jobs_done = 0
+        # Pinned in the compile cache for the JVM's lifetime (classes load lazily)
+        self._runner = self._build_runner()
+        cmd = ['java', '-XX:+UseSerialGC', '-cp', self._runner['path'], 'JudgeRunner']
+        if SANDBOX_MEMORY_LIMIT_MB:
+            cmd.insert(1, f'-Xmx{SANDBOX_MEMORY_LIMIT_MB}m')
+        # Long-lived: per-job CPU is bounded by the runner's timeout, not RLIMIT_CPU
+        limits = {name: value for name, value in limits_for('java', 0).items() if name != 'RLIMIT_CPU'}
+        try:
+            self.proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=WORKER_DIR,
+                preexec_fn=make_preexec(limits)
+            )
+        except Exception:
+            compile_cache.release(self._runner)
+            raise
+
+    def close(self):
+        super().close()
+        # Close exactly once: the lease is reference counted
+        runner, self._runner = self._runner, None
+        if runner is not None:
+            compile_cache.release(runner)
+
+    @staticmethod
+    def _build_runner():
+        with open(JAVA_RUNNER) as f:
+            source = f.read()
+
+        def build(workdir):
+            with open(os.path.join(workdir, 'JudgeRunner.java'), 'w') as f:
+                f.write(source)
+            c_proc = subprocess.run(['javac', 'JudgeRunner.java'], cwd=workdir, capture_output=True, text=True, timeout=30)
+            return c_proc.returncode == 0, c_proc.stderr
+
+        entry = compile_cache.acquire('java-runner', source, [], build)
+        if not entry['ok']:
+            compile_cache.release(entry)
+            raise OSError(f"JudgeRunner did not compile: {entry['output']}")
+        return entry
+
+    def run(self, class_dir, input_str, timeout):
+        path = class_dir.encode('utf-8')
+        header = b''.join([
+            JAVA_REQUEST.pack(int(timeout * 1000), SANDBOX_OUTPUT_LIMIT_KB * 1024, SANDBOX_STDERR_LIMIT_KB * 1024),
+            HEADER.pack(len(path)), path
+        ])
+        try:
+            try:
+                with input_bytes(input_str) as data:
+                    # Stored test cases are written straight from their mapping
+                    self.proc.stdin.write(header + HEADER.pack(len(data)))
+                    self.proc.stdin.write(data)
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise SandboxWorkerError(f"Java runner failed: {e}")
+            try:
+                deadline = time.monotonic() + timeout + WORKER_GRACE_SEC
+                returncode, timed_out, exceeded, recycle, cpu_nanos = JAVA_RESULT.unpack(self._read_exact(JAVA_RESULT.size, deadline))
+                stdout = self._read_exact(HEADER.unpack(self._read_exact(HEADER.size, deadline))[0], deadline)
+                stderr = self._read_exact(HEADER.unpack(self._read_exact(HEADER.size, deadline))[0], deadline)
+            except (OSError, ValueError, struct.error) as e:
+                raise SandboxWorkerError(f"Java runner failed: {e}", started=True)
+        finally:
+            self.jobs_done += 1
+
+        if recycle:
+            self.jobs_done = self.max_jobs
+        return {
+            'returncode': returncode,
+            'stdout': stdout.decode('utf-8', errors='replace'),
+            'stderr': stderr.decode('utf-8', errors='replace'),
+            'timed_out': timed_out,
+            'output_limit_exceeded': exceeded,
+            'cpu_time': round(cpu_nanos / 1e9, 4) if cpu_nanos >= 0 else None,
+            # The heap is shared by every job of this JVM; no per-job peak
+            'memory_kb': None
+        }
+
+
+class SandboxPool:
+    """Keeps up to `size` idle warm workers for one language."""
+
+    def __init__(self, worker_cls, size):
+        self.worker_cls = worker_cls
+        self.size = size
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self):
+        try:
+            self._idle.put(self.worker_cls())
+        except OSError as e:
+            logger.warning(f"Could not start {self.worker_cls.__name__}: {e}")
+
+    def _acquire(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                # Pool drained by a burst: start one on demand (still cheaper than nothing)
+                try:
+                    return self.worker_cls()
+                except OSError as e:
+                    raise SandboxWorkerError(f"Could not start worker: {e}")
+            if worker.is_alive():
+                return worker
+            worker.close()
+
+    def _release(self, worker, healthy):
+        if self._closed:
+            worker.close()
+            return
+        if healthy and worker.jobs_done < worker.max_jobs and worker.is_alive():
+            if self._idle.qsize() < self.size:
+                self._idle.put(worker)
+                return
+            worker.close()
+            return
+        worker.close()
+        if self._idle.qsize() < self.size:
+            self._spawn()
+
+    def run(self, code, input_str, timeout):
+        """Run one job. Returns the raw worker result dict or raises SandboxWorkerError."""
+        worker = self._acquire()
+        healthy = False
+        try:
+            result = worker.run(code, input_str, timeout)
+            healthy = True
+            return result
+        finally:
+            self._release(worker, healthy)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+WORKER_TYPES = {
+    'python': PythonZygoteWorker,
+    'javascript': NodeWorker,
+    'java': JavaRunnerWorker,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(language):
+    """Returns the warm pool for `language`, or None if pooling is off/unsupported."""
+    if SANDBOX_POOL_SIZE <= 0:
+        return None
+    if language == 'node':
+        language = 'javascript'
+    worker_cls = WORKER_TYPES.get(language)
+    if worker_cls is None:
+        return None
+    with _pools_lock:
+        pool = _pools.get(language)
+        if pool is None:
+            pool = SandboxPool(worker_cls, getattr(worker_cls, 'pool_size', SANDBOX_POOL_SIZE))
+            _pools[language] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
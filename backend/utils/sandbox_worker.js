@@ -0,0 +1,37 @@
+// Pre-spawned Node.js sandbox worker.
+//
+// Started ahead of time by utils/sandbox_pool.py so V8 is already booted when a
+// job arrives. The submission is read from the pipe named by JUDGE_CODE_FD and
+// evaluated like `node -e`; stdin/stdout/stderr belong to the submission.
+// Node cannot fork a warm process, so each worker serves exactly one job.
+'use strict';
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const Module = require('module');
+
+const codeFd = Number(process.env.JUDGE_CODE_FD);
+delete process.env.JUDGE_CODE_FD;
+
+const code = fs.readFileSync(codeFd, 'utf8');
+fs.closeSync(codeFd);
+
+const filename = path.join(process.cwd(), '[eval]');
+const evalModule = new Module(filename);
+evalModule.filename = filename;
+evalModule.paths = Module._nodeModulePaths(process.cwd());
+
+const wrapper = vm.compileFunction(
+    code,
+    ['exports', 'require', 'module', '__filename', '__dirname'],
+    { filename: '[eval]' }
+);
+wrapper.call(
+    evalModule.exports,
+    evalModule.exports,
+    Module.createRequire(filename),
+    evalModule,
+    filename,
+    process.cwd()
+);
@@ -0,0 +1,245 @@
+"""
+Pre-forked Python sandbox worker.
+
+Started once by utils/sandbox_pool.py and kept warm. It reads framed jobs
+(4-byte big-endian length + JSON) from stdin and forks a fresh child per job,
+so each submission still runs in its own process but skips interpreter startup.
+Only the standard library is imported here on purpose.
+"""
+import builtins
+import json
+import os
+import resource
+import selectors
+import signal
+import struct
+import sys
+import time
+import traceback
+
+# Modules participants commonly import; loading them once in the parent makes
+# `import math` etc. free in every forked child.
+PRELOAD_MODULES = ['math', 'collections', 'itertools', 'functools', 'heapq', 'bisect', 're', 'string']
+
+HEADER = struct.Struct('>I')
+CHUNK_SIZE = 65536
+# How often the child is polled for exit once its pipes are closed
+WAIT_POLL_SEC = 0.005
+
+
+def read_exact(fd, n):
+    buf = b''
+    while len(buf) < n:
+        chunk = os.read(fd, n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+def read_frame(fd):
+    header = read_exact(fd, HEADER.size)
+    if header is None:
+        return None
+    payload = read_exact(fd, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_frame(fd, obj):
+    payload = json.dumps(obj).encode('utf-8')
+    data = HEADER.pack(len(payload)) + payload
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def apply_limits(job):
+    """
+    Resource limits applied inside the forked child before user code runs.
+    job['limits'] is utils/sandbox.limits_for(): {'RLIMIT_*': [soft, hard]}.
+    """
+    limits = job.get('limits')
+    if limits is None:
+        cpu = int(job.get('timeout', 2)) + 1
+        limits = {'RLIMIT_CPU': (cpu, cpu)}
+    for name, (soft, hard) in limits.items():
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_child(job, stdin_r, stdout_w, stderr_w, job_fds):
+    """Body of the forked child. Never returns."""
+    exit_code = 0
+    try:
+        for fd in job_fds:
+            os.close(fd)
+        os.dup2(stdin_r, 0)
+        os.dup2(stdout_w, 1)
+        os.dup2(stderr_w, 2)
+        for fd in (stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Own process group, so a timeout also kills anything the job forked
+        os.setsid()
+        apply_limits(job)
+
+        # Rebind the std streams to the new fds; the inherited wrappers may hold
+        # buffered bytes from the job pipe.
+        sys.stdin = open(0, 'r', closefd=False)
+        sys.stdout = open(1, 'w', closefd=False)
+        sys.stderr = open(2, 'w', closefd=False)
+
+        try:
+            compiled = compile(job['code'], '<string>', 'exec')
+            exec(compiled, {'__name__': '__main__', '__builtins__': builtins})
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException as e:
+            # Drop this module's frame so the traceback looks like `python -c`
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            exit_code = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            exit_code = exit_code or 1
+    finally:
+        os._exit(exit_code)
+
+
+def run_job(job, job_fds):
+    if job.get('input_path'):
+        # Stored (large) test case: the child reads the file itself
+        stdin_r, stdin_w = os.open(job['input_path'], os.O_RDONLY), None
+    else:
+        stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        if stdin_w is not None:
+            os.close(stdin_w)
+        os.close(stdout_r)
+        os.close(stderr_r)
+        run_child(job, stdin_r, stdout_w, stderr_w, job_fds)
+
+    os.close(stdin_r)
+    os.close(stdout_w)
+    os.close(stderr_w)
+
+    timeout = float(job.get('timeout', 2))
+    deadline = time.monotonic() + timeout
+    pending_input = job.get('input', '').encode('utf-8')
+    # stdout past output_limit aborts the job; stderr past stderr_limit is dropped
+    limits = {stdout_r: job.get('output_limit') or sys.maxsize, stderr_r: job.get('stderr_limit') or sys.maxsize}
+    outputs = {stdout_r: bytearray(), stderr_r: bytearray()}
+    timed_out = exceeded = False
+
+    sel = selectors.DefaultSelector()
+    if pending_input:
+        os.set_blocking(stdin_w, False)
+        sel.register(stdin_w, selectors.EVENT_WRITE)
+    elif stdin_w is not None:
+        os.close(stdin_w)
+    sel.register(stdout_r, selectors.EVENT_READ)
+    sel.register(stderr_r, selectors.EVENT_READ)
+
+    while sel.get_map() and not exceeded:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        for key, _ in sel.select(remaining):
+            fd = key.fd
+            if fd == stdin_w:
+                try:
+                    written = os.write(fd, pending_input[:CHUNK_SIZE])
+                    pending_input = pending_input[written:]
+                except BrokenPipeError:
+                    pending_input = b''
+                if not pending_input:
+                    sel.unregister(fd)
+                    os.close(fd)
+            else:
+                chunk = os.read(fd, CHUNK_SIZE)
+                if not chunk:
+                    sel.unregister(fd)
+                    os.close(fd)
+                    continue
+                buf = outputs[fd]
+                room = max(limits[fd] - len(buf), 0)
+                buf += chunk[:room]
+                if fd == stdout_r and len(chunk) > room:
+                    exceeded = True
+                    break
+
+    if timed_out or exceeded:
+        kill_group(pid)
+    for key in list(sel.get_map().values()):
+        os.close(key.fd)
+    sel.close()
+
+    # The child may close stdout/stderr and keep running: it gets the same deadline
+    while True:
+        waited, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            break
+        if time.monotonic() >= deadline:
+            timed_out = True
+            kill_group(pid)
+            _, status, rusage = os.wait4(pid, 0)
+            break
+        time.sleep(WAIT_POLL_SEC)
+    kill_group(pid)
+
+    return {
+        'returncode': os.waitstatus_to_exitcode(status),
+        'stdout': outputs[stdout_r].decode('utf-8', errors='replace'),
+        'stderr': outputs[stderr_r].decode('utf-8', errors='replace'),
+        'timed_out': timed_out,
+        'output_limit_exceeded': exceeded,
+        'cpu_time': round(rusage.ru_utime + rusage.ru_stime, 4),
+        'memory_kb': rusage.ru_maxrss
+    }
+
+
+def main():
+    # Keep private copies of the job pipe so children can close them cleanly.
+    job_in = os.dup(0)
+    job_out = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    for name in PRELOAD_MODULES:
+        __import__(name)
+
+    while True:
+        job = read_frame(job_in)
+        if job is None:
+            break
+        try:
+            result = run_job(job, (job_in, job_out))
+        except Exception as e:
+            result = {'returncode': -1, 'stdout': '', 'stderr': '', 'timed_out': False, 'worker_error': str(e)}
+        write_frame(job_out, result)
+
+
+if __name__ == '__main__':
+    main()
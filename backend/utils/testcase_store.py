@@ -0,0 +1,182 @@
+"""
+Content-addressed store for large (stress-test) cases.
+
+questions.test_cases is loaded for every run and its strings are copied into
+every sandbox pipe, which is fine for a few lines of input and not for
+megabytes. Large inputs/outputs are uploaded once instead
+(POST /admin/testcases), stored under their sha256 and referenced from the
+test case as {"input_ref": "<sha256>", "expected_ref": "<sha256>"}.
+
+At run time a referenced input never becomes a Python string: the sandboxed
+process reads the stored file as its stdin (or, for pre-spawned workers, the
+file is memory-mapped and written to their stdin pipe from the mapping).
+Expected outputs are read once per question when the comparator prepares
+them (utils/comparators.py caches the prepared form).
+
+TESTCASE_STORE_DIR is a plain directory; mount a shared volume (or an object
+store) there so every backend worker sees the same files.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# === CONFIGURATION ===
+TESTCASE_STORE_DIR = os.getenv(
+    'TESTCASE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'testcase_store')
+)
+TESTCASE_MAX_UPLOAD_MB = int(os.getenv('TESTCASE_MAX_UPLOAD_MB', 64))
+# How much of a stored case is echoed back in run/submit results
+PREVIEW_BYTES = 256
+CHUNK_SIZE = 1024 * 1024
+
+REF_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class TestCaseStoreError(Exception):
+    """Unknown/malformed ref or a failed upload."""
+
+
+def path_for(ref):
+    if not isinstance(ref, str) or not REF_RE.match(ref):
+        raise TestCaseStoreError(f"Invalid test case ref: {ref!r}")
+    return os.path.join(TESTCASE_STORE_DIR, ref[:2], ref)
+
+
+def exists(ref):
+    try:
+        return os.path.isfile(path_for(ref))
+    except TestCaseStoreError:
+        return False
+
+
+def put(stream):
+    """
+    Stores the bytes read from a binary stream (or a bytes object).
+    Returns (ref, size). Identical content is stored once.
+    """
+    if isinstance(stream, (bytes, bytearray)):
+        data, stream = stream, None
+    os.makedirs(TESTCASE_STORE_DIR, exist_ok=True)
+    max_bytes = TESTCASE_MAX_UPLOAD_MB * 1024 * 1024
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=TESTCASE_STORE_DIR, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            chunks = [data] if stream is None else iter(lambda: stream.read(CHUNK_SIZE), b'')
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise TestCaseStoreError(f"Test case larger than {TESTCASE_MAX_UPLOAD_MB} MB")
+                digest.update(chunk)
+                out.write(chunk)
+        ref = digest.hexdigest()
+        path = path_for(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    logger.info(f"Stored test case {ref} ({size} bytes)")
+    return ref, size
+
+
+class StoredInput:
+    """A file-backed test input. Handed to the sandbox instead of a str."""
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.path = path_for(ref)
+        try:
+            self.size = os.path.getsize(self.path)
+        except OSError:
+            raise TestCaseStoreError(f"Test case {ref} not found in {TESTCASE_STORE_DIR}")
+
+    def open(self):
+        """Binary file object, usable directly as a subprocess stdin."""
+        return open(self.path, 'rb')
+
+    def preview(self):
+        with self.open() as f:
+            head = f.read(PREVIEW_BYTES).decode('utf-8', errors='replace')
+        if self.size <= PREVIEW_BYTES:
+            return head
+        return f"{head}... [{self.size} bytes, ref {self.ref[:12]}]"
+
+
+@contextmanager
+def input_bytes(value):
+    """
+    Bytes-like view of a test input for writing into a pipe: str inputs are
+    encoded, StoredInput is memory-mapped (slicing the view does not copy).
+    """
+    if not isinstance(value, StoredInput):
+        yield value.encode('utf-8')
+        return
+    if value.size == 0:
+        yield b''
+        return
+    with value.open() as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            # A caller still holds a slice; the mapping goes with it
+            pass
+
+
+def case_input(case):
+    """What the sandbox gets for a test case: StoredInput for input_ref, else the str input."""
+    if case.get('input_ref'):
+        return StoredInput(case['input_ref'])
+    value = case.get('input', '')
+    return '' if value is None else str(value)
+
+
+def case_expected(case):
+    """Expected output as text (read from the store for expected_ref)."""
+    if case.get('expected_ref'):
+        try:
+            with open(path_for(case['expected_ref']), 'rb') as f:
+                return f.read().decode('utf-8', errors='replace')
+        except OSError:
+            raise TestCaseStoreError(f"Test case {case['expected_ref']} not found in {TESTCASE_STORE_DIR}")
+    value = case.get('expected')
+    return '' if value is None else str(value)
+
+
+def display(case, field):
+    """Value shown in results for case[field] ('input'/'expected'); stored cases are previewed."""
+    ref = case.get(f'{field}_ref')
+    if not ref:
+        return case.get(field, '')
+    try:
+        return StoredInput(ref).preview()
+    except TestCaseStoreError:
+        return f"[missing test case {ref[:12]}]"
+
+
+def validate_cases(cases):
+    """Raises ValueError when a test case references a file that is not in the store."""
+    for i, case in enumerate(cases or []):
+        if not isinstance(case, dict):
+            continue
+        for field in ('input_ref', 'expected_ref'):
+            ref = case.get(field)
+            if ref and not exists(ref):
+                raise ValueError(f"Test case {i + 1}: {field} {ref} is not in the test case store")
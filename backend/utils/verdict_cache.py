@@ -0,0 +1,61 @@
+"""
+Content-addressed cache of judge verdicts.
+
+Participants re-run unchanged code and many converge on the same fix for a
+question's buggy_code. A batch verdict is keyed on (question_id, test-case-set
+version, comparator, language, code hash, mode), where the version
+is a hash of the cases themselves, so editing a question's test cases can
+never serve a stale verdict. invalidate_question() also drops
+entries explicitly when a question is changed or removed.
+"""
+import hashlib
+import json
+import os
+
+from utils.cache import TTLCache
+
+# === CONFIGURATION ===
+VERDICT_CACHE_TTL = int(os.getenv('VERDICT_CACHE_TTL', 900))
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv('VERDICT_CACHE_MAX_ENTRIES', 2048))
+
+# Verdicts that depend on machine load rather than on the code are never cached
+NON_CACHEABLE_ERRORS = ("Time Limit Exceeded", "Internal Execution Error", "CPU Budget Exceeded")
+
+verdict_cache = TTLCache(VERDICT_CACHE_MAX_ENTRIES, VERDICT_CACHE_TTL)
+
+
+def normalize_code(code):
+    """
+    Only CRLF -> LF: any other whitespace can be significant (inside string
+    literals, after a backslash continuation), so it stays part of the key.
+    """
+    return code.replace('\r\n', '\n')
+
+
+def cases_version(cases):
+    """Stable hash of a test-case set."""
+    blob = json.dumps(cases, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def make_key(question_id, version, comparator, language, code, stop_on_failure):
+    """version is cases_version() of the test cases, comparator the comparator name."""
+    code_hash = hashlib.sha256(normalize_code(code).encode('utf-8')).hexdigest()
+    mode = 'submit' if stop_on_failure else 'run'
+    return (str(question_id), version, comparator, language, code_hash, mode)
+
+
+def is_cacheable(batch):
+    # A case whose sandbox worker died mid-job reads as a plain Runtime Error
+    if batch.get('worker_lost'):
+        return False
+    for r in batch['results']:
+        if r.get('error') and r['error'].startswith(NON_CACHEABLE_ERRORS):
+            return False
+    return True
+
+
+def invalidate_question(question_id):
+    """Forget every cached verdict for a question (after edit/delete)."""
+    qid = str(question_id)
+    return verdict_cache.invalidate_where(lambda key: key[0] == qid)
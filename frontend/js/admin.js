@@ -1640,6 +1640,16 @@ const Admin = {
                                     <option value="cpp">C++</option>
                                 </select>
                             </div>
+                            <div>
+                                <label style="display:block; margin-bottom: 0.5rem; font-weight: 600;">Output Check</label>
+                                <select id="new-q-comparator" class="input" style="width:100%;">
+                                    <option value="whitespace">Line by line (ignore spacing)</option>
+                                    <option value="exact">Exact</option>
+                                    <option value="token">Tokens</option>
+                                    <option value="float">Numbers (1e-6 tolerance)</option>
+                                    <option value="unordered">Lines in any order</option>
+                                </select>
+                            </div>
                         
                         <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-bottom: 1rem;">
                                 <div>
@@ -1681,6 +1691,7 @@ const Admin = {
         const title = document.getElementById('new-q-title').value;
         const level = document.getElementById('new-q-level').value; // Changed from diff
         const language = document.getElementById('new-q-lang').value;
+        const comparator = document.getElementById('new-q-comparator').value;
         const expInput = document.getElementById('new-q-input').value;
         const expOutput = document.getElementById('new-q-output').value;
         const buggyCode = document.getElementById('new-q-buggy').value;
@@ -1699,6 +1710,7 @@ const Admin = {
                 language,
                 expected_input: expInput,
                 expected_output: expOutput,
+                comparator,
                 boilerplate: { [language]: buggyCode }
             });
 
@@ -1743,6 +1755,7 @@ const Admin = {
 
                     const buggy = row['BuggyCode'] || row['buggy_code'] || row['Code'] || row['code'] || "";
                     const difficulty = row['Difficulty'] || row['difficulty'] || 'Level 1';
+                    const comparator = row['Comparator'] || row['comparator'] || 'whitespace';
 
                     if (title && expOutput) {
                         questions.push({
@@ -1750,6 +1763,7 @@ const Admin = {
                             difficulty: difficulty, // Assume Excel has correct 'Level X' format or we normalize
                             expected_input: expInput,
                             expected_output: expOutput,
+                            comparator,
                             boilerplate: { python: buggy, javascript: buggy, java: buggy, cpp: buggy }
                         });
                     }
@@ -1,77 +1,72 @@
 """
 Script to create 400 test users in the database for load testing
 Run this ONCE before load testing
+
+Connects with the backend's DB_* environment variables (backend/.env) and
+loads every user in one COPY (db_manager.bulk_insert), skipping usernames
+that already exist:
+
+    python create_test_users.py                 # TEST001 ... TEST400
+    python create_test_users.py --count 1000
 """
 
-import requests
+import argparse
+import os
+import sys
 import time
 
-# Your deployed URL
-BASE_URL = "https://debug-marathon-2026.onrender.com"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from db_connection import db_manager  # noqa: E402
+
+USER_COLUMNS = ('username', 'email', 'password_hash', 'full_name', 'role', 'status', 'college', 'department')
+
+
+def test_user_rows(count):
+    """TEST001 ... TESTnnn participants, as the locustfile logs them in."""
+    for i in range(1, count + 1):
+        yield (
+            f"TEST{i:03d}",
+            f"test{i}@loadtest.com",
+            'dummy_hash',
+            f"Load Test User {i}",
+            'participant',
+            'active',
+            'Load Test College',
+            'CSE'
+        )
+
 
 def create_test_users(count=400):
-    """Create test users using the seed endpoint"""
-    
+    """Insert the test users in one round trip"""
+
     print(f"Creating {count} test users...")
-    
-    # First, use the seed endpoint to create initial users
-    try:
-        response = requests.post(f"{BASE_URL}/api/admin/seed-test-data")
-        print(f"Initial seed response: {response.json()}")
-    except Exception as e:
-        print(f"Seed endpoint error: {e}")
-    
-    # Now create additional participants
-    created = 0
-    failed = 0
-    
-    for i in range(1, count + 1):
-        username = f"TEST{i:03d}"
-        
-        try:
-            # You'll need to implement a bulk user creation endpoint
-            # For now, this shows the structure
-            print(f"Creating user: {username}")
-            created += 1
-            
-            # Rate limit to avoid overwhelming the server
-            if i % 10 == 0:
-                print(f"Progress: {i}/{count}")
-                time.sleep(1)
-                
-        except Exception as e:
-            print(f"Failed to create {username}: {e}")
-            failed += 1
-    
-    print(f"\n✅ Created {created} users")
-    print(f"❌ Failed {failed} users")
-    print(f"\nYou can now run load testing with up to {created} concurrent users")
+
+    if db_manager is None:
+        print("❌ No database connection - check DB_HOST / DB_PASSWORD")
+        return False
+
+    started = time.perf_counter()
+    res = db_manager.bulk_insert('users', USER_COLUMNS, test_user_rows(count), on_conflict=['username'])
+    if not res:
+        print("❌ Bulk insert failed (see the log above)")
+        return False
+
+    created = res['affected']
+    print(f"\n✅ Created {created} users in {time.perf_counter() - started:.2f}s")
+    print(f"⏭️  Skipped {count - created} existing users")
+    print(f"\nYou can now run load testing with up to {count} concurrent users")
+    return True
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=400, help='number of TESTnnn users (default 400)')
+    args = parser.parse_args()
+
     print("="*60)
     print("TEST USER CREATION SCRIPT")
     print("="*60 + "\n")
-    
-    # Run directly via SQL for better performance
-    print("⚠️  RECOMMENDED: Run this SQL directly in Supabase:")
-    print("\n" + "-"*60)
-    print("""
--- Create 400 test participants in one go
-INSERT INTO users (username, email, password_hash, full_name, role, status, college, department)
-SELECT 
-    'TEST' || LPAD(generate_series::text, 3, '0'),
-    'test' || generate_series || '@loadtest.com',
-    'dummy_hash',
-    'Load Test User ' || generate_series,
-    'participant',
-    'active',
-    'Load Test College',
-    'CSE'
-FROM generate_series(1, 400)
-ON CONFLICT (username) DO NOTHING;
-    """)
-    print("-"*60 + "\n")
-    
-    input("Press Enter after running the SQL in Supabase...")
-    print("✅ Test users should now be ready!")
+
+    sys.exit(0 if create_test_users(args.count) else 1)
@@ -0,0 +1,265 @@
+"""
+Offline Judge Benchmark for Debug Marathon Platform
+Drives the code execution path (backend/utils/logic.py) directly - no server,
+no database, no network - with a corpus of typical contest submissions.
+
+Usage:
+    python judge_benchmark.py                                  # all languages, defaults
+    python judge_benchmark.py --languages python c --concurrency 8 --jobs 200
+    python judge_benchmark.py --mode batch --output results/$(git rev-parse --short HEAD).json
+    python judge_benchmark.py --compare results/before.json results/after.json
+
+Modes:
+    single  one execute_code_internal() call per test case (the old judge path)
+    batch   one execute_batch() call per submission (all its cases)
+
+A job is one single-mode call or one batch. Languages whose toolchain is not
+installed are skipped and listed under "skipped" in the report.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from utils.logic import execute_code_internal, execute_batch, outputs_match  # noqa: E402
+
+# Representative submissions: a read-compute-print loop, some recursion and a
+# sort, each with the kind of small test cases the contest uses.
+CASES = [
+    {'input': '5\n3 1 4 1 5\n', 'expected': '1 1 3 4 5\n14'},
+    {'input': '1\n42\n', 'expected': '42\n42'},
+    {'input': '8\n9 8 7 6 5 4 3 2\n', 'expected': '2 3 4 5 6 7 8 9\n44'},
+]
+
+CORPUS = {
+    'python': {
+        'tool': 'python',
+        'code': (
+            "n = int(input())\n"
+            "a = sorted(map(int, input().split()))\n"
+            "def total(i):\n"
+            "    return 0 if i == len(a) else a[i] + total(i + 1)\n"
+            "print(' '.join(map(str, a)))\n"
+            "print(total(0))\n"
+        ),
+    },
+    'c': {
+        'tool': 'gcc',
+        'code': (
+            "#include <stdio.h>\n#include <stdlib.h>\n"
+            "int cmp(const void *x, const void *y) { return *(int *)x - *(int *)y; }\n"
+            "int main() { int n, a[1000], s = 0; scanf(\"%d\", &n);\n"
+            "  for (int i = 0; i < n; i++) { scanf(\"%d\", &a[i]); s += a[i]; }\n"
+            "  qsort(a, n, sizeof(int), cmp);\n"
+            "  for (int i = 0; i < n; i++) printf(i ? \" %d\" : \"%d\", a[i]);\n"
+            "  printf(\"\\n%d\\n\", s); return 0; }\n"
+        ),
+    },
+    'cpp': {
+        'tool': 'g++',
+        'code': (
+            "#include <bits/stdc++.h>\nusing namespace std;\n"
+            "int main() { int n; cin >> n; vector<int> a(n); for (auto &x : a) cin >> x;\n"
+            "  sort(a.begin(), a.end());\n"
+            "  for (int i = 0; i < n; i++) cout << (i ? \" \" : \"\") << a[i];\n"
+            "  cout << \"\\n\" << accumulate(a.begin(), a.end(), 0) << \"\\n\"; }\n"
+        ),
+    },
+    'java': {
+        'tool': 'javac',
+        'code': (
+            "import java.util.*;\n"
+            "public class Main { public static void main(String[] args) {\n"
+            "  Scanner sc = new Scanner(System.in); int n = sc.nextInt(); int[] a = new int[n]; int s = 0;\n"
+            "  for (int i = 0; i < n; i++) { a[i] = sc.nextInt(); s += a[i]; }\n"
+            "  Arrays.sort(a); StringBuilder sb = new StringBuilder();\n"
+            "  for (int i = 0; i < n; i++) { if (i > 0) sb.append(' '); sb.append(a[i]); }\n"
+            "  System.out.println(sb); System.out.println(s); } }\n"
+        ),
+    },
+    'javascript': {
+        'tool': 'node',
+        'code': (
+            "let data = '';\n"
+            "process.stdin.on('data', c => data += c);\n"
+            "process.stdin.on('end', () => {\n"
+            "  const [n, ...a] = data.trim().split(/\\s+/).map(Number);\n"
+            "  a.sort((x, y) => x - y);\n"
+            "  console.log(a.join(' '));\n"
+            "  console.log(a.reduce((s, x) => s + x, 0));\n"
+            "});\n"
+        ),
+    },
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def process_cpu():
+    """CPU seconds of this process plus every child it has reaped."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def make_job(language, mode, index):
+    code = CORPUS[language]['code']
+    if mode == 'batch':
+        def job():
+            batch = execute_batch(code, language, CASES)
+            sandbox_cpu = sum(r['cpu_time'] or 0 for r in batch['results'])
+            return batch['all_passed'], sandbox_cpu
+    else:
+        case = CASES[index % len(CASES)]
+
+        def job():
+            res = execute_code_internal(code, language, case['input'])
+            ok = res['success'] and outputs_match(res['output'], case['expected'])
+            return ok, res.get('cpu_time') or 0
+    return job
+
+
+def run_language(language, mode, jobs, concurrency, warmup):
+    for i in range(warmup):
+        make_job(language, mode, i)()
+
+    latencies = []
+    failures = 0
+    sandbox_cpu = 0.0
+
+    def timed(i):
+        start = time.perf_counter()
+        ok, cpu = make_job(language, mode, i)()
+        return time.perf_counter() - start, ok, cpu
+
+    cpu_start = process_cpu()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, ok, cpu in executor.map(timed, range(jobs)):
+            latencies.append(latency)
+            sandbox_cpu += cpu
+            if not ok:
+                failures += 1
+    wall = time.perf_counter() - wall_start
+    judge_cpu = process_cpu() - cpu_start
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        'jobs': jobs,
+        'failures': failures,
+        'wall_sec': round(wall, 3),
+        'jobs_per_sec': round(jobs / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': ms(statistics.mean(latencies)),
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1]),
+        },
+        # Sandbox CPU is what the submissions used; judge CPU adds this
+        # process and the children it reaped (compilers, plain subprocesses).
+        'sandbox_cpu_ms_per_job': round(sandbox_cpu * 1000 / jobs, 2),
+        'judge_cpu_ms_per_job': round(judge_cpu * 1000 / jobs, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'language':<12}{'metric':<24}{'before':>12}{'after':>12}{'change':>10}")
+    for language, new in after['results'].items():
+        old = before['results'].get(language)
+        if not old:
+            continue
+        rows = [
+            ('jobs_per_sec', old['jobs_per_sec'], new['jobs_per_sec']),
+            ('p50_ms', old['latency_ms']['p50'], new['latency_ms']['p50']),
+            ('p95_ms', old['latency_ms']['p95'], new['latency_ms']['p95']),
+            ('p99_ms', old['latency_ms']['p99'], new['latency_ms']['p99']),
+            ('judge_cpu_ms_per_job', old['judge_cpu_ms_per_job'], new['judge_cpu_ms_per_job']),
+        ]
+        for name, a, b in rows:
+            change = f"{(b - a) / a * 100:+.1f}%" if a else '-'
+            print(f"{language:<12}{name:<24}{a:>12}{b:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the judge execution path')
+    parser.add_argument('--languages', nargs='+', default=list(CORPUS), choices=list(CORPUS))
+    parser.add_argument('--mode', choices=['single', 'batch'], default='single')
+    parser.add_argument('--jobs', type=int, default=100, help='jobs per language')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=3, help='untimed jobs per language (pools, compile cache)')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='diff two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'config': {
+            'mode': args.mode, 'jobs': args.jobs, 'concurrency': args.concurrency, 'warmup': args.warmup,
+            'execution_mode': os.getenv('EXECUTION_MODE', 'local_secure'),
+        },
+        'results': {},
+        'skipped': [],
+    }
+
+    for language in args.languages:
+        if not shutil.which(CORPUS[language]['tool']):
+            print(f"- {language}: skipped ({CORPUS[language]['tool']} not found)")
+            report['skipped'].append(language)
+            continue
+        res = run_language(language, args.mode, args.jobs, args.concurrency, args.warmup)
+        report['results'][language] = res
+        lat = res['latency_ms']
+        print(f"- {language}: {res['jobs_per_sec']} jobs/s, p50 {lat['p50']}ms, p95 {lat['p95']}ms, "
+              f"p99 {lat['p99']}ms, cpu/job {res['judge_cpu_ms_per_job']}ms, failures {res['failures']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()